@@ -1,13 +1,24 @@
 import streamlit as st
 import os
 import json
+import hashlib
+import time
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
 from modules.nlp_engine import NLPEngine
 from modules.legal_analyzer import LegalAnalyzer
+from modules.model_router import ModelRouter
+from modules.analysis_cache import AnalysisCache
 from modules.report_generator import ReportGenerator
+from modules.revisions import RevisionStore, IncrementalAnalyzer
+from modules.job_queue import JobQueue
+from modules.audit_store import AuditStore
+from modules.portfolio import PortfolioStore, PortfolioAnalytics
+from modules.clause_index import ClauseIndex
+from modules.metrics import metrics, profiled
+from modules.output_schema import is_complete
 from modules.templates import list_templates, get_template
 import config
 
@@ -129,12 +140,18 @@ contract_type_manual = st.sidebar.selectbox(
 )
 show_nlp_details = st.sidebar.checkbox("Show NLP Analysis Details", value=config.SHOW_NLP_DETAILS_DEFAULT)
 show_raw_json = st.sidebar.checkbox("Show Raw JSON Output", value=config.SHOW_RAW_JSON_DEFAULT)
+revision_id = st.sidebar.text_input(
+    "Track Revisions As (optional)",
+    help="Give every version of the same agreement the same name; later versions only re-analyze changed clauses."
+).strip()
+show_portfolio = st.sidebar.checkbox("📈 Show Portfolio Dashboard", value=False)
+show_audit_trail = st.sidebar.checkbox("🗂️ Show Audit Trail", value=False)
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("### ⚙️ Configuration")
 st.sidebar.info(f"""
 **Provider:** {api_provider}  
-**Model:** {selected_model}  
+**Model:** {f"{config.ROUTER_CHEAP_MODEL} / {selected_model} (routed)" if config.MODEL_ROUTING_ENABLED else selected_model}  
 **API Key:** {'✅ Configured' if api_key else '❌ Missing'}
 """)
 
@@ -148,10 +165,311 @@ if not api_key:
        - `OPENAI_API_KEY` for OpenAI
     """)
 
-# Initialize Engines
-nlp_engine = NLPEngine()
-report_gen = ReportGenerator(output_dir=config.OUTPUT_DIR)
-analyzer = LegalAnalyzer(api_key=api_key, provider=api_provider, model=selected_model)
+metrics.enabled = config.METRICS_ENABLED
+metrics.log_path = os.path.join(config.OUTPUT_DIR, config.METRICS_LOG_FILE) if config.METRICS_LOG_FILE else None
+
+# Initialize Engines (once per process, shared by all sessions and reruns)
+@st.cache_resource
+def get_nlp_engine():
+    return NLPEngine()
+
+@st.cache_resource
+def get_report_generator():
+    return ReportGenerator(output_dir=config.OUTPUT_DIR, prefix=config.REPORT_FILENAME_PREFIX)
+
+@st.cache_resource
+def get_analyzer(api_key, provider, model):
+    analysis_cache = None
+    if config.ANALYSIS_CACHE_ENABLED:
+        analysis_cache = AnalysisCache(
+            os.path.join(config.OUTPUT_DIR, config.ANALYSIS_CACHE_FILE),
+            ttl_seconds=config.ANALYSIS_CACHE_TTL_HOURS * 3600,
+            max_entries=config.ANALYSIS_CACHE_MAX_ENTRIES,
+            max_bytes=config.ANALYSIS_CACHE_MAX_MB * 1024 * 1024
+        )
+    router = None
+    if config.MODEL_ROUTING_ENABLED:
+        router = ModelRouter(config.ROUTER_CHEAP_MODEL, model,
+                             max_cheap_tokens=config.ROUTER_MAX_CHEAP_TOKENS,
+                             max_cheap_score=config.ROUTER_MAX_CHEAP_SCORE,
+                             hedge_after=config.HEDGE_AFTER_SECONDS, hedge_model=config.ROUTER_HEDGE_MODEL)
+    return LegalAnalyzer(
+        api_key=api_key, provider=provider, model=model, cache=analysis_cache, router=router,
+        chunked=config.CHUNKED_ANALYSIS_ENABLED,
+        chunk_tokens=config.CHUNK_TOKEN_BUDGET,
+        max_workers=config.MAX_PARALLEL_REQUESTS,
+        prompt_tokens=config.PROMPT_TOKEN_BUDGET,
+        regenerate_sections=config.REGENERATE_MISSING_SECTIONS
+    )
+
+@st.cache_data(max_entries=config.NLP_CACHE_MAX_ENTRIES, show_spinner=False)
+def run_nlp_pipeline(file_hash, file_name, _file_bytes):
+    """Extraction + NLP for one upload, keyed by content hash (bytes are not re-hashed)"""
+    text, page_offsets = get_nlp_engine().process_bytes(_file_bytes, file_name, workers=config.PDF_EXTRACTION_WORKERS)
+    return text, page_offsets, get_nlp_engine().run_pipeline(text, page_offsets)
+
+def results_digest(results):
+    """Content hash of an analysis result, computed once per result object in this session"""
+    cached = st.session_state.get('results_digest')
+    if cached and cached[0] is results:
+        return cached[1]
+    digest = hashlib.sha256(json.dumps(results, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    st.session_state['results_digest'] = (results, digest)
+    return digest
+
+@st.cache_data(max_entries=config.EXPORT_CACHE_MAX_ENTRIES, show_spinner=False)
+def render_report_pdf(digest, _results):
+    """PDF report bytes, memoized per analysis digest"""
+    return get_report_generator().render_pdf_bytes(_results)
+
+@st.cache_data(max_entries=config.EXPORT_CACHE_MAX_ENTRIES, show_spinner=False)
+def export_json(digest, _results):
+    """JSON export bytes, memoized per analysis digest"""
+    return json.dumps(_results, indent=2, ensure_ascii=False).encode("utf-8")
+
+def risk_gauge_figure(score):
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number+delta",
+        value = score,
+        title = {'text': "Risk Score", 'font': {'size': 24}},
+        delta = {'reference': 50},
+        gauge = {
+            'axis': {'range': [None, 100]},
+            'bar': {'color': "#667eea"},
+            'steps': [
+                {'range': [0, 30], 'color': "#d4edda"},
+                {'range': [30, 70], 'color': "#fff3cd"},
+                {'range': [70, 100], 'color': "#f8d7da"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 70
+            }
+        }
+    ))
+    fig.update_layout(height=300)
+    return fig
+
+def render_risk_gauge(score, key=None):
+    st.plotly_chart(risk_gauge_figure(score), width="stretch", key=key)
+
+def render_partial_results(results):
+    """Sections of a streaming analysis received so far"""
+    risk = results.get('risk_assessment')
+    if risk:
+        render_risk_gauge(risk.get('composite_score', 0), key=f"live_gauge_{len(results)}")
+        st.markdown(f"**Risk Level:** {risk.get('risk_level', 'Medium')}")
+        st.write(risk.get('summary', ''))
+        for item in risk.get('key_risks', [])[:5]:
+            st.warning(f"**{item.get('clause', 'Unknown')}** ({item.get('risk_level', '')}): {item.get('explanation', '')}")
+    if 'overall_recommendation' in results:
+        st.markdown(f"### 🎯 Recommendation: **{results['overall_recommendation'].get('verdict', 'Unknown')}**")
+    pending = [name for name in ('contract_info', 'risk_assessment', 'clause_breakdown', 'compliance_check',
+                                 'unfavorable_terms', 'overall_recommendation') if name not in results]
+    if pending:
+        st.caption("⏳ Still writing: " + ", ".join(p.replace('_', ' ') for p in pending))
+
+def render_audit_trail():
+    """Filterable, paginated view of the audit store (newest first)"""
+    st.markdown("---")
+    st.header("🗂️ Audit Trail")
+    f1, f2, f3, f4 = st.columns(4)
+    with f1:
+        type_filter = st.selectbox("Contract Type", ["All"] + audit_store.distinct("contract_type"), key="audit_type")
+    with f2:
+        verdict_filter = st.selectbox("Verdict", ["All"] + audit_store.distinct("verdict"), key="audit_verdict")
+    with f3:
+        level_filter = st.selectbox("Risk Level", ["All", "High", "Medium", "Low"], key="audit_level")
+    with f4:
+        days = st.selectbox("Period", [7, 30, 90, 365, None], index=2, key="audit_days",
+                            format_func=lambda d: f"Last {d} days" if d else "All time")
+    # Keyset pagination: remember the cursor that starts each page
+    filter_key = (type_filter, verdict_filter, level_filter, days)
+    if st.session_state.get('audit_filter_key') != filter_key:
+        st.session_state['audit_filter_key'] = filter_key
+        st.session_state['audit_cursors'] = [None]
+        st.session_state['audit_since'] = time.time() - days * 86400 if days else None
+    filters = {
+        "contract_type": None if type_filter == "All" else type_filter,
+        "verdict": None if verdict_filter == "All" else verdict_filter,
+        "risk_level": None if level_filter == "All" else level_filter,
+        "since": st.session_state['audit_since'],
+    }
+    cursors = st.session_state['audit_cursors']
+    
+    entries, next_cursor = audit_store.query(limit=config.AUDIT_PAGE_SIZE, cursor=cursors[-1], **filters)
+    st.caption(f"{audit_store.count(**filters)} matching entries - page {len(cursors)}")
+    if entries:
+        st.dataframe(pd.DataFrame(entries).drop(columns=["id"]), width="stretch", hide_index=True)
+    else:
+        st.info("No audit entries match these filters.")
+    
+    p1, p2 = st.columns(2)
+    with p1:
+        if st.button("⬅️ Previous", disabled=len(cursors) == 1, key="audit_prev"):
+            cursors.pop()
+            st.rerun()
+    with p2:
+        if st.button("Next ➡️", disabled=next_cursor is None, key="audit_next"):
+            cursors.append(next_cursor)
+            st.rerun()
+
+def render_portfolio():
+    """Aggregate risk exposure across every stored analysis"""
+    portfolio = get_portfolio()
+    portfolio.refresh()
+    summary = portfolio.summary()
+    st.markdown("---")
+    st.header("📈 Portfolio Risk Dashboard")
+    if not summary['contracts']:
+        st.info("No analyses stored yet. Completed analyses (and batch runs) are added automatically.")
+        return
+    
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Contracts", f"{summary['contracts']:,}")
+    m2.metric("Average Risk Score", f"{summary['mean_score']:.1f}")
+    m3.metric("High Risk (70+)", f"{summary['high_risk']:,}")
+    m4.metric("Reject Verdicts", f"{summary['reject']:,}")
+    
+    p1, p2 = st.columns(2)
+    with p1:
+        st.subheader("Risk Score Distribution")
+        st.plotly_chart(px.bar(portfolio.score_distribution(), x="score_range", y="contracts"), width="stretch")
+    with p2:
+        st.subheader("Key Risks by Category")
+        heatmap = portfolio.risk_heatmap()
+        if not heatmap.empty:
+            st.plotly_chart(px.imshow(heatmap, text_auto=True, aspect="auto", color_continuous_scale="Reds"),
+                            width="stretch")
+    
+    p3, p4 = st.columns(2)
+    with p3:
+        st.subheader("Most Exposed Counterparties")
+        st.dataframe(portfolio.score_by_counterparty(top=config.PORTFOLIO_TOP_COUNTERPARTIES).round(1), width="stretch")
+    with p4:
+        st.subheader("Compliance Failures by Law")
+        st.dataframe(portfolio.compliance_failures(), width="stretch")
+
+def render_diagnostics():
+    """Hidden panel (open the app with ?diagnostics=1): stage timings, counters and request profiles"""
+    st.markdown("---")
+    st.header("🩺 Diagnostics")
+    rows = metrics.summary()
+    if rows:
+        stages = pd.DataFrame(rows)
+        for column in ("total", "mean", "p50", "p95"):
+            stages[column] = (stages[column] * 1000).round(1)
+        st.dataframe(stages.rename(columns={c: f"{c} ms" for c in ("total", "mean", "p50", "p95")}),
+                     width="stretch", hide_index=True)
+    else:
+        st.info("No stages timed in this process yet.")
+    
+    d1, d2 = st.columns(2)
+    with d1:
+        st.subheader("Recent Stages")
+        st.dataframe(pd.DataFrame(list(metrics.recent)[::-1][:50]), width="stretch", hide_index=True)
+    with d2:
+        st.subheader("Request Profile")
+        st.selectbox("Profile the next analyses with", [None, "cprofile", "pyinstrument"],
+                     format_func=lambda mode: mode or "Off", key="profile_mode")
+        profile = st.session_state.get('last_profile')
+        if profile and profile.get('text'):
+            st.caption(f"Last analysis ({profile['mode']})")
+            st.code(profile['text'], language="text")
+    
+    exposition = metrics.to_prometheus()
+    with st.expander("Prometheus metrics"):
+        st.code(exposition, language="text")
+    st.download_button("Download metrics.prom", exposition, file_name=config.METRICS_PROM_FILE, mime="text/plain")
+
+nlp_engine = get_nlp_engine()
+report_gen = get_report_generator()
+@st.cache_resource
+def get_revision_store():
+    return RevisionStore(os.path.join(config.OUTPUT_DIR, config.REVISIONS_DB_FILE))
+
+@st.cache_resource
+def get_audit_store():
+    store = AuditStore(os.path.join(config.OUTPUT_DIR, config.AUDIT_DB_FILE), batch_size=config.AUDIT_BATCH_SIZE)
+    legacy_path = os.path.join(config.OUTPUT_DIR, config.AUDIT_LOG_FILE)
+    if os.path.exists(legacy_path):
+        # Re-importing is a no-op for lines already in the store
+        imported = store.import_jsonl(legacy_path)
+        if imported:
+            print(f"Imported {imported} entries from {legacy_path}")
+    return store
+
+@st.cache_resource
+def get_portfolio():
+    return PortfolioAnalytics(PortfolioStore(os.path.join(config.OUTPUT_DIR, config.PORTFOLIO_DB_FILE)))
+
+@st.cache_resource
+def get_clause_index():
+    return ClauseIndex(os.path.join(config.OUTPUT_DIR, config.CLAUSE_INDEX_DIR))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def similar_clauses(text, exclude_hash):
+    """Closest clauses from earlier contracts (cached briefly: the index only grows)"""
+    return get_clause_index().query(text, k=config.CLAUSE_MATCH_TOP_K,
+                                    min_similarity=config.CLAUSE_MATCH_MIN_SIMILARITY, exclude_hash=exclude_hash)
+
+def is_recordable(results):
+    """A complete, real analysis: demo, fallback and partial results stay out of the stores"""
+    return not ("error" in results or results.get("mock")) and is_complete(results)
+
+def store_results(results):
+    """Keep a finished analysis in the session, checked against the schema once (reruns read the stored object)"""
+    results = analyzer.validator.validate(results)[0]
+    st.session_state['analysis_results'] = results
+    record_analysis(results)
+
+def record_analysis(results):
+    """Add a finished analysis to the portfolio and clause index (demo, fallback and partial results are skipped)"""
+    if not is_recordable(results):
+        return
+    content_hash = st.session_state.get('file_hash') or results_digest(results)
+    get_portfolio().store.add(results, content_hash, file_name=st.session_state.get('file_name'))
+    clauses = st.session_state.get('nlp_data', {}).get('clauses', [])
+    get_clause_index().add_analysis(results, clauses, content_hash, file_name=st.session_state.get('file_name'))
+
+@st.cache_resource
+def get_job_queue(api_key, provider, model):
+    return JobQueue(
+        os.path.join(config.OUTPUT_DIR, config.JOB_QUEUE_FILE),
+        get_analyzer(api_key, provider, model),
+        revision_store=get_revision_store(),
+        workers=config.JOB_WORKERS,
+        stream=config.STREAMING_ANALYSIS_ENABLED,
+        heartbeat_seconds=config.JOB_HEARTBEAT_SECONDS
+    )
+
+analyzer = get_analyzer(api_key, api_provider, selected_model)
+audit_store = get_audit_store()
+job_queue = get_job_queue(api_key, api_provider, selected_model)
+
+@st.fragment(run_every=config.JOB_POLL_SECONDS)
+def show_job_progress(job_id):
+    """Poll a background analysis job; finished results move into the session"""
+    job = job_queue.get(job_id)
+    if job is None:
+        st.session_state.pop('job_id', None)
+        st.query_params.pop('job', None)
+        return
+    if job['status'] in ("queued", "running"):
+        st.info("🤖 Running comprehensive legal analysis in the background... "
+                "You can refresh or come back to this page later.")
+        render_partial_results(job['partial'])
+        return
+    st.session_state.pop('job_id', None)
+    st.query_params.pop('job', None)
+    if job['profile']:
+        st.session_state['last_profile'] = job['profile']
+    if job['result'] is not None:
+        store_results(job['result'])
+    else:
+        st.session_state['analysis_error'] = job['error']
+    st.rerun()
 
 # Main UI
 st.title("⚖️ Contract Analysis & Risk Assessment Bot")
@@ -166,48 +484,80 @@ with col1:
     uploaded_file = st.file_uploader("Upload PDF, DOCX or TXT file", type=["pdf", "docx", "txt"])
     
     if uploaded_file:
-        file_path = os.path.join("data", uploaded_file.name)
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        file_bytes = uploaded_file.getvalue()
+        # Hash each upload once; reruns reuse it as the cache key
+        if st.session_state.get('upload_id') != uploaded_file.file_id:
+            st.session_state['upload_id'] = uploaded_file.file_id
+            st.session_state['file_hash'] = hashlib.sha256(file_bytes).hexdigest()
+            st.session_state['file_name'] = uploaded_file.name
+        file_hash = st.session_state['file_hash']
         
         with st.spinner("🔍 Extracting and analyzing text..."):
-            # Extract text
-            text = nlp_engine.process_file(file_path)
+            # Extract text and run NLP analysis (cached per file content)
+            text, page_offsets, nlp_data = run_nlp_pipeline(file_hash, uploaded_file.name, file_bytes)
+            contract_type_detected = nlp_data['contract_type']
             st.success(f"✅ Extracted {len(text)} characters")
             
-            # Run NLP analysis
-            contract_type_detected = nlp_engine.classify_contract_type(text)
-            entities = nlp_engine.get_enhanced_entities(text)
-            clauses = nlp_engine.extract_clauses(text)
-            obligations_rights = nlp_engine.identify_obligations_rights(text)
-            risk_indicators = nlp_engine.detect_risk_indicators(text)
-            ambiguities = nlp_engine.detect_ambiguities(text)
-            
             # Store in session
             st.session_state['contract_text'] = text
-            st.session_state['nlp_data'] = {
-                'contract_type': contract_type_detected,
-                'entities': entities,
-                'clauses': clauses,
-                'obligations_rights': obligations_rights,
-                'risk_indicators': risk_indicators,
-                'ambiguities': ambiguities
-            }
+            st.session_state['page_offsets'] = page_offsets
+            st.session_state['nlp_data'] = nlp_data
             
             st.info(f"📋 **Detected Type:** {contract_type_detected}")
+            prescreen = analyzer.scorer.score(nlp_data)
+            st.caption(f"Rule-based pre-screen: {prescreen['composite_score']}/100 ({prescreen['risk_level']}), "
+                       f"{len(prescreen['key_risks'])} risk areas")
             
             if st.button("🚀 Analyze Contract with AI", type="primary"):
-                with st.spinner("🤖 Running comprehensive legal analysis..."):
-                    final_type = contract_type_manual if contract_type_manual != "Auto-Detect" else contract_type_detected
-                    results = analyzer.analyze_contract(
-                        text, 
-                        contract_type=final_type,
-                        nlp_data=st.session_state['nlp_data']
-                    )
-                    st.session_state['analysis_results'] = results
+                final_type = contract_type_manual if contract_type_manual != "Auto-Detect" else contract_type_detected
+                if config.JOB_QUEUE_ENABLED:
+                    # Runs in the background: survives reruns, refreshes and duplicate clicks
+                    # The job times and profiles its own analysis (diagnostics panel)
+                    job_id = job_queue.submit(text, contract_type=final_type, nlp_data=st.session_state['nlp_data'],
+                                              document_id=revision_id or None,
+                                              profile=st.session_state.get('profile_mode'))
+                    st.session_state['job_id'] = job_id
+                    st.query_params['job'] = job_id
+                    st.rerun()
+                with st.spinner("🤖 Running comprehensive legal analysis..."), \
+                        profiled(st.session_state.get('profile_mode')) as profile, metrics.stage("analysis"):
+                    st.session_state['last_profile'] = profile  # Filled in when the block ends
+                    if revision_id:
+                        results = IncrementalAnalyzer(analyzer, get_revision_store()).analyze_revision(
+                            revision_id, text,
+                            contract_type=final_type,
+                            nlp_data=st.session_state['nlp_data']
+                        )
+                    elif config.STREAMING_ANALYSIS_ENABLED:
+                        # Show each section as soon as the model finishes it
+                        results = {}
+                        live_area = st.empty()
+                        for section, value in analyzer.analyze_contract_stream(
+                            text,
+                            contract_type=final_type,
+                            nlp_data=st.session_state['nlp_data']
+                        ):
+                            results[section] = value
+                            with live_area.container():
+                                render_partial_results(results)
+                    else:
+                        results = analyzer.analyze_contract(
+                            text, 
+                            contract_type=final_type,
+                            nlp_data=st.session_state['nlp_data']
+                        )
+                    store_results(results)
                     st.success("✅ Analysis Complete!")
                     st.rerun()
     
+    # Background job started by this session (or reopened from the ?job= link)
+    if 'job_id' not in st.session_state and st.query_params.get('job'):
+        st.session_state['job_id'] = st.query_params['job']
+    if config.JOB_QUEUE_ENABLED and st.session_state.get('job_id'):
+        show_job_progress(st.session_state['job_id'])
+    if 'analysis_error' in st.session_state:
+        st.error(f"Analysis failed: {st.session_state.pop('analysis_error')}")
+    
     st.markdown('</div>', unsafe_allow_html=True)
     
     # NLP Details Section
@@ -243,6 +593,7 @@ with col1:
 
 with col2:
     if 'analysis_results' in st.session_state:
+        # Validated when stored: every section present with the expected types
         results = st.session_state['analysis_results']
         
         # Risk Summary Card
@@ -253,33 +604,31 @@ with col2:
         risk_level = results['risk_assessment'].get('risk_level', 'Medium')
         
         # Risk Gauge
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number+delta",
-            value = score,
-            title = {'text': "Risk Score", 'font': {'size': 24}},
-            delta = {'reference': 50},
-            gauge = {
-                'axis': {'range': [None, 100]},
-                'bar': {'color': "#667eea"},
-                'steps': [
-                    {'range': [0, 30], 'color': "#d4edda"},
-                    {'range': [30, 70], 'color': "#fff3cd"},
-                    {'range': [70, 100], 'color': "#f8d7da"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 70
-                }
-            }
-        ))
-        fig.update_layout(height=300)
-        st.plotly_chart(fig, width="stretch")
+        render_risk_gauge(score)
         
         st.markdown(f"**Risk Level:** {risk_level}")
         st.write(results['risk_assessment']['summary'])
+        if results.get('incomplete_sections'):
+            st.warning("⚠️ The model did not return: "
+                       + ", ".join(s.replace('_', ' ') for s in results['incomplete_sections'])
+                       + ". Defaults are shown for these sections; re-run the analysis for a full review.")
         st.markdown('</div>', unsafe_allow_html=True)
         
+        # What changed since the previous revision
+        revision = results.get('revision')
+        if revision and revision.get('delta'):
+            delta = revision['delta']
+            st.markdown('<div class="card">', unsafe_allow_html=True)
+            st.subheader(f"🔁 Changes Since Version {revision.get('previous_version')}")
+            st.metric("Risk Score", delta['score_after'], delta=delta['score_change'], delta_color="inverse")
+            st.write(f"**Clauses:** {len(delta['clauses_changed'])} changed, {len(delta['clauses_added'])} added, "
+                     f"{len(delta['clauses_removed'])} removed, {delta['clauses_unchanged']} unchanged")
+            for risk in delta['risks_added']:
+                st.error(f"➕ New risk: **{risk['clause']}** ({risk['category']})")
+            for risk in delta['risks_removed']:
+                st.success(f"➖ Resolved: **{risk['clause']}** ({risk['category']})")
+            st.markdown('</div>', unsafe_allow_html=True)
+        
         # Overall Recommendation
         if 'overall_recommendation' in results:
             rec = results['overall_recommendation']
@@ -327,6 +676,17 @@ if 'analysis_results' in st.session_state:
                     
                     if clause.get('red_flags'):
                         st.warning("🚩 **Red Flags:** " + ", ".join(clause['red_flags']))
+                    
+                    original = clause.get('original_text') or ''
+                    matches = similar_clauses(original, st.session_state.get('file_hash')) if original.strip() else []
+                    if matches:
+                        st.markdown("**🔁 Seen before:**")
+                        for match in matches:
+                            findings = match['findings']
+                            notes = [r['suggestion'] for r in findings.get('risks', []) if r.get('suggestion')]
+                            notes = notes or findings.get('red_flags') or [findings.get('explanation') or 'No findings recorded']
+                            st.caption(f"{match['similarity']:.0%} similar - clause {match['clause_number'].rstrip('.')} of "
+                                       f"{match['file_name'] or 'an earlier contract'}: {'; '.join(notes)}")
         else:
             # Fallback to old format
             for item in results.get('clause_explanation', []):
@@ -429,41 +789,39 @@ if 'analysis_results' in st.session_state:
         col_exp1, col_exp2 = st.columns(2)
         
         with col_exp1:
+            digest = results_digest(results)
             if st.button("📄 Generate PDF Report"):
+                st.session_state['report_ready'] = digest
+            if st.session_state.get('report_ready') == digest:
                 try:
-                    report_path = report_gen.generate_pdf(results)
-                    with open(report_path, "rb") as f:
-                        st.download_button(
-                            "⬇️ Download Assessment Report", 
-                            f, 
-                            file_name=f"Legal_Assessment_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                            mime="application/pdf"
-                        )
+                    # Rendered in memory once per analysis; reruns and repeat downloads reuse the bytes
+                    st.download_button(
+                        "⬇️ Download Assessment Report", 
+                        render_report_pdf(digest, results), 
+                        file_name=f"Legal_Assessment_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                        mime="application/pdf"
+                    )
                     st.success("✅ Report generated successfully!")
                 except Exception as e:
                     st.error(f"Error generating PDF: {str(e)}")
         
         with col_exp2:
-            if st.button("💾 Log to Audit Trail"):
-                audit_entry = {
-                    "timestamp": datetime.now().isoformat(),
-                    "contract_type": results.get('contract_info', {}).get('type', 'Unknown'),
-                    "risk_score": results['risk_assessment']['composite_score'],
-                    "verdict": results.get('overall_recommendation', {}).get('verdict', 'Unknown'),
-                    "file_name": uploaded_file.name if uploaded_file else "Unknown"
-                }
-                
-                os.makedirs("logs", exist_ok=True)
-                with open("logs/audit_trail.json", "a") as f:
-                    f.write(json.dumps(audit_entry) + "\n")
+            recordable = is_recordable(results)
+            if st.button("💾 Log to Audit Trail", disabled=not recordable,
+                         help=None if recordable else "Demo, failed and incomplete analyses are not logged"):
+                audit_store.log(AuditStore.entry_from_results(
+                    results,
+                    file_name=uploaded_file.name if uploaded_file else "Unknown",
+                    content_hash=st.session_state.get('file_hash'),
+                    model=results.get('model', selected_model)
+                ))
                 st.success("✅ Analysis logged successfully!")
         
         # Export JSON
         st.subheader("📤 Export Full Analysis")
-        json_str = json.dumps(results, indent=2)
         st.download_button(
             "Download JSON",
-            json_str,
+            export_json(results_digest(results), results),
             file_name=f"contract_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
             mime="application/json"
         )
@@ -478,6 +836,17 @@ if 'analysis_results' in st.session_state:
 else:
     st.info("👆 Upload a contract and click 'Analyze' to see comprehensive legal analysis")
 
+if show_portfolio:
+    render_portfolio()
+if show_audit_trail:
+    render_audit_trail()
+
+if st.query_params.get('diagnostics') == '1':
+    render_diagnostics()
+if config.METRICS_ENABLED:
+    os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+    metrics.write_prometheus(os.path.join(config.OUTPUT_DIR, config.METRICS_PROM_FILE))
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,505 @@
+"""Headless batch runner: analyze every contract in a folder tree.
+
+Usage:
+    python batch.py CONTRACTS_DIR --output batch_output [--workers 4] [--concurrency 8] [--pdf] [--triage]
+                    [--dedup] [--provider-batch] [--route] [--hedge-after SECONDS] [--profile cprofile]
+
+Text extraction and NLP run in a process pool, LLM calls in a bounded async
+pool. Every finished contract is appended to <output>/summary.jsonl, which
+doubles as the checkpoint: re-running the same command skips contracts that
+already succeeded (unless their content changed) and retries failures.
+Without an API key every contract gets the demo analysis; those are
+recorded with status "demo" and analyzed again on the next run. Results
+with defaulted sections or failed chunks are recorded as "incomplete" and
+likewise retried.
+
+With --triage every contract is first scored by the local rule-based
+scorer; clearly low-risk ones keep that result and never reach the LLM.
+With --dedup a contract that nearly matches one analyzed before (same
+template, other names, dates and amounts) reuses that analysis and only
+its differing clauses are sent to the LLM.
+With --provider-batch the model requests are pooled into provider Batch
+API jobs (batch pricing, no interactive rate limits) and the run waits for
+them; results land in the same cache and output files.
+With --route short, low-risk contracts go to a cheaper model and the rest
+to a stronger one; per-model latency histograms are printed and added to
+logs/model_latency.json for tuning the routing thresholds.
+Per-stage timings (extraction, NLP passes, LLM calls) are printed at the
+end and written to <output>/metrics.prom and <output>/metrics.jsonl;
+--profile also writes a cProfile or pyinstrument report of the run.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import config
+from modules.analysis_cache import AnalysisCache
+from modules.async_analyzer import AsyncLegalAnalyzer, CircuitBreaker
+from modules.audit_store import AuditStore
+from modules.clause_index import ClauseIndex
+from modules.legal_analyzer import PROMPT_VERSION
+from modules.metrics import metrics, profiled
+from modules.model_router import ModelRouter
+from modules.near_duplicates import ContractIndex, swap_entities
+from modules.output_schema import is_complete
+from modules.nlp_engine import NLPEngine
+from modules.portfolio import PortfolioStore
+from modules.provider_batch import ProviderBatchAnalyzer
+from modules.report_generator import ReportGenerator
+from modules.revisions import IncrementalAnalyzer
+from modules.risk_scorer import RuleBasedRiskScorer
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+SUMMARY_FIELDS = ["file", "sha256", "status", "model", "contract_type", "risk_score", "risk_level", "verdict", "triage",
+                  "reused_from", "chars_reanalyzed",
+                  "extract_seconds", "analysis_seconds", "latency_seconds", "error", "result_path", "pdf_path"]
+
+_engine = None
+_report_gen = None
+
+
+def _init_worker(metrics_log=None, metrics_enabled=True):
+    global _engine
+    _engine = NLPEngine()
+    metrics.log_path = metrics_log
+    metrics.enabled = metrics_enabled
+
+
+def _extract(path):
+    """Process-pool worker: text extraction plus the NLP pipeline for one file, with its stage metrics"""
+    start = time.perf_counter()
+    text, page_offsets = _engine.process_file_pages(path)
+    nlp_data = _engine.run_pipeline(text, page_offsets)
+    return text, nlp_data, time.perf_counter() - start, metrics.export(reset=True)
+
+
+def _render_pdf(analysis, reports_dir, filename):
+    """Process-pool worker: one PDF report, with its stage metrics"""
+    global _report_gen
+    if _report_gen is None or _report_gen.output_dir != reports_dir:
+        _report_gen = ReportGenerator(output_dir=reports_dir)  # Styles are built once per worker
+    return _report_gen.generate_pdf(analysis, filename), metrics.export(reset=True)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_contracts(input_dir):
+    paths = []
+    for root, _, files in os.walk(input_dir):
+        for name in files:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def load_checkpoint(summary_path):
+    """Latest summary record per file from a previous (possibly interrupted) run"""
+    records = {}
+    if os.path.exists(summary_path):
+        with open(summary_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial line from an interrupted write
+                records[record["file"]] = record
+    return records
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def _reusable(results):
+    """Whether a result may serve as the template for near-duplicates (a complete, real analysis)"""
+    return not ("error" in results or results.get("mock")) and is_complete(results)
+
+
+class BatchRunner:
+    def __init__(self, input_dir, output_dir, analyzer, workers=4, write_pdf=False, resume=True, audit=None,
+                 portfolio=None, triage=None, clause_index=None, dedup=None):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.analyzer = analyzer
+        self.workers = workers
+        self.write_pdf = write_pdf
+        self.resume = resume
+        self.audit = audit
+        self.portfolio = portfolio
+        self.clause_index = clause_index
+        self.dedup = dedup  # ContractIndex of earlier analyses, or None to analyze every contract in full
+        self.triage = triage  # RuleBasedRiskScorer, or None to send every contract to the LLM
+        self.results_dir = os.path.join(output_dir, "results")
+        self.summary_path = os.path.join(output_dir, "summary.jsonl")
+        os.makedirs(self.results_dir, exist_ok=True)
+        self.reports_dir = os.path.join(output_dir, "reports")
+        self.records = []
+
+    def _result_name(self, rel_path):
+        return rel_path.replace(os.sep, "__").replace("/", "__") + ".json"
+
+    async def _process(self, loop, pool, path, sha, summary_file):
+        async with self.in_flight:
+            await self._process_one(loop, pool, path, sha, summary_file)
+
+    async def _process_one(self, loop, pool, path, sha, summary_file):
+        rel_path = os.path.relpath(path, self.input_dir)
+        record = {"file": rel_path, "sha256": sha, "status": "ok", "error": None}
+        start = time.perf_counter()
+        try:
+            text, nlp_data, extract_seconds, stage_metrics = await loop.run_in_executor(pool, _extract, path)
+            metrics.merge(stage_metrics)
+            record["extract_seconds"] = round(extract_seconds, 3)
+
+            analysis_start = time.perf_counter()
+            model = self.analyzer.model
+            if self.triage is not None:
+                assessment = self.triage.score(nlp_data)
+                record["triage"] = self.triage.triage(assessment)
+            if record.get("triage") == "low":
+                results = self.triage.analysis(nlp_data, assessment=assessment)
+                model = "rule-based"
+            elif self.dedup is not None:
+                results = await self._analyze_dedup(text, nlp_data, sha, rel_path, record)
+            else:
+                results = await self.analyzer.analyze_contract(text, nlp_data['contract_type'], nlp_data)
+            record["analysis_seconds"] = round(time.perf_counter() - analysis_start, 3)
+
+            risk = results.get('risk_assessment', {})
+            record.update({
+                "contract_type": results.get('contract_info', {}).get('type', nlp_data['contract_type']),
+                "risk_score": risk.get('composite_score'),
+                "risk_level": risk.get('risk_level'),
+                "verdict": results.get('overall_recommendation', {}).get('verdict'),
+            })
+            if "error" in results:
+                record["status"] = "failed"
+                record["error"] = results["error"]
+            elif results.get("mock"):
+                record["status"] = "demo"  # No API key: not a real analysis, so not checkpointed as done
+            elif not is_complete(results):
+                record["status"] = "incomplete"  # Result kept for review, but retried on the next run
+                problems = list(results.get("chunk_errors") or [])
+                if results.get("incomplete_sections"):
+                    problems.insert(0, f"Defaulted sections: {', '.join(results['incomplete_sections'])}")
+                record["error"] = "; ".join(problems)
+
+            result_path = os.path.join(self.results_dir, self._result_name(rel_path))
+            with open(result_path, "w", encoding="utf-8") as f:
+                json.dump({"file": rel_path, "sha256": sha, "nlp_data": nlp_data, "analysis": results},
+                          f, indent=2, ensure_ascii=False)
+            record["result_path"] = os.path.relpath(result_path, self.output_dir)
+
+            record["model"] = results.get("model", model)
+            if self.audit is not None and record["status"] == "ok":
+                self.audit.log(AuditStore.entry_from_results(results, rel_path, sha, record["model"]))
+            if self.portfolio is not None and record["status"] == "ok":
+                self.portfolio.add(results, sha, file_name=rel_path)
+            if self.clause_index is not None and record["status"] == "ok":
+                self.clause_index.add_analysis(results, nlp_data['clauses'], sha, file_name=rel_path)
+
+            if self.write_pdf and record["status"] == "ok":
+                # Rendered before the checkpoint line is written, so an interrupted run redoes it
+                record["pdf_path"] = await self._render(loop, pool, results, rel_path)
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = f"{type(e).__name__}: {e}"
+
+        record["latency_seconds"] = round(time.perf_counter() - start, 3)
+        # One line per finished contract: this file is the resume checkpoint
+        summary_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        summary_file.flush()
+        self.records.append(record)
+        print(f"[{record['status']}] {rel_path} ({record['latency_seconds']}s)")
+
+    async def _render(self, loop, pool, results, rel_path):
+        """Render one PDF report in the process pool; returns its path relative to the output folder"""
+        pdf_path, stage_metrics = await loop.run_in_executor(
+            pool, _render_pdf, results, self.reports_dir, self._result_name(rel_path)[:-5] + ".pdf")
+        metrics.merge(stage_metrics)
+        return os.path.relpath(pdf_path, self.output_dir)
+
+    async def _render_missing(self, loop, pool, record, summary_file):
+        """PDF for a contract analyzed by an earlier run (without --pdf, or interrupted before rendering)"""
+        async with self.in_flight:
+            record = dict(record)
+            try:
+                with open(os.path.join(self.output_dir, record["result_path"]), "r", encoding="utf-8") as f:
+                    results = json.load(f)["analysis"]
+                record["pdf_path"] = await self._render(loop, pool, results, record["file"])
+            except Exception as e:
+                print(f"[pdf failed] {record['file']}: {type(e).__name__}: {e}")
+                return
+            summary_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            summary_file.flush()
+            print(f"[pdf] {record['file']}")
+
+    async def _analyze_dedup(self, text, nlp_data, sha, rel_path, record):
+        """Reuse the closest previously analyzed contract, re-analyzing only the clauses that differ.
+
+        A contract whose template is being analyzed right now by another task
+        waits for that analysis instead of starting a second full one.
+        """
+        model_key = f"{self.analyzer.model}:{PROMPT_VERSION}"
+        fingerprint = await asyncio.to_thread(self.dedup.fingerprint, text, nlp_data)
+        match = None
+        if nlp_data['clauses']:
+            match = await asyncio.to_thread(self.dedup.find, text, nlp_data, model_key, sha, fingerprint)
+            leader = self._template_in_progress(fingerprint[0])
+            if match is None and leader is not None:
+                await leader.wait()
+                match = await asyncio.to_thread(self.dedup.find, text, nlp_data, model_key, sha, fingerprint)
+
+        if match is None:
+            done = asyncio.Event()
+            self.in_progress.append((fingerprint[0], done))
+            try:
+                results = await self.analyzer.analyze_contract(text, nlp_data['contract_type'], nlp_data)
+                if _reusable(results):
+                    await asyncio.to_thread(self.dedup.add, sha, text, nlp_data, results, model_key, rel_path,
+                                            fingerprint)
+            finally:
+                self.in_progress.remove((fingerprint[0], done))
+                done.set()
+            return results
+
+        base = swap_entities(match["result"], match["entities"], nlp_data['entities'])
+        base.pop("near_duplicate", None)
+        results, delta = await IncrementalAnalyzer(self.analyzer, None).amerge_partial(
+            base, match["base_clauses"], nlp_data['clauses'], match["diff"], text, nlp_data['contract_type'], nlp_data)
+        if delta is not None:
+            results["near_duplicate"] = {"file": match["file_name"], "content_hash": match["content_hash"],
+                                         "similarity": match["similarity"], "delta": delta}
+            record["reused_from"] = match["file_name"] or match["content_hash"]
+            record["chars_reanalyzed"] = delta["chars_reanalyzed"]
+            if _reusable(results):
+                await asyncio.to_thread(self.dedup.add, sha, text, nlp_data, results, model_key, rel_path,
+                                        fingerprint)
+        return results
+
+    def _template_in_progress(self, signature):
+        """Event of an in-flight full analysis of a near-identical contract, if any"""
+        if not self.in_progress:
+            return None
+        signatures = np.array([sig for sig, _ in self.in_progress])
+        similarity = self.dedup.hasher.similarity(signature, signatures)
+        best = int(np.argmax(similarity))
+        return self.in_progress[best][1] if similarity[best] >= self.dedup.min_similarity else None
+
+    async def run(self):
+        paths = find_contracts(self.input_dir)
+        previous = load_checkpoint(self.summary_path) if self.resume else {}
+        todo = []
+        missing_reports = []
+        skipped = 0
+        for path in paths:
+            sha = file_sha256(path)
+            prior = previous.get(os.path.relpath(path, self.input_dir))
+            if prior and prior.get("status") == "ok" and prior.get("sha256") == sha:
+                skipped += 1
+                pdf_path = prior.get("pdf_path")
+                if self.write_pdf and not (pdf_path and os.path.exists(os.path.join(self.output_dir, pdf_path))):
+                    missing_reports.append(prior)
+                continue
+            todo.append((path, sha))
+
+        print(f"Found {len(paths)} contracts: {skipped} already done, {len(todo)} to process"
+              + (f", {len(missing_reports)} PDF reports to render" if missing_reports else ""))
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        # Bound how many extracted texts wait in memory for an LLM slot
+        self.in_progress = []  # (signature, asyncio.Event) of full analyses running under --dedup
+        self.in_flight = asyncio.Semaphore(max(self.workers, self.analyzer.max_concurrency) * 2)
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(metrics.log_path, metrics.enabled)) as pool, \
+                open(self.summary_path, "a" if self.resume else "w", encoding="utf-8") as summary_file:
+            await asyncio.gather(*[self._render_missing(loop, pool, record, summary_file) for record in missing_reports],
+                                 *[self._process(loop, pool, path, sha, summary_file) for path, sha in todo])
+        elapsed = time.perf_counter() - started
+        if self.audit is not None:
+            self.audit.flush()
+
+        self.write_csv()
+        self.print_stats(elapsed)
+        if self.analyzer.latency.models:
+            self.analyzer.latency.save(os.path.join(config.OUTPUT_DIR, config.LATENCY_STATS_FILE))
+        if metrics.enabled:
+            metrics.write_prometheus(os.path.join(self.output_dir, config.METRICS_PROM_FILE))
+        await self.analyzer.aclose()
+
+    def write_csv(self):
+        records = load_checkpoint(self.summary_path)
+        csv_path = os.path.join(self.output_dir, "summary.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for record in records.values():
+                writer.writerow(record)
+
+    def print_stats(self, elapsed):
+        latencies = [r["latency_seconds"] for r in self.records]
+        failures = [r for r in self.records if r["status"] == "failed"]
+        print("\n" + "=" * 50)
+        print(f"Processed:   {len(self.records)} contracts in {elapsed:.1f}s")
+        print(f"Throughput:  {len(self.records) / elapsed if elapsed else 0:.2f} contracts/s")
+        print(f"Latency:     p50 {percentile(latencies, 50):.2f}s, p95 {percentile(latencies, 95):.2f}s")
+        print(f"Failures:    {len(failures)}")
+        demo = sum(1 for r in self.records if r["status"] == "demo")
+        if demo:
+            print(f"Demo mode:   {demo} contracts got the demo analysis (no API key); they are redone on the next run")
+        incomplete = sum(1 for r in self.records if r["status"] == "incomplete")
+        if incomplete:
+            print(f"Incomplete:  {incomplete} contracts have defaulted sections or failed chunks; "
+                  "they are redone on the next run")
+        if self.triage is not None:
+            local = sum(1 for r in self.records if r.get("triage") == "low")
+            print(f"Triage:      {local} scored locally, {len(self.records) - local} sent to the LLM")
+        if self.dedup is not None:
+            reused = [r for r in self.records if r.get("reused_from")]
+            print(f"Dedup:       {len(reused)} near-duplicates reused an earlier analysis "
+                  f"({sum(1 for r in reused if not r['chars_reanalyzed'])} without any LLM call)")
+        print(f"LLM calls:   {self.analyzer.calls}")
+        if isinstance(self.analyzer, ProviderBatchAnalyzer):
+            print(f"Provider:    {self.analyzer.jobs_submitted} batch jobs submitted")
+        router = self.analyzer.router
+        if router is not None:
+            print("Routing:     " + ", ".join(f"{count} to {model}" for model, count in router.routed.items()))
+            if router.hedge_after:
+                print(f"Hedging:     {router.hedges} backup requests fired, {router.hedge_wins} answered first")
+        for row in self.analyzer.latency.summary():
+            print(f"Latency {row['model']}: {row['calls']} calls, {row['errors']} errors"
+                  + (f", p50 {row['p50']:.2f}s, p95 {row['p95']:.2f}s" if row['calls'] else ""))
+        if self.analyzer.cache is not None:
+            stats = self.analyzer.cache.stats()
+            print(f"Cache:       {stats['hits']} hits, {stats['misses']} misses")
+        # Slowest stages first: where the time went
+        for row in sorted(metrics.summary(), key=lambda r: -r["total"]):
+            print(f"Stage {row['stage']}: {row['calls']} runs, {row['total']:.2f}s total, "
+                  f"p50 {row['p50'] * 1000:.1f}ms, p95 {row['p95'] * 1000:.1f}ms")
+        print(f"Summary:     {self.summary_path}")
+
+
+def build_analyzer(args):
+    api_key = config.API_KEY
+    if not api_key:
+        api_key = os.getenv("OPENROUTER_API_KEY" if config.API_PROVIDER == "openrouter" else "OPENAI_API_KEY", "")
+    cache = None
+    if config.ANALYSIS_CACHE_ENABLED and not args.no_cache:
+        cache = AnalysisCache(
+            os.path.join(config.OUTPUT_DIR, config.ANALYSIS_CACHE_FILE),
+            ttl_seconds=config.ANALYSIS_CACHE_TTL_HOURS * 3600,
+            max_entries=config.ANALYSIS_CACHE_MAX_ENTRIES,
+            max_bytes=config.ANALYSIS_CACHE_MAX_MB * 1024 * 1024
+        )
+    model = args.model or config.API_MODEL
+    router = None
+    if args.route:
+        router = ModelRouter(config.ROUTER_CHEAP_MODEL, args.model or config.ROUTER_STRONG_MODEL,
+                             max_cheap_tokens=config.ROUTER_MAX_CHEAP_TOKENS,
+                             max_cheap_score=config.ROUTER_MAX_CHEAP_SCORE,
+                             hedge_after=args.hedge_after, hedge_model=config.ROUTER_HEDGE_MODEL)
+    elif args.hedge_after:
+        # Hedging without routing: every contract goes to the one model
+        router = ModelRouter(model, model, hedge_after=args.hedge_after, hedge_model=config.ROUTER_HEDGE_MODEL)
+    options = dict(
+        api_key=api_key, provider=config.API_PROVIDER, model=model, cache=cache, router=router,
+        chunked=config.CHUNKED_ANALYSIS_ENABLED, chunk_tokens=config.CHUNK_TOKEN_BUDGET,
+        prompt_tokens=config.PROMPT_TOKEN_BUDGET, regenerate_sections=config.REGENERATE_MISSING_SECTIONS,
+        base_url=args.base_url, max_concurrency=args.concurrency,
+        max_retries=config.API_MAX_RETRIES, timeout=config.API_TIMEOUT_SECONDS,
+        breaker=CircuitBreaker(config.CIRCUIT_BREAKER_THRESHOLD, config.CIRCUIT_BREAKER_RESET_SECONDS)
+    )
+    if args.provider_batch:
+        options["regenerate_sections"] = config.PROVIDER_BATCH_REGENERATE_SECTIONS
+        return ProviderBatchAnalyzer(
+            **options, state_path=os.path.join(args.output, "provider_batches.json"),
+            max_requests=config.PROVIDER_BATCH_MAX_REQUESTS, collect_seconds=config.PROVIDER_BATCH_COLLECT_SECONDS,
+            poll_seconds=args.poll_seconds, completion_window=config.PROVIDER_BATCH_COMPLETION_WINDOW
+        )
+    return AsyncLegalAnalyzer(**options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a folder of contracts without the Streamlit UI")
+    parser.add_argument("input_dir", help="Folder to scan recursively for PDF, DOCX and TXT contracts")
+    parser.add_argument("--output", default="batch_output", help="Output folder (default: batch_output)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Extraction processes")
+    parser.add_argument("--concurrency", type=int, default=config.ASYNC_MAX_CONCURRENCY, help="LLM requests in flight")
+    parser.add_argument("--model", help=f"Model override (default: {config.API_MODEL})")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint override")
+    parser.add_argument("--pdf", action="store_true", help="Also write a PDF report per contract")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore the checkpoint and start over")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the analysis cache")
+    parser.add_argument("--no-audit", action="store_true",
+                        help="Do not record results in the audit trail, portfolio dashboard and clause index")
+    parser.add_argument("--triage", action="store_true",
+                        help="Score contracts locally first and only send ambiguous or high-risk ones to the LLM")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Reuse analyses of near-duplicate contracts; only differing clauses go to the LLM")
+    parser.add_argument("--provider-batch", action="store_true",
+                        help="Send model requests as provider Batch API jobs and wait for them (OpenAI API)")
+    parser.add_argument("--poll-seconds", type=float, default=config.PROVIDER_BATCH_POLL_SECONDS,
+                        help="How often to check on submitted batch jobs")
+    parser.add_argument("--route", action="store_true",
+                        help="Send short, low-risk contracts to the cheap model and the rest to the strong one")
+    parser.add_argument("--hedge-after", type=float, default=config.HEDGE_AFTER_SECONDS,
+                        help="Race a backup request against calls that take longer than this many seconds")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Profile the run (main process only) and write <output>/profile.txt")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"Not a directory: {args.input_dir}")
+    if args.provider_batch and config.API_PROVIDER == "openrouter" and not args.base_url:
+        parser.error("--provider-batch needs the OpenAI API (API_PROVIDER = \"openai\") or --base-url")
+    if args.provider_batch and args.hedge_after:
+        parser.error("--hedge-after does not apply to --provider-batch")
+
+    audit = None if args.no_audit else AuditStore(os.path.join(config.OUTPUT_DIR, config.AUDIT_DB_FILE),
+                                                  batch_size=config.AUDIT_BATCH_SIZE)
+    portfolio = None if args.no_audit else PortfolioStore(os.path.join(config.OUTPUT_DIR, config.PORTFOLIO_DB_FILE))
+    dedup = None
+    if args.dedup:
+        dedup = ContractIndex(os.path.join(config.OUTPUT_DIR, config.NEAR_DUPLICATE_DB_FILE),
+                              min_similarity=config.NEAR_DUPLICATE_MIN_SIMILARITY)
+    clause_index = None if args.no_audit else ClauseIndex(os.path.join(config.OUTPUT_DIR, config.CLAUSE_INDEX_DIR))
+    runner = BatchRunner(args.input_dir, args.output, build_analyzer(args),
+                         workers=args.workers, write_pdf=args.pdf, resume=not args.no_resume, audit=audit,
+                         portfolio=portfolio, clause_index=clause_index, dedup=dedup,
+                         triage=RuleBasedRiskScorer(low_threshold=config.TRIAGE_LOW_SCORE,
+                                                    high_threshold=config.TRIAGE_HIGH_SCORE) if args.triage else None)
+    metrics.enabled = config.METRICS_ENABLED
+    metrics.log_path = os.path.join(args.output, config.METRICS_LOG_FILE) if config.METRICS_LOG_FILE else None
+    with profiled(args.profile) as profile:
+        asyncio.run(runner.run())
+    if profile["text"]:
+        profile_path = os.path.join(args.output, "profile.txt")
+        with open(profile_path, "w", encoding="utf-8") as f:
+            f.write(profile["text"])
+        print(f"Profile:     {profile_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
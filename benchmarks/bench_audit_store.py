@@ -0,0 +1,103 @@
+"""Benchmark: indexed audit store vs. scanning the append-only audit_trail.json.
+
+Writes N synthetic audit entries to both a JSONL file and an AuditStore,
+then times "High-risk Vendor contracts last quarter" style queries: a full
+scan of the JSONL file against paginated AuditStore.query() calls.
+
+Usage: python benchmarks/bench_audit_store.py [--entries 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.audit_store import AuditStore
+
+CONTRACT_TYPES = ["Employment", "Vendor", "Service", "Lease", "Partnership", "NDA"]
+VERDICTS = ["Sign", "Negotiate", "Reject"]
+
+
+def synthetic_entries(n, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(n):
+        score = rng.randint(0, 100)
+        yield {
+            "timestamp": (start + timedelta(seconds=i * 30)).isoformat(),
+            "contract_type": rng.choice(CONTRACT_TYPES),
+            "risk_score": score,
+            "risk_level": "High" if score >= 70 else ("Medium" if score >= 30 else "Low"),
+            "verdict": rng.choice(VERDICTS),
+            "file_name": f"contract_{i}.pdf",
+        }
+
+
+def scan_jsonl(path, contract_type, risk_level, since, until):
+    matches = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if (entry["contract_type"] == contract_type and entry["risk_level"] == risk_level
+                    and since <= entry["timestamp"] < until):
+                matches.append(entry)
+    matches.sort(key=lambda e: e["timestamp"], reverse=True)
+    return matches
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = os.path.join(tmp, "audit_trail.json")
+        store = AuditStore(os.path.join(tmp, "audit.db"), batch_size=10000)
+
+        start = time.perf_counter()
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            for entry in synthetic_entries(args.entries):
+                f.write(json.dumps(entry) + "\n")
+        print(f"Wrote {args.entries} JSONL lines in {time.perf_counter() - start:.1f}s")
+
+        _, seconds = timed(store.import_jsonl, jsonl_path)
+        print(f"Imported into AuditStore in {seconds:.1f}s")
+
+        last = next(iter(store.query(limit=1)[0]))["timestamp"]
+        until = datetime.fromisoformat(last)
+        since = until - timedelta(days=90)
+        filters = {"contract_type": "Vendor", "risk_level": "High", "since": since.isoformat(), "until": until.isoformat()}
+
+        matches, scan_seconds = timed(scan_jsonl, jsonl_path, "Vendor", "High", since.isoformat(), until.isoformat())
+        print(f"\nHigh-risk Vendor contracts, last 90 days: {len(matches)} entries")
+        print(f"{'method':<32} {'ms':>10}")
+        print(f"{'JSONL full scan':<32} {scan_seconds * 1000:>10.1f}")
+
+        page, seconds = timed(store.query, limit=50, **filters)
+        entries, cursor = page
+        print(f"{'AuditStore first page (50)':<32} {seconds * 1000:>10.2f}")
+        for _ in range(20):
+            if cursor is None:
+                break
+            (entries, cursor), seconds = timed(store.query, limit=50, cursor=cursor, **filters)
+        print(f"{'AuditStore 21st page (50)':<32} {seconds * 1000:>10.2f}")
+        total, seconds = timed(store.count, **filters)
+        print(f"{'AuditStore count':<32} {seconds * 1000:>10.2f}")
+        assert total == len(matches)
+        _, seconds = timed(store.query, limit=50, verdict="Reject", min_score=90)
+        print(f"{'AuditStore verdict + score page':<32} {seconds * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark: clause similarity search over a large local index.
+
+Fills a ClauseIndex with N synthetic clauses (templated legal sentences
+with random parties, numbers and filler), then times top-k queries for
+lightly edited copies of indexed clauses and for unseen clauses, and
+reopens the index from its memory-mapped files.
+
+Usage: python benchmarks/bench_clause_index.py [--clauses 1000000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.clause_index import ClauseIndex
+
+TEMPLATES = [
+    "The {a} shall indemnify, defend and hold harmless the {b} against all claims, losses and damages arising from {x}.",
+    "Either party may terminate this agreement by giving {n} days written notice to the other party for {x}.",
+    "The {a} shall not, for a period of {n} months after termination, engage in any business competing with {x}.",
+    "All intellectual property created by the {a} in the course of {x} shall vest exclusively in the {b}.",
+    "Payment shall be made by the {b} within {n} days of receipt of a valid invoice for {x}, failing which interest applies.",
+    "Any dispute arising out of {x} shall be referred to arbitration seated in {c} under the Arbitration Act.",
+    "The {a} shall keep confidential all information disclosed by the {b} in connection with {x} for {n} years.",
+    "This agreement shall automatically renew for successive periods of {n} months unless the {b} objects to {x}.",
+]
+PARTIES = ["Vendor", "Client", "Employee", "Employer", "Lessee", "Lessor", "Partner", "Service Provider"]
+CITIES = ["Mumbai", "Delhi", "Bengaluru", "Chennai", "Pune", "Hyderabad"]
+FILLER = ("the services the goods the project deliverables software maintenance consulting support "
+          "warehouse logistics marketing campaign data processing facility management").split()
+
+
+def synthetic_clause(rng):
+    return rng.choice(TEMPLATES).format(
+        a=rng.choice(PARTIES), b=rng.choice(PARTIES), c=rng.choice(CITIES), n=rng.randint(1, 120),
+        x=" ".join(rng.choice(FILLER) for _ in range(rng.randint(3, 12))))
+
+
+def edit(text, rng):
+    words = text.split()
+    for _ in range(2):
+        words[rng.randrange(len(words))] = rng.choice(FILLER)
+    return " ".join(words)
+
+
+def timed_queries(index, texts, k=5):
+    latencies = []
+    hits = 0
+    for text in texts:
+        start = time.perf_counter()
+        hits += bool(index.query(text, k=k))
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)], hits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clauses", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ClauseIndex(tmp)
+        sample = []
+        start = time.perf_counter()
+        for batch_start in range(0, args.clauses, 10000):
+            batch = []
+            for i in range(batch_start, min(args.clauses, batch_start + 10000)):
+                text = synthetic_clause(rng)
+                batch.append(({"number": str(i % 40 + 1), "text": text}, {}, f"contract-{i // 40}", None, None))
+                if rng.random() < args.queries / args.clauses:
+                    sample.append(text)
+            index.add_clauses(batch)
+        seconds = time.perf_counter() - start
+        print(f"Indexed {len(index)} clauses in {seconds:.1f}s ({len(index) / seconds:.0f} clauses/s)")
+
+        near = [edit(text, rng) for text in sample[:args.queries]]
+        unseen = [f"Clause on {rng.choice(FILLER)} number {i} governed by unrelated {rng.choice(CITIES)} wording"
+                  for i in range(args.queries)]
+        print(f"{'query set':<28} {'p50 ms':>8} {'p95 ms':>8} {'with matches':>14}")
+        for label, texts in (("edited copies", near), ("unseen clauses", unseen)):
+            p50, p95, hits = timed_queries(index, texts)
+            print(f"{label:<28} {p50:>8.2f} {p95:>8.2f} {hits:>8}/{len(texts)}")
+
+        start = time.perf_counter()
+        reopened = ClauseIndex(tmp)
+        print(f"\nReopened from memory-mapped files in {(time.perf_counter() - start) * 1000:.1f} ms")
+        p50, p95, _ = timed_queries(reopened, near)
+        print(f"{'edited copies (reopened)':<28} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: line-oriented clause segmenter vs. the old backtracking regexes.
+
+Adversarial inputs grow in size. The old regex is exponential on long digit
+runs and quadratic on long uppercase runs, so it is only timed up to a
+per-case size limit (and dropped once a run exceeds --budget seconds); the
+segmenter is also timed on much larger inputs and should scale linearly.
+
+Usage: python benchmarks/bench_clause_segmentation.py [--budget 5]
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.clause_segmenter import ClauseSegmenter
+
+LEGACY_CLAUSE = re.compile(r'(\d+\.(?:\d+\.?)*)\s+([A-Z][^\n]+(?:\n(?!\d+\.)[^\n]+)*)')
+LEGACY_SECTION = re.compile(r'([A-Z][A-Z\s]+):\s*([^\n]+(?:\n(?![A-Z][A-Z\s]+:)[^\n]+)*)')
+
+
+def legacy_extract(text):
+    clauses = list(LEGACY_CLAUSE.finditer(text))
+    if not clauses:
+        clauses = list(LEGACY_SECTION.finditer(text))
+    return clauses
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    fn(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=5.0, help="Stop timing the old regex past this many seconds")
+    args = parser.parse_args()
+
+    segmenter = ClauseSegmenter()
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    corpus = "\n\n".join(open(p, encoding="utf-8").read() for p in sorted(glob.glob(os.path.join(data_dir, "*.txt"))))
+
+    cases = [
+        # (name, input builder, sizes, largest size the old regex is timed on)
+        ("digit run '1.111...x'", lambda n: "1." + "1" * n + "x", [16, 18, 20, 22, 24, 10_000, 1_000_000], 24),
+        ("uppercase run, no colon", lambda n: "A" * n, [2_500, 5_000, 10_000, 20_000, 1_000_000], 20_000),
+        ("OCR caps lines, no colon", lambda n: ("TERMS AND CONDITIONS OF THE AGREEMENT " * 4 + "\n") * n,
+         [100, 200, 400, 800, 20_000], 800),
+        ("data/ contracts repeated", lambda n: corpus * n, [1, 10, 100, 500], 500),
+    ]
+
+    print(f"{'input':<28} {'chars':>10} {'old regex ms':>14} {'segmenter ms':>14}")
+    for name, make, sizes, legacy_limit in cases:
+        legacy_alive = True
+        for size in sizes:
+            text = make(size)
+            legacy_ms = "skipped"
+            if legacy_alive and size <= legacy_limit:
+                seconds = timed(legacy_extract, text)
+                legacy_ms = f"{seconds * 1000:.1f}"
+                legacy_alive = seconds < args.budget
+            segment_ms = timed(segmenter.segment, text) * 1000
+            print(f"{name:<28} {len(text):>10} {legacy_ms:>14} {segment_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
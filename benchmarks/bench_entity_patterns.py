@@ -0,0 +1,84 @@
+"""Micro-benchmark: entity extraction throughput per extractor, in MB/s.
+
+Times each compiled pattern of the registry on its own, the fused single-pass
+scan, and the previous one-re.findall-per-pattern code, on the bundled data/
+contracts repeated up to the requested size.
+
+Usage: python benchmarks/bench_entity_patterns.py [--size-mb 5] [--repeat 3]
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.nlp_engine import NLPEngine
+from modules.patterns import ENTITY_PATTERNS, PatternRegistry
+
+LEGACY_PATTERNS = [
+    (r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b', re.IGNORECASE),
+    (r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b', re.IGNORECASE),
+    (r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}\b', re.IGNORECASE),
+    (r'(?:INR|Rs\.?|₹)\s*[\d,]+(?:\.\d{2})?', re.IGNORECASE),
+    (r'\$\s*[\d,]+(?:\.\d{2})?', re.IGNORECASE),
+    (r'\b\d+\s*(?:lakhs?|crores?|thousands?|millions?)\b', re.IGNORECASE),
+    (r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:Pvt\.?\s+)?Ltd\.?\b', 0),
+    (r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+Inc\.?\b', 0),
+    (r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+Corp\.?\b', 0),
+    (r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+LLC\b', 0),
+    (r'between\s+([A-Z][a-zA-Z\s&.]+?)(?:\s+and\s+|\s*,)', re.IGNORECASE),
+    (r'CIN:\s*([A-Z0-9]{21})', 0),
+    (r'GST:\s*(\d{2}[A-Z]{5}\d{4}[A-Z]{1}\d{1}[A-Z]{1}\d{1})', 0),
+]
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    corpus = ""
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            corpus += f.read() + "\n\n"
+    target = int(args.size_mb * 1024 * 1024)
+    text = (corpus * (target // len(corpus) + 1))[:target]
+    megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+
+    registry = PatternRegistry()
+    engine = NLPEngine()
+
+    rows = []
+    for kind, compiled in registry.compiled.items():
+        for idx, pattern in enumerate(compiled):
+            seconds = best_of(lambda: sum(1 for _ in pattern.finditer(text)), args.repeat)
+            rows.append((f"{kind}[{idx}]", seconds))
+    rows.append(("parties", best_of(lambda: sum(1 for _ in registry.party_pattern.finditer(text)), args.repeat)))
+    rows.append(("fused single pass", best_of(lambda: sum(1 for _ in registry.finditer(text)), args.repeat)))
+    rows.append(("legacy findall per pattern",
+                 best_of(lambda: [re.findall(p, text, flags) for p, flags in LEGACY_PATTERNS], args.repeat)))
+    rows.append(("get_enhanced_entities", best_of(lambda: engine.get_enhanced_entities(text), args.repeat)))
+
+    print(f"Input: {megabytes:.1f} MB ({len(ENTITY_PATTERNS)} entity types)")
+    print(f"{'extractor':<30} {'ms':>10} {'MB/s':>10}")
+    for name, seconds in rows:
+        print(f"{name:<30} {seconds * 1000:>10.1f} {megabytes / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
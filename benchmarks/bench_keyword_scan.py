@@ -0,0 +1,96 @@
+"""Benchmark: single-pass keyword scanner vs. per-keyword substring scans.
+
+Compares the four NLPEngine keyword passes (contract type, risk indicators,
+ambiguities, locations) against the previous one-scan-per-keyword code on
+the bundled data/ contracts and on synthetic 5 MB inputs.
+
+Usage: python benchmarks/bench_keyword_scan.py [--size-mb 5] [--repeat 3]
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.nlp_engine import NLPEngine
+
+
+def legacy_keyword_passes(engine, text):
+    """The pre-scanner implementation: one lower() and one `in` per keyword"""
+    text_lower = text.lower()
+    scores = {t: sum(1 for kw in kws if kw in text_lower) for t, kws in engine.contract_keywords.items()}
+    contract_type = max(scores, key=scores.get) if max(scores.values()) > 0 else "General"
+
+    text_lower = text.lower()
+    risks = {}
+    for risk_type, keywords in engine.risk_keywords.items():
+        matches = [kw for kw in keywords if kw in text_lower]
+        if matches:
+            risks[risk_type] = {"present": True, "keywords_found": matches}
+
+    text_lower = text.lower()
+    ambiguities = []
+    for phrase in engine.ambiguous_phrases:
+        if phrase in text_lower:
+            matches = re.findall(r'.{0,50}' + re.escape(phrase) + r'.{0,50}', text_lower, re.IGNORECASE)
+            if matches:
+                ambiguities.append({"phrase": phrase, "context": matches[0]})
+
+    locations = [loc for loc in engine.location_keywords if loc.lower() in text.lower()]
+    return contract_type, risks, [a["phrase"] for a in ambiguities[:5]], locations
+
+
+def scanner_keyword_passes(engine, text):
+    engine._last_scan = None  # measure a cold scan
+    contract_type = engine.classify_contract_type(text)
+    risks = engine.detect_risk_indicators(text)
+    ambiguities = engine.detect_ambiguities(text)
+    _, hits = engine.scan_keywords(text)
+    locations = [loc for loc in engine.location_keywords if loc.lower() in hits]
+    return contract_type, risks, [a["phrase"] for a in ambiguities], locations
+
+
+def best_of(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = NLPEngine()
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    inputs = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            inputs.append((os.path.basename(path), f.read()))
+
+    corpus = "\n\n".join(text for _, text in inputs)
+    target = int(args.size_mb * 1024 * 1024)
+    inputs.append((f"synthetic {args.size_mb:g} MB (data/ repeated)", (corpus * (target // len(corpus) + 1))[:target]))
+    filler = "The parties hereby acknowledge the foregoing terms and conditions. "
+    inputs.append((f"synthetic {args.size_mb:g} MB (sparse hits)", (filler * (target // len(filler) + 1))[:target]))
+
+    print(f"{'input':<45} {'size':>10} {'legacy ms':>10} {'scanner ms':>11} {'speedup':>8}  same")
+    for name, text in inputs:
+        legacy_time, legacy = best_of(lambda: legacy_keyword_passes(engine, text), args.repeat)
+        scan_time, scanned = best_of(lambda: scanner_keyword_passes(engine, text), args.repeat)
+        same = legacy == scanned
+        print(f"{name:<45} {len(text):>10} {legacy_time * 1000:>10.2f} {scan_time * 1000:>11.2f} "
+              f"{legacy_time / scan_time:>7.2f}x  {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark: cost of the stage instrumentation on the NLP pipeline.
+
+Runs NLPEngine.run_pipeline over the bundled sample contracts with metrics
+disabled and enabled (JSON log off, as the hot path without disk I/O),
+alternating so both see the same machine state, and prints the best time
+per pipeline run of each and the per-stage overhead.
+
+Usage: python benchmarks/bench_metrics_overhead.py [--repeat 50] [--rounds 5]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.metrics import metrics
+from modules.nlp_engine import NLPEngine
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def run(engine, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            engine.run_pipeline(text)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50, help="Passes over the sample contracts per round")
+    parser.add_argument("--rounds", type=int, default=5, help="Alternating off/on rounds; the best of each counts")
+    args = parser.parse_args()
+
+    texts = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append(f.read())
+    engine = NLPEngine()
+    metrics.log_path = None
+    run(engine, texts, 2)  # Warm up pattern caches
+
+    plain = timed = float("inf")
+    for _ in range(args.rounds):
+        metrics.enabled = False
+        plain = min(plain, run(engine, texts, args.repeat))
+        metrics.enabled = True
+        timed = min(timed, run(engine, texts, args.repeat))
+    stages = len(metrics.summary())  # Stages per pipeline run
+    print(f"Pipeline, metrics off: {plain:.3f} ms per contract")
+    print(f"Pipeline, metrics on:  {timed:.3f} ms per contract ({stages} stages timed)")
+    print(f"Overhead: {timed - plain:+.3f} ms per contract, {(timed - plain) * 1000 / stages:+.1f} us per stage")
+
+
+if __name__ == "__main__":
+    main()
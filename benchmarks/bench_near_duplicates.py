@@ -0,0 +1,99 @@
+"""Benchmark: near-duplicate reuse on a batch of templated vendor contracts.
+
+Writes N copies of the bundled vendor contract with other party names,
+dates and amounts (every fifth copy also rewrites one clause), then runs
+the batch pipeline over them twice against a simulated LLM (fixed latency
+per request plus time per character): once analyzing every contract in
+full and once with the near-duplicate index. Prints LLM calls, characters
+sent and wall time for both.
+
+Usage: python benchmarks/bench_near_duplicates.py [--contracts 100] [--latency 0.5]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import BatchRunner
+from modules.async_analyzer import AsyncLegalAnalyzer
+from modules.near_duplicates import ContractIndex
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data",
+                        "comprehensive_vendor_contract.txt")
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September"]
+
+
+class SimulatedAnalyzer(AsyncLegalAnalyzer):
+    """Offline analyzer whose requests cost latency + per-character time"""
+
+    def __init__(self, latency, **kwargs):
+        super().__init__(**kwargs)
+        self.request_seconds = latency
+        self.chars_sent = 0
+        self.client = object()
+
+    async def _call_model(self, messages, model=None):
+        chars = sum(len(m["content"]) for m in messages)
+        self.calls += 1
+        self.chars_sent += chars
+        await asyncio.sleep(self.request_seconds + chars / 20000)
+        result = self._mock_analysis("", "Vendor")
+        result.pop("mock")  # Stands in for a real reply
+        return result
+
+    async def aclose(self):
+        pass
+
+
+def write_copies(directory, n, rng):
+    with open(TEMPLATE, "r", encoding="utf-8") as f:
+        template = f.read()
+    for i in range(n):
+        text = (template.replace("TechVenture Solutions", f"Vendor {i} Systems")
+                .replace("RetailMax India", f"Client {i} Retail")
+                .replace("15th January 2024", f"{rng.randint(1, 28)} {rng.choice(MONTHS)} 2025")
+                .replace("85,00,000", f"{rng.randint(10, 99)},00,000"))
+        if i % 5 == 4:
+            text = text.replace("for a period of 5 years thereafter",
+                                "for a period of 5 years thereafter and within any city where the Client operates")
+        with open(os.path.join(directory, f"vendor_{i:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def run(input_dir, output_dir, latency, dedup):
+    analyzer = SimulatedAnalyzer(latency, api_key=None, provider="openai", model="sim", max_concurrency=8)
+    runner = BatchRunner(input_dir, output_dir, analyzer, workers=2, resume=False, dedup=dedup)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(runner.run())
+    seconds = time.perf_counter() - start
+    reused = sum(1 for r in runner.records if r.get("reused_from"))
+    return analyzer.calls, analyzer.chars_sent, seconds, reused
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contracts", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated seconds per LLM request")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = os.path.join(tmp, "contracts")
+        os.makedirs(input_dir)
+        write_copies(input_dir, args.contracts, random.Random(3))
+
+        print(f"{'mode':<14} {'LLM calls':>10} {'chars sent':>12} {'wall s':>8} {'reused':>8}")
+        for label, dedup in (("full", None), ("--dedup", ContractIndex(os.path.join(tmp, "near_duplicates.db")))):
+            calls, chars, seconds, reused = run(input_dir, os.path.join(tmp, label.strip("-")), args.latency, dedup)
+            print(f"{label:<14} {calls:>10} {chars:>12} {seconds:>8.1f} {reused:>8}")
+
+
+if __name__ == "__main__":
+    main()
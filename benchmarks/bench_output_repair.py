@@ -0,0 +1,62 @@
+"""Benchmark: cost of repairing and validating model replies.
+
+Takes a complete analysis reply (the demo-mode result, pretty-printed as
+models write it) and damaged copies of it: cut off at several points,
+with trailing commas, with numbers written as text. Prints, per variant,
+the time for json.loads alone (where it works), repair_json plus
+AnalysisValidator, and the sections that would have to be re-requested.
+
+Usage: python benchmarks/bench_output_repair.py [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.legal_analyzer import LegalAnalyzer
+from modules.output_schema import AnalysisValidator, repair_json
+
+
+def variants():
+    result = LegalAnalyzer()._mock_analysis("", "Vendor")
+    full = json.dumps(result, indent=2, ensure_ascii=False)
+    yield "complete", full
+    yield "trailing commas", full.replace("]", ",]").replace("\n}", ",\n}")
+    loose = json.loads(full)
+    loose["risk_assessment"]["composite_score"] = f"{loose['risk_assessment']['composite_score']}/100"
+    loose["missing_protections"] = "Liability cap"
+    yield "wrong types", json.dumps(loose, indent=2)
+    for share in (0.9, 0.6, 0.3):
+        yield f"cut off at {share:.0%}", full[:int(len(full) * share)]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200, help="Runs per variant")
+    args = parser.parse_args()
+
+    validator = AnalysisValidator()
+    print(f"{'reply':<18} {'chars':>6} {'loads ms':>9} {'repair ms':>10}  re-requested sections")
+    for label, text in variants():
+        try:
+            json.loads(text)
+            loads_ms = f"{timed(lambda: json.loads(text), args.repeat):.3f}"
+        except ValueError:
+            loads_ms = "fails"
+        repair_ms = timed(lambda: validator.validate(repair_json(text)), args.repeat)
+        _, missing, _ = validator.validate(repair_json(text))
+        print(f"{label:<18} {len(text):>6} {loads_ms:>9} {repair_ms:>10.3f}  {', '.join(missing) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
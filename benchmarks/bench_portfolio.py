@@ -0,0 +1,78 @@
+"""Benchmark: portfolio analytics over a large store of analyses.
+
+Stores N synthetic analyses in a PortfolioStore, then times the initial
+load, each dashboard view (cold and cached), and an incremental refresh
+after a small batch of new analyses arrives.
+
+Usage: python benchmarks/bench_portfolio.py [--contracts 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.portfolio import PortfolioAnalytics, PortfolioStore
+
+CONTRACT_TYPES = ["Employment", "Vendor", "Service", "Lease", "Partnership", "NDA"]
+CATEGORIES = ["Indemnity", "Termination", "Non-compete", "Liability", "Payment", "IP", "Other"]
+LAWS = ["Indian Contract Act, 1872", "Arbitration and Conciliation Act, 1996", "IT Act, 2000",
+        "GST Act, 2017", "Companies Act, 2013", "Payment of Wages Act, 1936"]
+STATUSES = ["Compliant", "Warning", "Non-Compliant"]
+VERDICTS = ["Sign", "Negotiate", "Reject"]
+
+
+def synthetic_results(n, rng, offset=0):
+    for i in range(offset, offset + n):
+        score = rng.randint(0, 100)
+        yield ({
+            "contract_info": {"type": rng.choice(CONTRACT_TYPES), "parties": [f"Counterparty {rng.randint(0, 2000)} Ltd", "Our SME"]},
+            "risk_assessment": {
+                "composite_score": score,
+                "risk_level": "High" if score >= 70 else ("Medium" if score >= 30 else "Low"),
+                "key_risks": [{"category": rng.choice(CATEGORIES), "risk_level": rng.choice(["High", "Medium", "Low"])}
+                              for _ in range(rng.randint(1, 5))],
+            },
+            "compliance_check": [{"law": law, "status": rng.choice(STATUSES)} for law in rng.sample(LAWS, 3)],
+            "overall_recommendation": {"verdict": rng.choice(VERDICTS)},
+        }, f"hash-{i}", f"contract_{i}.pdf", None)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<36} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contracts", type=int, default=100_000)
+    args = parser.parse_args()
+    rng = random.Random(11)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PortfolioStore(os.path.join(tmp, "portfolio.db"))
+        timed(f"store {args.contracts} analyses", lambda: store.add_many(synthetic_results(args.contracts, rng)))
+
+        analytics = PortfolioAnalytics(store)
+        timed("initial load", analytics.refresh)
+        views = [("summary", analytics.summary), ("score distribution", analytics.score_distribution),
+                 ("score by counterparty", analytics.score_by_counterparty),
+                 ("risk heat map", analytics.risk_heatmap), ("compliance failures", analytics.compliance_failures)]
+        for name, view in views:
+            timed(f"{name} (cold)", view)
+        for name, view in views:
+            timed(f"{name} (cached)", view)
+
+        store.add_many(synthetic_results(100, rng, offset=args.contracts))
+        timed("incremental refresh (+100)", analytics.refresh)
+        timed("all views after refresh", lambda: [view() for _, view in views])
+        print(f"\n{analytics.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""Benchmark: --provider-batch against a local fake of the Files and Batches endpoints.
+
+Starts an in-process HTTP server implementing the parts of the OpenAI
+Files and Batches API that ProviderBatchAnalyzer uses (file upload, batch
+create / retrieve, file content). The fake finishes a job job_seconds
+after it is created, answers every request with the demo analysis and
+rejects the requests of one contract through the job's error file. The
+batch pipeline then runs over the bundled sample contracts in three
+phases:
+
+  submit    one run from scratch: requests are pooled, submitted, polled
+            and mapped back; the rejected contract must be a failed record
+  interrupt a run stopped while its job is still running at the fake; the
+            job must be recorded in provider_batches.json
+  resume    the same command again: it must wait for that job instead of
+            uploading the requests a second time
+
+Prints uploads, jobs, polls, record statuses and wall time per phase and
+exits non-zero if a check fails.
+
+Usage: python benchmarks/bench_provider_batch.py [--job-seconds 1] [--poll-seconds 0.2]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import BatchRunner
+from modules.legal_analyzer import LegalAnalyzer
+from modules.provider_batch import ProviderBatchAnalyzer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+REJECT_MARKER = "FAKE-BATCH-REJECT"  # Requests containing this come back in the error file
+
+
+class FakeBatchAPI:
+    """In-memory Files and Batches endpoints; jobs complete job_seconds after creation unless held"""
+
+    def __init__(self, job_seconds):
+        self.job_seconds = job_seconds
+        self.hold = False  # Keep jobs in progress (to interrupt a run)
+        self.files = {}
+        self.batches = {}
+        self.uploads = 0
+        self.polls = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        result = LegalAnalyzer()._mock_analysis("", "Vendor")
+        result.pop("mock")  # Stands in for a real reply
+        self.reply = json.dumps(result, ensure_ascii=False)
+
+    def upload(self, body):
+        lines = [line.decode("utf-8") for line in body.splitlines() if line.startswith(b'{"custom_id"')]
+        with self._lock:
+            file_id = f"file-{next(self._ids)}"
+            self.files[file_id] = "\n".join(lines) + "\n"
+            self.uploads += 1
+        return {"id": file_id, "object": "file", "bytes": len(body), "created_at": int(time.time()),
+                "filename": "contracts.jsonl", "purpose": "batch", "status": "processed"}
+
+    def create(self, request):
+        with self._lock:
+            batch_id = f"batch_{next(self._ids)}"
+            self.batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": request["endpoint"],
+                "input_file_id": request["input_file_id"], "completion_window": request["completion_window"],
+                "status": "validating", "created_at": int(time.time()), "output_file_id": None,
+                "error_file_id": None, "request_counts": None, "_ready_at": time.time() + self.job_seconds,
+            }
+        return self._public(batch_id)
+
+    def retrieve(self, batch_id):
+        with self._lock:
+            self.polls += 1
+            job = self.batches[batch_id]
+            if job["status"] != "completed":
+                if self.hold or time.time() < job["_ready_at"]:
+                    job["status"] = "in_progress"
+                else:
+                    self._complete(job)
+        return self._public(batch_id)
+
+    def _complete(self, job):
+        output, errors = [], []
+        for line in self.files[job["input_file_id"]].splitlines():
+            request = json.loads(line)
+            if REJECT_MARKER in json.dumps(request["body"]["messages"], ensure_ascii=False):
+                errors.append({"id": "req", "custom_id": request["custom_id"], "error": None,
+                               "response": {"status_code": 400,
+                                            "body": {"error": {"message": "Rejected by the fake batch API"}}}})
+                continue
+            output.append({"id": "req", "custom_id": request["custom_id"], "error": None, "response": {
+                "status_code": 200, "request_id": "req",
+                "body": {"id": "chatcmpl", "object": "chat.completion", "created": 0, "model": request["body"]["model"],
+                         "choices": [{"index": 0, "finish_reason": "stop",
+                                      "message": {"role": "assistant", "content": self.reply}}]}}})
+        for key, lines in (("output_file_id", output), ("error_file_id", errors)):
+            if lines:
+                file_id = f"file-{next(self._ids)}"
+                self.files[file_id] = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+                job[key] = file_id
+        job["request_counts"] = {"total": len(output) + len(errors), "completed": len(output), "failed": len(errors)}
+        job["status"] = "completed"
+
+    def _public(self, batch_id):
+        return {k: v for k, v in self.batches[batch_id].items() if not k.startswith("_")}
+
+    def serve(self):
+        """Start the server on a free local port; returns its base URL"""
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, payload):
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.path.endswith("/files"):
+                    self._send(api.upload(body))
+                elif self.path.endswith("/batches"):
+                    self._send(api.create(json.loads(body)))
+                else:
+                    self.send_error(404)
+
+            def do_GET(self):
+                parts = self.path.split("/")
+                if "batches" in parts:
+                    self._send(api.retrieve(parts[-1]))
+                elif parts[-1] == "content":
+                    self._send(api.files[parts[-2]].encode("utf-8"))
+                else:
+                    self.send_error(404)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def write_contracts(directory):
+    """The bundled contracts, one of them carrying the reject marker in its title"""
+    names = sorted(name for name in os.listdir(DATA_DIR) if name.endswith(".txt"))
+    for i, name in enumerate(names):
+        with open(os.path.join(DATA_DIR, name), "r", encoding="utf-8") as f:
+            text = f.read()
+        if i == 0:
+            text = f"{REJECT_MARKER}\n{text}"
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    return len(names), names[0]
+
+
+def make_runner(input_dir, output_dir, base_url, poll_seconds):
+    analyzer = ProviderBatchAnalyzer(api_key="fake", provider="openai", model="fake-model", base_url=base_url,
+                                     chunked=False, regenerate_sections=False, max_retries=1,
+                                     state_path=os.path.join(output_dir, "provider_batches.json"),
+                                     collect_seconds=1, poll_seconds=poll_seconds)
+    os.makedirs(output_dir, exist_ok=True)
+    return BatchRunner(input_dir, output_dir, analyzer, workers=2, resume=True)
+
+
+async def interrupted(runner, api, state_path):
+    """Run until a job is submitted and recorded, then stop as an interruption would"""
+    task = asyncio.create_task(runner.run())
+    while not (api.batches and os.path.exists(state_path)):
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(0.3)  # A few polls of the held job
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    await runner.analyzer.aclose()
+
+
+def phase(label, api, fn):
+    uploads, jobs, polls = api.uploads, len(api.batches), api.polls
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner = fn()
+    seconds = time.perf_counter() - start
+    statuses = {}
+    for record in runner.records:
+        statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+    print(f"{label:<10} {api.uploads - uploads:>7} {len(api.batches) - jobs:>5} {api.polls - polls:>6} "
+          f"{seconds:>7.1f}  {', '.join(f'{n} {s}' for s, n in sorted(statuses.items())) or '-'}")
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--job-seconds", type=float, default=1.0, help="Time the fake takes to finish a job")
+    parser.add_argument("--poll-seconds", type=float, default=0.2)
+    args = parser.parse_args()
+
+    api = FakeBatchAPI(args.job_seconds)
+    base_url = api.serve()
+    tmp = tempfile.mkdtemp(prefix="bench_provider_batch_")
+    failures = []
+    try:
+        input_dir = os.path.join(tmp, "contracts")
+        os.makedirs(input_dir)
+        count, rejected = write_contracts(input_dir)
+        print(f"{count} contracts, fake batch API at {base_url}\n")
+        print(f"{'phase':<10} {'uploads':>7} {'jobs':>5} {'polls':>6} {'wall s':>7}  records")
+
+        def submit():
+            runner = make_runner(input_dir, os.path.join(tmp, "submit"), base_url, args.poll_seconds)
+            asyncio.run(runner.run())
+            return runner
+
+        runner = phase("submit", api, submit)
+        failed = [r for r in runner.records if r["status"] == "failed"]
+        if [r["file"] for r in failed] != [rejected] or "Rejected by the fake" not in (failed[0]["error"] or ""):
+            failures.append(f"submit: expected only {rejected} to fail via the error file, got {failed}")
+        if sum(1 for r in runner.records if r["status"] == "ok") != count - 1:
+            failures.append("submit: not every other contract was analyzed")
+
+        output_dir = os.path.join(tmp, "resume")
+        state_path = os.path.join(output_dir, "provider_batches.json")
+
+        def interrupt():
+            api.hold = True
+            runner = make_runner(input_dir, output_dir, base_url, args.poll_seconds)
+            asyncio.run(interrupted(runner, api, state_path))
+            api.hold = False
+            return runner
+
+        phase("interrupt", api, interrupt)
+        with open(state_path, "r", encoding="utf-8") as f:
+            recorded = json.load(f)
+        if sum(len(ids) for ids in recorded.values()) != count:
+            failures.append(f"interrupt: provider_batches.json should list {count} requests, got {recorded}")
+
+        def resume():
+            runner = make_runner(input_dir, output_dir, base_url, args.poll_seconds)
+            asyncio.run(runner.run())
+            return runner
+
+        uploads = api.uploads
+        runner = phase("resume", api, resume)
+        if api.uploads != uploads:
+            failures.append("resume: requests were uploaded again instead of waiting for the recorded job")
+        if sum(1 for r in runner.records if r["status"] == "ok") != count - 1:
+            failures.append("resume: the recorded job's results were not mapped back")
+        with open(state_path, "r", encoding="utf-8") as f:
+            if json.load(f):
+                failures.append("resume: finished jobs left in provider_batches.json")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ submit, poll, error-file mapping and resume all behaved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark: PDF report throughput for a batch renewal run.
+
+Renders N reports (varied copies of the offline demo analysis) three ways:
+a fresh ReportGenerator per report (styles rebuilt every time, as the app
+used to), one shared generator rendering sequentially, and generate_bulk
+across a process pool. Prints reports per second for each.
+
+Usage: python benchmarks/bench_report_generation.py [--reports 200] [--workers 4]
+"""
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.legal_analyzer import LegalAnalyzer
+from modules.report_generator import ReportGenerator
+
+CONTRACT_TYPES = ["Employment", "Vendor", "Service", "Lease", "Partnership", "NDA"]
+
+
+def renewal_analyses(n):
+    base = LegalAnalyzer()._mock_analysis("", "Vendor")
+    analyses = []
+    for i in range(n):
+        analysis = copy.deepcopy(base)
+        analysis["contract_info"]["type"] = CONTRACT_TYPES[i % len(CONTRACT_TYPES)]
+        analysis["contract_info"]["parties"] = [f"Renewal Customer {i} Pvt Ltd", "Supplier Ltd"]
+        analysis["risk_assessment"]["composite_score"] = (i * 37) % 101
+        analyses.append(analysis)
+    return analyses
+
+
+def rate(label, n, seconds):
+    print(f"{label:<34} {seconds:>8.2f}s {n / seconds:>10.1f} reports/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    analyses = renewal_analyses(args.reports)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for idx, analysis in enumerate(analyses):
+            ReportGenerator(output_dir=tmp).generate_pdf(analysis, f"fresh_{idx}.pdf")
+        rate("new generator per report", len(analyses), time.perf_counter() - start)
+
+        generator = ReportGenerator(output_dir=tmp)
+        start = time.perf_counter()
+        for idx, analysis in enumerate(analyses):
+            generator.generate_pdf(analysis, f"shared_{idx}.pdf")
+        rate("shared generator, sequential", len(analyses), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        paths = generator.generate_bulk(analyses, [f"bulk_{idx}.pdf" for idx in range(len(analyses))],
+                                        workers=args.workers)
+        rate(f"generate_bulk ({args.workers} workers)", len(paths), time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
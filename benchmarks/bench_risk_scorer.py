@@ -0,0 +1,49 @@
+"""Benchmark: rule-based pre-screen throughput for batch triage.
+
+Runs the NLP pipeline once per bundled sample contract, then scores the
+results N times with RuleBasedRiskScorer and prints contracts per second
+and how the samples would be triaged.
+
+Usage: python benchmarks/bench_risk_scorer.py [--contracts 10000]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.nlp_engine import NLPEngine
+from modules.risk_scorer import RuleBasedRiskScorer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contracts", type=int, default=10_000)
+    args = parser.parse_args()
+
+    engine = NLPEngine()
+    samples = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            samples.append((os.path.basename(path), engine.run_pipeline(f.read())))
+
+    scorer = RuleBasedRiskScorer()
+    for name, nlp_data in samples:
+        assessment = scorer.score(nlp_data)
+        print(f"{name:<40} {assessment['composite_score']:>4} {assessment['risk_level']:<12} "
+              f"{scorer.triage(assessment)}")
+
+    start = time.perf_counter()
+    for i in range(args.contracts):
+        scorer.score(samples[i % len(samples)][1])
+    seconds = time.perf_counter() - start
+    print(f"\nScored {args.contracts} contracts in {seconds:.2f}s "
+          f"({args.contracts / seconds:.0f} contracts/s, {seconds / args.contracts * 1000:.3f} ms each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,11 +34,95 @@ DEFAULT_CONTRACT_TYPE = "Auto-Detect"
 
 # NLP Settings
 SPACY_MODEL = "en_core_web_sm"
+PDF_EXTRACTION_WORKERS = None  # Set to e.g. 4 to decode large PDFs in a process pool
+NLP_CACHE_MAX_ENTRIES = 32  # Uploaded files whose extraction + NLP results stay memoized
 
 # Output Settings
 OUTPUT_DIR = "logs"
 REPORT_FILENAME_PREFIX = "contract_report"
-AUDIT_LOG_FILE = "audit_trail.json"
+EXPORT_CACHE_MAX_ENTRIES = 64  # Rendered PDF/JSON downloads kept in memory, keyed by analysis hash
+AUDIT_LOG_FILE = "audit_trail.json"  # Legacy JSONL trail, imported into the audit store on start
+AUDIT_DB_FILE = "audit.db"
+AUDIT_BATCH_SIZE = 50  # Audit entries buffered per write transaction
+AUDIT_PAGE_SIZE = 50
+PORTFOLIO_DB_FILE = "portfolio.db"  # Every completed analysis, flattened for the portfolio dashboard
+PORTFOLIO_TOP_COUNTERPARTIES = 20
+CLAUSE_INDEX_DIR = "clause_index"  # MinHash index of past clauses ("have we seen this clause before?")
+CLAUSE_MATCH_TOP_K = 3
+CLAUSE_MATCH_MIN_SIMILARITY = 0.3  # Estimated Jaccard similarity of word 3-grams
+REVISIONS_DB_FILE = "revisions.db"  # Stored contract revisions for incremental re-analysis
+NEAR_DUPLICATE_DB_FILE = "near_duplicates.db"  # Fingerprints of analyzed contracts (batch.py --dedup)
+NEAR_DUPLICATE_MIN_SIMILARITY = 0.8  # Normalized-text similarity needed to reuse an earlier analysis
+
+# Rule-based pre-screen (batch.py --triage): contracts scoring below TRIAGE_LOW_SCORE with no
+# high-rated risk get the local analysis only; everything else still goes to the LLM
+TRIAGE_LOW_SCORE = 35
+TRIAGE_HIGH_SCORE = 70
+
+# Show analysis sections in the UI as the model streams them
+STREAMING_ANALYSIS_ENABLED = True
+
+# Background analysis jobs (survive reruns and tab closes; duplicate uploads share a job)
+JOB_QUEUE_ENABLED = True
+JOB_QUEUE_FILE = "jobs.db"
+JOB_WORKERS = 4
+JOB_POLL_SECONDS = 1
+JOB_HEARTBEAT_SECONDS = 10  # Running jobs without a heartbeat for 3x this long are re-queued
+
+# Long contracts: split on clause boundaries and analyze chunks in parallel
+CHUNKED_ANALYSIS_ENABLED = True
+CHUNK_TOKEN_BUDGET = 1500
+MAX_PARALLEL_REQUESTS = 4
+
+# Prompt compaction: whitespace, running headers and boilerplate clauses are stripped, then the
+# highest-risk clauses are fitted into this many tokens of contract text (tiktoken if installed)
+PROMPT_TOKEN_BUDGET = 2000
+
+# Malformed model replies are repaired and checked against the analysis schema; sections still
+# missing or invalid are asked for again in one follow-up request (False: show defaults instead)
+REGENERATE_MISSING_SECTIONS = True
+
+# Async client (batch jobs): in-flight limit, retries and circuit breaker
+ASYNC_MAX_CONCURRENCY = 8
+API_MAX_RETRIES = 4
+API_TIMEOUT_SECONDS = 90
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET_SECONDS = 60
+
+# Model routing (batch.py --route, MODEL_ROUTING_ENABLED in the app): contracts up to
+# ROUTER_MAX_CHEAP_TOKENS long, scoring below ROUTER_MAX_CHEAP_SCORE locally with no high-rated
+# risk, go to the cheap model; the rest to the strong one
+MODEL_ROUTING_ENABLED = False
+ROUTER_CHEAP_MODEL = "openai/gpt-4o-mini"
+ROUTER_STRONG_MODEL = "openai/gpt-4-turbo"  # batch.py --route without --model; the app uses API_MODEL
+ROUTER_MAX_CHEAP_TOKENS = 1500
+ROUTER_MAX_CHEAP_SCORE = 50
+# Hedged requests: a call unanswered after this many seconds is raced against ROUTER_HEDGE_MODEL
+HEDGE_AFTER_SECONDS = None  # e.g. 20; None disables hedging
+ROUTER_HEDGE_MODEL = "openai/gpt-4o-mini"
+LATENCY_STATS_FILE = "model_latency.json"  # Per-model latency histograms, accumulated over batch runs
+
+# Instrumentation: timings, counters and byte/token sizes per stage (extraction, NLP passes, prompt
+# compaction, LLM calls, PDF rendering). Open the app with ?diagnostics=1 for the diagnostics panel
+METRICS_ENABLED = True
+METRICS_PROM_FILE = "metrics.prom"  # Prometheus text format, rewritten after every app run / batch
+METRICS_LOG_FILE = "metrics.jsonl"  # One JSON line per timed stage; None disables the log
+
+# Provider Batch API (batch.py --provider-batch): requests pooled into batch jobs at batch pricing
+PROVIDER_BATCH_MAX_REQUESTS = 5000  # Lines per batch job; also how many contracts wait in memory
+PROVIDER_BATCH_COLLECT_SECONDS = 10  # Submit once no new request has arrived for this long
+PROVIDER_BATCH_POLL_SECONDS = 60
+PROVIDER_BATCH_COMPLETION_WINDOW = "24h"
+# Re-requesting missing sections under --provider-batch means another batch job (up to the completion
+# window) per round; off by default, so incomplete replies are filled locally and flagged instead
+PROVIDER_BATCH_REGENERATE_SECTIONS = False
+
+# Analysis Cache (identical uploads skip the LLM call)
+ANALYSIS_CACHE_ENABLED = True
+ANALYSIS_CACHE_FILE = "analysis_cache.db"
+ANALYSIS_CACHE_TTL_HOURS = 24 * 7
+ANALYSIS_CACHE_MAX_ENTRIES = 1000
+ANALYSIS_CACHE_MAX_MB = 200
 
 # UI Settings
 PAGE_TITLE = "Contract Analysis & Risk Assessment Bot"
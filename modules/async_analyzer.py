@@ -0,0 +1,271 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import openai
+
+from modules.chunking import split_into_chunks
+from modules.legal_analyzer import LegalAnalyzer, OPENROUTER_BASE_URL, PROMPT_VERSION
+from modules.output_schema import is_complete
+from modules.prompt_compactor import count_tokens
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is refusing calls to the provider"""
+
+
+class CircuitBreaker:
+    """Stops calling a failing provider for reset_timeout seconds.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail fast. Once reset_timeout has passed a single trial call is let
+    through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Free the half-open trial slot of a call that ended without an outcome (cancelled)"""
+        self._trial_in_flight = False
+
+
+def _is_retryable(error):
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after_seconds(error):
+    """Delay requested by the provider via Retry-After / retry-after-ms, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class AsyncLegalAnalyzer(LegalAnalyzer):
+    """asyncio version of LegalAnalyzer for batch jobs and shared connection pools.
+
+    One AsyncOpenAI client (and its HTTP connection pool) serves every call.
+    At most max_concurrency requests are in flight; retryable failures (429,
+    5xx, timeouts, connection errors) are retried with jittered exponential
+    backoff that honours Retry-After, and a circuit breaker fails fast while
+    the provider is down. base_url can point at a local OpenAI-compatible
+    stub server for testing.
+    """
+
+    def __init__(self, api_key=None, provider="openrouter", model="openai/gpt-4-turbo", cache=None,
+                 chunked=True, chunk_tokens=1500, max_workers=4, prompt_tokens=2000, router=None,
+                 regenerate_sections=True, base_url=None, max_concurrency=8, max_retries=4, timeout=90,
+                 backoff_base=1.0, backoff_max=30, breaker=None):
+        super().__init__(api_key=None, provider=provider, model=model, cache=cache, chunked=chunked,
+                         chunk_tokens=chunk_tokens, max_workers=max_workers, prompt_tokens=prompt_tokens,
+                         router=router, regenerate_sections=regenerate_sections)
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.max_concurrency = max_concurrency
+        self.calls = 0  # Requests sent to the provider, retries included
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+        if base_url is None and provider == "openrouter":
+            base_url = OPENROUTER_BASE_URL
+        if self.api_key:
+            # Retries are handled here, not by the SDK, so they share the semaphore and breaker
+            self.client = openai.AsyncOpenAI(api_key=self.api_key, base_url=base_url,
+                                             max_retries=0, timeout=timeout)
+
+    async def analyze_contract(self, text, contract_type="General", nlp_data=None):
+        if not self.client:
+            return self._mock_analysis(text, contract_type, nlp_data)
+
+        model = self._route(text, nlp_data)
+        if self._needs_chunking(text, nlp_data):
+            return await self.analyze_contract_chunked(text, contract_type, nlp_data, model)
+        return await self._analyze_cached(text, contract_type, nlp_data, self._build_context(nlp_data), model=model)
+
+    async def analyze_contract_chunked(self, text, contract_type="General", nlp_data=None, model=None):
+        if not self.client:
+            return self._mock_analysis(text, contract_type, nlp_data)
+
+        model = model or self._route(text, nlp_data)
+        chunks = split_into_chunks(text, (nlp_data or {}).get('clauses'), self.chunk_tokens, count_tokens)
+        context = self._build_context(nlp_data)
+        if len(chunks) <= 1:
+            return await self._analyze_cached(text, contract_type, nlp_data, context, model=model)
+
+        chunk_results = await asyncio.gather(*[
+            self._analyze_cached(chunk, contract_type, nlp_data, self._chunk_context(context, idx, len(chunks)),
+                                 model=model, chunk=True)
+            for idx, chunk in enumerate(chunks, 1)
+        ])
+        return self._merge_chunks(chunk_results, nlp_data)
+
+    async def analyze_many(self, items):
+        """Analyze (text, contract_type, nlp_data) tuples concurrently, results in input order"""
+        return await asyncio.gather(*[self.analyze_contract(*item) for item in items])
+
+    async def _analyze_cached(self, text, contract_type, nlp_data, context, model=None, chunk=False):
+        model = model or self.model
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(text, contract_type, model, PROMPT_VERSION, context)
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                return self.validator.validate(cached)[0]
+
+        try:
+            messages = self._build_messages(self._build_prompt(text, context, nlp_data, fit=not chunk))
+            reply, answered_by = await self._call_hedged(messages, model)
+        except Exception as e:
+            return {"error": str(e), "mock": True, **self._mock_analysis(text, contract_type, nlp_data)}
+
+        result = await self._complete_reply(messages, reply, answered_by, None if chunk else nlp_data)
+        if cache_key is not None and is_complete(result):
+            if answered_by != model:
+                # A hedge answered: file it under that model, not the one this lookup was for
+                cache_key = self.cache.make_key(text, contract_type, answered_by, PROMPT_VERSION, context)
+            await asyncio.to_thread(self.cache.set, cache_key, result)
+        return result
+
+    async def _complete_reply(self, messages, reply, model, nlp_data=None):
+        result, missing = self._validate(reply)
+        if missing and self.regenerate_sections:
+            try:
+                extra = await self._call_model(self._section_messages(messages, reply, missing), model)
+                result, missing = self._add_sections(reply, extra, missing)
+            except Exception as e:
+                print(f"⚠️ Could not re-request {', '.join(missing)}: {e}")
+        return self._finish_reply(result, missing, model, nlp_data)
+
+    async def _call_hedged(self, messages, model):
+        """(result, model that answered); the slower of a hedged pair is cancelled"""
+        hedge = self.router.hedge_for(model) if self.router is not None else None
+        if hedge is None:
+            return await self._call_model(messages, model), model
+        delay, backup_model = hedge
+        primary = asyncio.create_task(self._call_model(messages, model))
+        calls = {primary: model}
+        done, _ = await asyncio.wait(calls, timeout=delay)
+        if not done:
+            self.router.hedges += 1
+            calls[asyncio.create_task(self._call_model(messages, backup_model))] = backup_model
+        errors = []
+        try:
+            while calls:
+                done, _ = await asyncio.wait(calls, return_when=asyncio.FIRST_COMPLETED)
+                for call in done:
+                    answered_by = calls.pop(call)
+                    if call.exception() is None:
+                        if call is not primary:
+                            self.router.hedge_wins += 1
+                        return call.result(), answered_by
+                    errors.append(call.exception())
+        finally:
+            for call in calls:
+                call.cancel()
+            # Let the losers unwind (breaker slot, semaphore) before returning
+            await asyncio.gather(*calls, return_exceptions=True)
+        raise errors[0]
+
+    async def _call_model(self, messages, model=None):
+        model = model or self.model
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Provider circuit breaker is open; skipping request")
+            trial = self.breaker.opened_at is not None  # Half-open: this call is the single trial
+            try:
+                async with self.semaphore:
+                    self.calls += 1
+                    start = time.perf_counter()
+                    response = await asyncio.wait_for(
+                        self.client.chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            response_format={"type": "json_object"},
+                            temperature=0.3
+                        ),
+                        timeout=self.timeout
+                    )
+                    self._record_call(model, time.perf_counter() - start, response)
+                result = self._parse_reply(response.choices[0].message.content)
+            except Exception as e:
+                self._record_error(model)
+                if not _is_retryable(e):
+                    # The provider answered (bad request, bad JSON): not a health problem
+                    self.breaker.record_success()
+                    raise
+                if attempt >= self.max_retries or trial:
+                    # A failed trial re-opens the circuit instead of being retried
+                    self.breaker.record_failure()
+                    raise
+                attempt += 1
+                # Full jitter, but never sooner than the provider asked for
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                retry_after = _retry_after_seconds(e)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.backoff_max))
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                if trial:
+                    self.breaker.release_trial()  # Also when cancelled (CancelledError is not an Exception)
+            self.breaker.record_success()
+            return result
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.close()
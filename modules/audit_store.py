@@ -0,0 +1,234 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from modules.analysis_cache import _ClosingConnection
+
+AUDIT_COLUMNS = ["id", "timestamp", "contract_type", "risk_score", "risk_level", "verdict",
+                 "file_name", "content_hash", "model"]
+
+
+def _epoch(timestamp):
+    """ISO timestamp (or epoch seconds) to epoch seconds"""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    return datetime.fromisoformat(str(timestamp)).timestamp()
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class AuditStore:
+    """Audit trail of analyzed contracts in an indexed SQLite table.
+
+    log() buffers entries and writes them in one transaction once batch_size
+    entries have accumulated or flush_seconds after the first one, whichever
+    comes first (and at interpreter exit).
+    Timestamp, contract type, verdict, risk level, risk score and content
+    hash are indexed, and query() pages by keyset (timestamp, id) rather
+    than OFFSET, so any page of a multi-million row trail is an index range
+    scan.
+    """
+
+    def __init__(self, path, batch_size=100, flush_seconds=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS audit_log (
+                    id INTEGER PRIMARY KEY,
+                    ts REAL NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    contract_type TEXT,
+                    risk_score REAL,
+                    risk_level TEXT,
+                    verdict TEXT,
+                    file_name TEXT,
+                    content_hash TEXT,
+                    model TEXT,
+                    extra TEXT,
+                    source_key TEXT UNIQUE
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit_log(ts, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_type_ts ON audit_log(contract_type, ts, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_verdict_ts ON audit_log(verdict, ts, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_level_ts ON audit_log(risk_level, ts, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_score ON audit_log(risk_score)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_hash ON audit_log(content_hash)")
+        atexit.register(self.flush)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return _ClosingConnection(conn)
+
+    @staticmethod
+    def entry_from_results(results, file_name="Unknown", content_hash=None, model=None):
+        """Audit entry for one analysis result"""
+        risk = results.get('risk_assessment', {})
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "contract_type": results.get('contract_info', {}).get('type', 'Unknown'),
+            "risk_score": risk.get('composite_score'),
+            "risk_level": risk.get('risk_level'),
+            "verdict": results.get('overall_recommendation', {}).get('verdict', 'Unknown'),
+            "file_name": file_name,
+            "content_hash": content_hash,
+            "model": model,
+        }
+
+    @staticmethod
+    def _row(entry, source_key=None):
+        known = {"timestamp", "contract_type", "risk_score", "risk_level", "verdict", "file_name", "content_hash", "model"}
+        timestamp = entry.get("timestamp") or datetime.now().isoformat()
+        extra = {k: v for k, v in entry.items() if k not in known}
+        score = _number(entry.get("risk_score"))
+        risk_level = entry.get("risk_level")
+        if not risk_level and score is not None:
+            # Legacy entries only carry the score
+            risk_level = "High" if score >= 70 else ("Medium" if score >= 30 else "Low")
+        return (
+            _epoch(timestamp), str(timestamp), entry.get("contract_type"), score,
+            risk_level, entry.get("verdict"), entry.get("file_name"), entry.get("content_hash"),
+            entry.get("model"), json.dumps(extra, ensure_ascii=False) if extra else None, source_key
+        )
+
+    def log(self, entry):
+        """Buffer one audit entry; written with the next batch"""
+        with self._lock:
+            self._pending.append(self._row(entry))
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            due = len(self._pending) >= self.batch_size
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if rows:
+            self._insert(rows)
+
+    def _insert(self, rows):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = conn.executemany(
+                    "INSERT OR IGNORE INTO audit_log (ts, timestamp, contract_type, risk_score, risk_level, verdict, "
+                    "file_name, content_hash, model, extra, source_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def import_jsonl(self, path, batch_size=10000):
+        """Import a legacy audit_trail.json (one JSON object per line).
+
+        Each line is keyed by its hash, so importing the same file again adds
+        nothing. Returns the number of new entries.
+        """
+        imported = 0
+        rows = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    rows.append(self._row(entry, source_key=hashlib.sha1(line.encode("utf-8")).hexdigest()))
+                except (ValueError, TypeError, AttributeError):
+                    continue  # Partial or corrupt line
+                if len(rows) >= batch_size:
+                    imported += self._insert(rows)
+                    rows = []
+        if rows:
+            imported += self._insert(rows)
+        return imported
+
+    @staticmethod
+    def _filters(contract_type=None, verdict=None, risk_level=None, min_score=None, max_score=None,
+                 since=None, until=None, content_hash=None):
+        clauses, params = [], []
+        for column, value in (("contract_type", contract_type), ("verdict", verdict),
+                              ("risk_level", risk_level), ("content_hash", content_hash)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if min_score is not None:
+            clauses.append("risk_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append("risk_score <= ?")
+            params.append(max_score)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(_epoch(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(_epoch(until))
+        return clauses, params
+
+    def query(self, limit=50, cursor=None, **filters):
+        """One page of entries, newest first, matching the given filters.
+
+        Filters: contract_type, verdict, risk_level, min_score, max_score,
+        since, until (ISO strings or epoch seconds) and content_hash.
+        Returns (entries, next_cursor); pass next_cursor back for the
+        following page, it is None on the last page.
+        """
+        self.flush()
+        clauses, params = self._filters(**filters)
+        if cursor is not None:
+            clauses.append("(ts, id) < (?, ?)")
+            params.extend(cursor)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(AUDIT_COLUMNS)}, ts FROM audit_log {where} ORDER BY ts DESC, id DESC LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+        entries = [dict(zip(AUDIT_COLUMNS, row[:-1])) for row in rows[:limit]]
+        next_cursor = (rows[limit - 1][-1], rows[limit - 1][0]) if len(rows) > limit else None
+        return entries, next_cursor
+
+    def count(self, **filters):
+        self.flush()
+        clauses, params = self._filters(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM audit_log {where}", params).fetchone()[0]
+
+    def distinct(self, column):
+        """Values present in an indexed column, for filter drop-downs"""
+        if column not in ("contract_type", "verdict", "risk_level"):
+            raise ValueError(f"Not a filterable column: {column}")
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                f"SELECT DISTINCT {column} FROM audit_log WHERE {column} IS NOT NULL ORDER BY {column}"
+            ).fetchall()]
@@ -0,0 +1,197 @@
+import re
+
+# Rough size of one token in characters for English legal text
+CHARS_PER_TOKEN = 4
+
+RISK_LEVEL_ORDER = {"low": 0, "medium": 1, "medium-high": 2, "high": 3, "critical": 4}
+COMPLIANCE_STATUS_ORDER = {"compliant": 0, "unclear": 1, "warning": 2, "non-compliant": 3}
+VERDICT_ORDER = {"sign as-is": 0, "negotiate": 1, "seek legal counsel": 2, "reject": 3}
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_into_chunks(text, clauses=None, max_tokens=1500, count_tokens=estimate_tokens):
+    """Split text on clause boundaries and pack the pieces into token-sized chunks.
+
+    clauses is NLPEngine.extract_clauses output; its "start" offsets mark the
+    boundaries. Without clauses, blank lines are used instead. A single piece
+    larger than the budget is cut on line breaks (or hard-cut as a last resort).
+    count_tokens measures the pieces; pass the tokenizer the prompt is
+    budgeted with (Hindi and dense text run well over one token per
+    CHARS_PER_TOKEN characters).
+    """
+    if clauses:
+        boundaries = sorted({0} | {c["start"] for c in clauses if 0 < c.get("start", 0) < len(text)})
+    else:
+        boundaries = [0] + [m.end() for m in re.finditer(r"\n\s*\n", text)]
+    boundaries.append(len(text))
+
+    pieces = []
+    for start, end in zip(boundaries, boundaries[1:]):
+        pieces.extend(_split_oversized(text[start:end], max_tokens, count_tokens))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece, tokens in pieces:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(current))
+            current = []
+            current_tokens = 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _split_oversized(piece, max_tokens, count_tokens):
+    """(text, tokens) parts of piece, each within max_tokens"""
+    tokens = count_tokens(piece)
+    if tokens <= max_tokens:
+        return [(piece, tokens)]
+    parts = []
+    current = ""
+    current_tokens = 0
+    for line in piece.splitlines(keepends=True):
+        line_tokens = count_tokens(line)
+        while line_tokens > max_tokens:
+            if current:
+                parts.append((current, current_tokens))
+                current = ""
+                current_tokens = 0
+            cut = max(1, len(line) * max_tokens // line_tokens)
+            parts.append((line[:cut], count_tokens(line[:cut])))
+            line = line[cut:]
+            line_tokens = count_tokens(line)
+        if current and current_tokens + line_tokens > max_tokens:
+            parts.append((current, current_tokens))
+            current = ""
+            current_tokens = 0
+        current += line
+        current_tokens += line_tokens
+    if current:
+        parts.append((current, current_tokens))
+    return parts
+
+
+def _key(*values):
+    return tuple(str(v or "").strip().lower() for v in values)
+
+
+def _dedupe(items, key_fn):
+    seen = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        seen.setdefault(key_fn(item), item)
+    return list(seen.values())
+
+
+def merge_analyses(results):
+    """Merge per-chunk analysis results into one result in the standard schema"""
+    results = [r for r in results if r and "error" not in r]
+    if not results:
+        return None
+    if len(results) == 1:
+        return results[0]
+
+    languages = {r.get("language_detected") for r in results if r.get("language_detected")}
+    merged = {"language_detected": languages.pop() if len(languages) == 1 else "Mixed"}
+
+    # Contract info: first chunk wins, later chunks fill gaps
+    contract_info = {}
+    key_amounts = []
+    for r in results:
+        for field, value in (r.get("contract_info") or {}).items():
+            if field == "key_amounts":
+                key_amounts.extend(v for v in value or [] if v not in key_amounts)
+            elif value and not contract_info.get(field):
+                contract_info[field] = value
+    contract_info["key_amounts"] = key_amounts
+    merged["contract_info"] = contract_info
+
+    # Risk: the riskiest chunk sets the score (defaulted scores only if no chunk has a real one); findings are unioned
+    assessments = [r.get("risk_assessment") or {} for r in results]
+    scored = [r.get("risk_assessment") or {} for r in results
+              if "risk_assessment" not in (r.get("incomplete_sections") or [])]
+    worst = max(scored or assessments, key=lambda a: _as_number(a.get("composite_score")))
+    summaries = []
+    for a in sorted(assessments, key=lambda a: -_as_number(a.get("composite_score"))):
+        if a.get("summary") and a["summary"] not in summaries:
+            summaries.append(a["summary"])
+    key_risks = _dedupe(
+        [risk for a in assessments for risk in a.get("key_risks") or []],
+        lambda r: _key(r.get("clause"), r.get("category"))
+    )
+    key_risks.sort(key=lambda r: -RISK_LEVEL_ORDER.get(str(r.get("priority", r.get("risk_level", ""))).lower(), 0))
+    merged["risk_assessment"] = {
+        "composite_score": _as_number(worst.get("composite_score")),
+        "risk_level": worst.get("risk_level", "Medium"),
+        "summary": " ".join(summaries[:3]),
+        "key_risks": key_risks,
+    }
+
+    merged["clause_breakdown"] = _dedupe(
+        [c for r in results for c in r.get("clause_breakdown") or []],
+        lambda c: _key(c.get("clause_number"), c.get("clause_name"))
+    )
+
+    # Compliance: keep the most severe status per law/section
+    compliance = {}
+    for r in results:
+        for item in r.get("compliance_check") or []:
+            if not isinstance(item, dict):
+                continue
+            key = _key(item.get("law"), item.get("section"))
+            current = compliance.get(key)
+            if current is None or _severity(item, COMPLIANCE_STATUS_ORDER, "status") > _severity(current, COMPLIANCE_STATUS_ORDER, "status"):
+                compliance[key] = item
+    merged["compliance_check"] = list(compliance.values())
+
+    merged["unfavorable_terms"] = _dedupe(
+        [t for r in results for t in r.get("unfavorable_terms") or []],
+        lambda t: _key(t.get("term"))
+    )
+    missing = []
+    for r in results:
+        for item in r.get("missing_protections") or []:
+            if _key(item) not in {_key(m) for m in missing}:
+                missing.append(item)
+    merged["missing_protections"] = missing
+
+    recommendations = [r.get("overall_recommendation") or {} for r in results]
+    strictest = max(recommendations, key=lambda rec: _severity(rec, VERDICT_ORDER, "verdict"))
+    priorities = []
+    for rec in sorted(recommendations, key=lambda rec: -_severity(rec, VERDICT_ORDER, "verdict")):
+        for item in rec.get("priority_negotiations") or []:
+            if item not in priorities:
+                priorities.append(item)
+    merged["overall_recommendation"] = {
+        "verdict": strictest.get("verdict", "Negotiate"),
+        "reasoning": strictest.get("reasoning", ""),
+        "priority_negotiations": priorities[:3],
+    }
+
+    # A section defaulted in any part leaves the merged result incomplete too
+    incomplete = []
+    for r in results:
+        for section in r.get("incomplete_sections") or []:
+            if section not in incomplete:
+                incomplete.append(section)
+    if incomplete:
+        merged["incomplete_sections"] = incomplete
+    return merged
+
+
+def _severity(item, order, field):
+    return order.get(str(item.get(field, "")).strip().lower(), -1)
+
+
+def _as_number(value):
+    try:
+        return float(value) if "." in str(value) else int(value)
+    except (TypeError, ValueError):
+        return 0
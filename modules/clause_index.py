@@ -0,0 +1,336 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from modules.analysis_cache import _ClosingConnection
+from modules.minhash import MinHasher
+from modules.revisions import _clause_title, _refers_to, fingerprint_clauses
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: clauses with Jaccard similarity above ~0.5 collide in some band
+INITIAL_CAPACITY = 1024
+TAIL_LIMIT = 50000  # Rows appended since the last sort, scanned linearly until the next sort
+MAX_TEXT_CHARS = 2000
+
+
+def leaf_clauses(clauses):
+    """Clauses without sub-clauses: a parent's text repeats all of its children"""
+    parents = set()
+    for clause in clauses:
+        number = str(clause.get("number", "")).rstrip(".")
+        if "." in number:
+            parents.add(number.rsplit(".", 1)[0])
+    return [c for c in clauses if str(c.get("number", "")).rstrip(".") not in parents]
+
+
+def result_quality(result):
+    """2 for a complete LLM analysis, 1 for a rule-based (triage) or partial one"""
+    if result.get("source") == "rule_based" or result.get("incomplete_sections") or result.get("chunk_errors"):
+        return 1
+    return 2
+
+
+def clause_findings(result, clause):
+    """What an analysis said about one clause: explanation, red flags and matching key risks"""
+    fingerprint = fingerprint_clauses([clause])
+    number = str(clause.get("number", "")).rstrip(".")
+    findings = {"risks": []}
+    for item in result.get("clause_breakdown", []) or []:
+        if str(item.get("clause_number", "")).rstrip(".") == number:
+            findings["explanation"] = item.get("simplified_explanation")
+            findings["red_flags"] = item.get("red_flags", [])
+            break
+    for risk in (result.get("risk_assessment", {}) or {}).get("key_risks", []) or []:
+        if isinstance(risk, dict) and _refers_to(risk.get("clause"), fingerprint):
+            findings["risks"].append({key: risk.get(key) for key in ("category", "risk_level", "suggestion")})
+    return findings
+
+
+class ClauseIndex:
+    """Local near-duplicate index over clauses from past analyses.
+
+    Each clause is reduced to a MinHash signature (modules.minhash) and
+    split into LSH bands. Signatures and band keys live in memory-mapped
+    arrays under directory; per band, a sorted copy of the keys answers a
+    lookup with np.searchsorted, so a query only compares against clauses
+    that share a band. Rows appended since the last sort stay in a short
+    unsorted tail that is scanned linearly until it is merged.
+
+    The SQLite table (clause metadata, findings and the signature bytes) is
+    the source of truth and is safe for several processes to append to;
+    the arrays are rebuilt from it on demand and each process catches up
+    with rows added elsewhere on its next query.
+    """
+
+    def __init__(self, directory, num_perm=NUM_PERM, bands=BANDS, seed=1):
+        self.hasher = MinHasher(num_perm, bands, seed)
+        self.directory = directory
+        self.num_perm = num_perm
+        self.bands = bands
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "clauses.db")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS clauses (
+                    id INTEGER PRIMARY KEY,
+                    ts REAL NOT NULL,
+                    content_hash TEXT,
+                    file_name TEXT,
+                    contract_type TEXT,
+                    clause_number TEXT,
+                    title TEXT,
+                    text TEXT,
+                    findings TEXT,
+                    signature BLOB NOT NULL,
+                    quality INTEGER
+                )
+            """)
+            if "quality" not in {row[1] for row in conn.execute("PRAGMA table_info(clauses)")}:
+                conn.execute("ALTER TABLE clauses ADD COLUMN quality INTEGER")  # Indexes from before result_quality
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_clauses_hash ON clauses(content_hash)")
+        self._load()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return _ClosingConnection(conn)
+
+    def _array_path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _open(self, name, dtype, shape):
+        path = self._array_path(name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if not os.path.exists(path) or os.path.getsize(path) < size:
+            with open(path, "ab") as f:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _load(self):
+        meta = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if (meta.get("num_perm"), meta.get("bands")) != (self.num_perm, self.bands):
+                raise ValueError(f"Clause index in {self.directory} was built with num_perm={meta.get('num_perm')}, "
+                                 f"bands={meta.get('bands')}")
+        arrays_exist = all(os.path.exists(self._array_path(n)) for n in ("signatures.u32", "band_keys.u64"))
+        self.capacity = max(INITIAL_CAPACITY, meta.get("capacity", 0))
+        # Without the array files the rows are re-read from the database by sync()
+        self.count = meta.get("count", 0) if arrays_exist else 0
+        self.sorted_count = min(self.count, meta.get("sorted_count", 0))
+        self._sig = self._open("signatures.u32", np.uint32, (self.capacity, self.num_perm))
+        self._keys = self._open("band_keys.u64", np.uint64, (self.capacity, self.bands))
+        self._open_sorted()
+
+    def _sorted_names(self, n):
+        return f"sorted_keys.{n}.u64", f"sorted_ids.{n}.u32"
+
+    def _open_sorted(self):
+        keys_name, ids_name = self._sorted_names(self.sorted_count)
+        shape = (self.bands, self.sorted_count)
+        if self.sorted_count and os.path.exists(self._array_path(keys_name)) and os.path.exists(self._array_path(ids_name)):
+            self._sorted_keys = np.memmap(self._array_path(keys_name), dtype=np.uint64, mode="r", shape=shape)
+            self._sorted_ids = np.memmap(self._array_path(ids_name), dtype=np.uint32, mode="r", shape=shape)
+        else:
+            self.sorted_count = 0
+            self._sorted_keys = np.zeros((self.bands, 0), dtype=np.uint64)
+            self._sorted_ids = np.zeros((self.bands, 0), dtype=np.uint32)
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        self._sig.flush()
+        self._keys.flush()
+        self._sig = self._keys = None  # Release the maps before the files are extended
+        self.capacity = capacity
+        self._sig = self._open("signatures.u32", np.uint32, (capacity, self.num_perm))
+        self._keys = self._open("band_keys.u64", np.uint64, (capacity, self.bands))
+
+    def _save_meta(self):
+        meta = {"count": self.count, "sorted_count": self.sorted_count, "capacity": self.capacity,
+                "num_perm": self.num_perm, "bands": self.bands}
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _rebuild_sorted(self):
+        """Sort every band's keys into new files named by row count.
+
+        Readers that mapped an older version keep it; meta.json only ever
+        names a complete pair of files.
+        """
+        n = self.count
+        keys = np.asarray(self._keys[:n]).T
+        order = np.argsort(keys, axis=1, kind="stable")
+        keys_name, ids_name = self._sorted_names(n)
+        for name, array in ((keys_name, np.take_along_axis(keys, order, axis=1)), (ids_name, order.astype(np.uint32))):
+            tmp_path = f"{self._array_path(name)}.{os.getpid()}.tmp"
+            array.tofile(tmp_path)
+            os.replace(tmp_path, self._array_path(name))
+        self.sorted_count = n
+        self._open_sorted()
+        for name in os.listdir(self.directory):
+            if name.startswith("sorted_") and name not in (keys_name, ids_name) and not name.endswith(".tmp"):
+                try:
+                    os.remove(self._array_path(name))
+                except OSError:
+                    pass  # Still mapped by another process (Windows)
+
+    def sync(self):
+        """Copy rows added to the database (by any process) into the arrays"""
+        with self._connect() as conn:
+            last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM clauses").fetchone()[0]
+            if last <= self.count:
+                return 0
+            rows = conn.execute("SELECT id, signature FROM clauses WHERE id > ? ORDER BY id", (self.count,)).fetchall()
+        added = 0
+        with self._lock:
+            rows = [row for row in rows if row[0] > self.count]
+            if not rows:
+                return 0
+            ids = np.fromiter((row[0] - 1 for row in rows), dtype=np.int64, count=len(rows))
+            sigs = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.uint32).reshape(len(rows), self.num_perm)
+            self._grow(int(ids[-1]) + 1)
+            self._sig[ids] = sigs
+            self._keys[ids] = self.hasher.band_keys(sigs)
+            self.count = int(ids[-1]) + 1
+            added = len(rows)
+            if self.count - self.sorted_count > TAIL_LIMIT:
+                self._rebuild_sorted()
+            self._save_meta()
+        return added
+
+    def add_clauses(self, items, quality=None):
+        """Index (clause, findings, content_hash, file_name, contract_type) tuples; returns how many"""
+        items = [item for item in items if item[0].get("full_text", item[0].get("text", "")).strip()]
+        texts = [c.get("full_text", c.get("text", ""))[:MAX_TEXT_CHARS] for c, *_ in items]
+        sigs, valid = self.hasher.signatures(texts)
+        now = time.time()
+        rows = [
+            (now, content_hash, file_name, contract_type, str(clause.get("number", "")), _clause_title(clause),
+             text, json.dumps(findings or {}, ensure_ascii=False), sig.tobytes(), quality)
+            for (clause, findings, content_hash, file_name, contract_type), text, sig, ok in zip(items, texts, sigs, valid)
+            if ok
+        ]
+        if rows:
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(
+                        "INSERT INTO clauses (ts, content_hash, file_name, contract_type, clause_number, title, text, "
+                        "findings, signature, quality) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            self.sync()
+        return len(rows)
+
+    def add_analysis(self, result, clauses, content_hash, file_name=None):
+        """Index the leaf clauses of one analyzed contract with what the analysis said about each.
+
+        Demo results are not indexed. A contract already indexed under
+        content_hash only gets its findings replaced by a better result (a
+        complete LLM analysis after a rule-based or partial one); the clause
+        rows and their signatures stay as they are.
+        """
+        if result.get("mock") or "error" in result:
+            return 0
+        quality = result_quality(result)
+        contract_type = (result.get("contract_info", {}) or {}).get("type")
+        leaves = leaf_clauses(clauses)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                indexed = conn.execute("SELECT MIN(COALESCE(quality, 0)) FROM clauses WHERE content_hash = ?",
+                                       (content_hash,)).fetchone()[0]
+                if indexed is not None:
+                    updated = 0
+                    if indexed < quality:
+                        for clause in leaves:
+                            updated += conn.execute(
+                                "UPDATE clauses SET findings = ?, contract_type = ?, quality = ?, ts = ? "
+                                "WHERE content_hash = ? AND clause_number = ?",
+                                (json.dumps(clause_findings(result, clause), ensure_ascii=False), contract_type,
+                                 quality, time.time(), content_hash, str(clause.get("number", "")))
+                            ).rowcount
+                    conn.execute("COMMIT")
+                    return updated
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.add_clauses([
+            (clause, clause_findings(result, clause), content_hash, file_name, contract_type)
+            for clause in leaves
+        ], quality=quality)
+
+    def _candidates(self, keys):
+        found = []
+        for band in range(self.bands):
+            sorted_keys = self._sorted_keys[band]
+            lo = np.searchsorted(sorted_keys, keys[band], side="left")
+            hi = np.searchsorted(sorted_keys, keys[band], side="right")
+            if hi > lo:
+                found.append(np.asarray(self._sorted_ids[band, lo:hi], dtype=np.int64))
+        if self.count > self.sorted_count:
+            tail = np.flatnonzero((self._keys[self.sorted_count:self.count] == keys).any(axis=1))
+            found.append(tail + self.sorted_count)
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def query(self, text, k=5, min_similarity=0.0, exclude_hash=None):
+        """Top-k most similar indexed clauses: dicts with the stored metadata, findings and similarity"""
+        self.sync()
+        sigs, valid = self.hasher.signatures([text[:MAX_TEXT_CHARS]])
+        if not valid[0] or not self.count:
+            return []
+        query_sig = sigs[0]
+        candidates = self._candidates(self.hasher.band_keys(sigs)[0])
+        if not len(candidates):
+            return []
+        similarity = self.hasher.similarity(query_sig, self._sig[candidates])
+        keep = similarity >= min_similarity
+        candidates, similarity = candidates[keep], similarity[keep]
+        # Over-fetch so clauses from the excluded contract can be dropped
+        limit = min(len(candidates), k + 20 if exclude_hash else k)
+        top = np.argpartition(-similarity, limit - 1)[:limit] if limit < len(candidates) else np.arange(len(candidates))
+        top = top[np.argsort(-similarity[top], kind="stable")]
+
+        ids = [int(candidates[i]) + 1 for i in top]
+        with self._connect() as conn:
+            placeholders = ",".join("?" * len(ids))
+            rows = conn.execute(
+                f"SELECT id, ts, content_hash, file_name, contract_type, clause_number, title, text, findings "
+                f"FROM clauses WHERE id IN ({placeholders})", ids).fetchall()
+        by_id = {row[0]: row for row in rows}
+        matches = []
+        for i, row_id in zip(top, ids):
+            row = by_id.get(row_id)
+            if row is None or (exclude_hash and row[2] == exclude_hash):
+                continue
+            matches.append({
+                "similarity": round(float(similarity[i]), 3), "timestamp": row[1], "content_hash": row[2],
+                "file_name": row[3], "contract_type": row[4], "clause_number": row[5], "title": row[6],
+                "text": row[7], "findings": json.loads(row[8] or "{}"),
+            })
+            if len(matches) == k:
+                break
+        return matches
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,186 @@
+from bisect import bisect_right
+
+
+class ClauseSegmenter:
+    """Line-oriented, single-pass clause segmentation.
+
+    Builds a clause tree (1 -> 1.1 -> 1.1.a) from numbered lines and
+    lettered sub-items. Every line is inspected once with plain string
+    operations, so run time is linear in the document length whatever
+    the input looks like (long uppercase runs, OCR noise, huge numbers).
+    """
+
+    def __init__(self, max_header_chars=80):
+        self.max_header_chars = max_header_chars
+
+    @staticmethod
+    def _lines(text):
+        """Yield (offset, line) without the trailing newline"""
+        offset = 0
+        for line in text.splitlines(keepends=True):
+            yield offset, line.rstrip("\r\n")
+            offset += len(line)
+
+    @staticmethod
+    def _parse_number(line):
+        """Parse a leading clause number such as "1.", "1.1" or "1.1.2.".
+
+        Returns (number, body_offset), or None when the line does not start
+        with a number. The first component must be followed by a dot, as in
+        "1." or "1.1". body_offset is None when the number is not followed by
+        whitespace and an uppercase or Devanagari letter (e.g. '5.2 "Confidential...').
+        """
+        n = len(line)
+        i = 0
+        while i < n and line[i].isdigit():
+            i += 1
+        if i == 0 or i > 3 or i >= n or line[i] != ".":
+            return None
+        i += 1
+        while i < n and line[i].isdigit():
+            j = i
+            while j < n and line[j].isdigit():
+                j += 1
+            i = j
+            if i < n and line[i] == ".":
+                i += 1
+            else:
+                break
+        number_end = i
+        while i < n and line[i] in " \t":
+            i += 1
+        if i == number_end or i >= n or not ("A" <= line[i] <= "Z" or "\u0900" <= line[i] <= "\u097f"):
+            return line[:number_end], None
+        return line[:number_end], i
+
+    @staticmethod
+    def _parse_item(line):
+        """Parse a lettered sub-item: "(a)", "a)" or "(iv)". Returns (label, body_offset) or None"""
+        i = 1 if line.startswith("(") else 0
+        j = i
+        while j < len(line) and j - i < 4 and "a" <= line[j] <= "z":
+            j += 1
+        if j == i or j >= len(line) or line[j] != ")":
+            return None
+        if i == 0 and j - i > 1:
+            return None  # "word)" is prose, only "a)" is an item without the opening bracket
+        body = j + 1
+        while body < len(line) and line[body] in " \t":
+            body += 1
+        return line[i:j], body
+
+    def _parse_header(self, line):
+        """Parse an "UPPERCASE HEADER: text" line. Returns (name, body_offset) or None"""
+        colon = line.find(":", 0, self.max_header_chars + 1)
+        if colon <= 0:
+            return None
+        name = line[:colon].strip()
+        if not name or not ("A" <= name[0] <= "Z"):
+            return None
+        for char in name:
+            if not ("A" <= char <= "Z" or char in " \t"):
+                return None
+        body = colon + 1
+        while body < len(line) and line[body] in " \t":
+            body += 1
+        return name, body
+
+    def segment(self, text, page_offsets=None):
+        """Return the clause tree as a list of root nodes.
+
+        Each node: number, level, start, end (character offsets), page,
+        text (the clause's own lines) and children. Numbered clauses are
+        used when present, else "HEADER:" sections.
+        """
+        roots = self._segment_numbered(text)
+        if not roots:
+            roots = self._segment_headers(text)
+        if page_offsets:
+            for node in self.walk(roots):
+                node["page"] = max(1, bisect_right(page_offsets, node["start"]))
+        return roots
+
+    @staticmethod
+    def _new_node(number, level, start, end, body):
+        return {"number": number, "level": level, "start": start, "end": end,
+                "page": 1, "lines": [body], "children": []}
+
+    def _segment_numbered(self, text):
+        roots = []
+        stack = []  # open numbered clauses, outermost first
+        clause = None  # clause that continuation lines belong to
+        item = None  # lettered sub-item that continuation lines belong to
+        for offset, raw in self._lines(text):
+            line = raw.lstrip()
+            start = offset + len(raw) - len(line)
+            if not line:
+                clause = item = None  # a blank line ends the running clause text
+                continue
+
+            parsed = self._parse_number(line)
+            if parsed and parsed[1] is None:
+                clause = item = None  # numbered line that is not a clause heading still ends the text
+                continue
+            if parsed:
+                number, body = parsed
+                level = number.rstrip(".").count(".") + 1
+                while stack and stack[-1]["level"] >= level:
+                    stack.pop()
+                node = self._new_node(number, level, start, offset + len(raw), line[body:])
+                (stack[-1]["children"] if stack else roots).append(node)
+                stack.append(node)
+                clause, item = node, None
+                continue
+
+            parsed = self._parse_item(line) if stack else None
+            if parsed:
+                label, body = parsed
+                parent = stack[-1]
+                item = self._new_node(f"{parent['number'].rstrip('.')}.{label}", parent["level"] + 1,
+                                      start, offset + len(raw), line[body:])
+                parent["children"].append(item)
+                # Sub-items stay part of the parent clause's own text as well
+                parent["lines"].append(raw)
+                parent["end"] = offset + len(raw)
+                clause = parent
+                continue
+
+            for node in (item, clause):
+                if node is not None:
+                    node["lines"].append(raw)
+                    node["end"] = offset + len(raw)
+
+        for node in self.walk(roots):
+            node["text"] = "\n".join(node.pop("lines"))
+        return roots
+
+    def _segment_headers(self, text):
+        roots = []
+        current = None
+        for offset, raw in self._lines(text):
+            line = raw.strip()
+            if not line:
+                current = None
+                continue
+            header = self._parse_header(line)
+            if header:
+                name, body = header
+                indent = len(raw) - len(raw.lstrip())
+                current = self._new_node(str(len(roots) + 1), 1, offset + indent, offset + len(raw), line[body:])
+                current["name"] = name
+                roots.append(current)
+            elif current is not None:
+                current["lines"].append(line)
+                current["end"] = offset + len(raw)
+        for node in roots:
+            node["text"] = "\n".join(node.pop("lines"))
+        return roots
+
+    @staticmethod
+    def walk(nodes):
+        """Depth-first iteration over a clause tree"""
+        stack = list(reversed(nodes))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node["children"]))
@@ -0,0 +1,242 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.analysis_cache import AnalysisCache, _ClosingConnection
+from modules.legal_analyzer import PROMPT_VERSION
+from modules.metrics import metrics, profiled
+from modules.output_schema import is_complete
+from modules.revisions import IncrementalAnalyzer
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """Background analysis jobs backed by a SQLite job table.
+
+    submit() stores the request and hands it to a worker thread, so the LLM
+    call keeps running when the Streamlit script is rerun or the browser tab
+    is closed; the UI polls get() with the returned job id. Job ids are
+    content hashes: submitting the same contract again attaches to the
+    queued, running or finished job instead of starting a second LLM call.
+    Several queues (sessions with other keys, other processes) can share the
+    table: each running job records its owner, which renews a heartbeat, and
+    only jobs whose owner stopped heartbeating are picked up again.
+    """
+
+    def __init__(self, path, analyzer, revision_store=None, workers=2, stream=True, heartbeat_seconds=10):
+        self.path = path
+        self.analyzer = analyzer
+        self.revision_store = revision_store
+        self.stream = stream
+        self.owner = uuid.uuid4().hex
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = heartbeat_seconds * 3  # A running job is abandoned after three missed heartbeats
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-job")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    partial TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT,
+                    heartbeat REAL,
+                    profile TEXT
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL"), ("profile", "TEXT")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")  # Tables from older versions
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, model)")
+        self._stopped = threading.Event()
+        self._recover(queued=True)
+        self._heartbeat = threading.Thread(target=self._beat, name="analysis-job-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return _ClosingConnection(conn)
+
+    def job_id(self, text, contract_type="General", nlp_data=None, document_id=None):
+        """Content hash of a request: identical requests share one job"""
+        context = self.analyzer._build_context(nlp_data)
+        if document_id:
+            context += f"\nrevision-of:{document_id}"
+        if not self.analyzer.client:
+            context += "\ndemo"  # Sessions with an API key must not attach to demo results
+        return AnalysisCache.make_key(text, contract_type, self.analyzer.model, PROMPT_VERSION, context)
+
+    def submit(self, text, contract_type="General", nlp_data=None, document_id=None, profile=None):
+        """Queue an analysis and return its job id (an existing job's id for duplicates).
+
+        profile ("cprofile" / "pyinstrument") profiles the job's analysis; the
+        report is returned by get() with the finished job.
+        """
+        job_id = self.job_id(text, contract_type, nlp_data, document_id)
+        request = json.dumps({"text": text, "contract_type": contract_type, "nlp_data": nlp_data,
+                              "document_id": document_id, "profile": profile}, ensure_ascii=False)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None and row[0] != FAILED:
+                conn.execute("COMMIT")
+                return job_id  # Attach to the existing job
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, model, status, request, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, self.analyzer.model, QUEUED, request, time.time())
+            )
+            conn.execute("COMMIT")
+        self.pool.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id):
+        """Job status dict (status, partial, result, error, timings, profile), or None for an unknown id"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, partial, result, error, created_at, started_at, finished_at, profile FROM jobs "
+                "WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": job_id,
+            "status": row[0],
+            "partial": json.loads(row[1]) if row[1] else {},
+            "result": json.loads(row[2]) if row[2] else None,
+            "error": row[3],
+            "created_at": row[4],
+            "started_at": row[5],
+            "finished_at": row[6],
+            "profile": json.loads(row[7]) if row[7] else None,
+        }
+
+    def stats(self):
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def purge(self, older_than_seconds):
+        """Delete finished and failed jobs older than the given age"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                         (DONE, FAILED, time.time() - older_than_seconds))
+
+    def _recover(self, queued=False):
+        """Run again the jobs whose owner stopped heartbeating (and, with queued, jobs still waiting)"""
+        if not self.analyzer.client:
+            return  # Demo sessions leave other sessions' jobs alone
+        cutoff = time.time() - self.stale_seconds
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stale = [row[0] for row in conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND model = ? AND COALESCE(heartbeat, started_at, 0) < ?",
+                (RUNNING, self.analyzer.model, cutoff)
+            ).fetchall()]
+            conn.executemany("UPDATE jobs SET status = ?, partial = NULL, owner = NULL WHERE id = ?",
+                             [(QUEUED, job_id) for job_id in stale])
+            pending = stale
+            if queued:
+                pending = [row[0] for row in conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND model = ? ORDER BY created_at",
+                    (QUEUED, self.analyzer.model)
+                ).fetchall()]
+            conn.execute("COMMIT")
+        if stale:
+            print(f"Re-queued {len(stale)} abandoned analysis jobs")
+        for job_id in pending:
+            self.pool.submit(self._run, job_id)
+
+    def _beat(self):
+        """Renew this queue's claim on its running jobs and pick up abandoned ones"""
+        while not self._stopped.wait(self.heartbeat_seconds):
+            try:
+                with self._connect() as conn:
+                    conn.execute("UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = ?",
+                                 (time.time(), self.owner, RUNNING))
+                self._recover()
+            except (sqlite3.Error, RuntimeError) as e:  # RuntimeError: pool already shut down
+                print(f"⚠️ Job heartbeat failed: {e}")
+
+    def _claim(self, job_id):
+        """Move a queued job to running and return its request; None when another worker already took it"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, owner = ?, heartbeat = ? WHERE id = ? AND status = ?",
+                (RUNNING, now, self.owner, now, job_id, QUEUED)
+            )
+            if cursor.rowcount == 0:
+                return None
+            return json.loads(conn.execute("SELECT request FROM jobs WHERE id = ?", (job_id,)).fetchone()[0])
+
+    def _run(self, job_id):
+        request = self._claim(job_id)
+        if request is None:
+            return
+        profile = None
+        try:
+            # Timed and profiled here, in the worker thread the analysis runs on
+            with profiled(request.get("profile")) as profile, metrics.stage("analysis"):
+                result = self._analyze(job_id, request)
+        except Exception as e:
+            self._finish(job_id, FAILED, None, f"{type(e).__name__}: {e}", profile)
+            return
+        # A failed LLM call still returns the offline analysis, a partial one its defaults; keep it, but let a
+        # resubmit retry
+        error = result.get("error")
+        if error is None and not is_complete(result):
+            error = "Incomplete analysis: " + ", ".join(result.get("incomplete_sections") or ["some chunks failed"])
+        self._finish(job_id, DONE if error is None else FAILED, result, error, profile)
+
+    def _analyze(self, job_id, request):
+        text, contract_type, nlp_data = request["text"], request["contract_type"], request["nlp_data"]
+        if request.get("document_id") and self.revision_store is not None:
+            return IncrementalAnalyzer(self.analyzer, self.revision_store).analyze_revision(
+                request["document_id"], text, contract_type, nlp_data)
+        if not self.stream:
+            return self.analyzer.analyze_contract(text, contract_type, nlp_data)
+
+        # Publish sections as they stream in so pollers can render them early
+        result = {}
+        for section, value in self.analyzer.analyze_contract_stream(text, contract_type, nlp_data):
+            result[section] = value
+            with self._connect() as conn:
+                conn.execute("UPDATE jobs SET partial = ? WHERE id = ?", (json.dumps(result, ensure_ascii=False), job_id))
+        return result
+
+    def _finish(self, job_id, status, result, error, profile=None):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, partial = NULL, finished_at = ?, profile = ? "
+                "WHERE id = ? AND owner = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None, error,
+                 time.time(), json.dumps(profile) if profile and profile.get("text") else None, job_id, self.owner)
+            )
+        if cursor.rowcount == 0:
+            print(f"Job {job_id[:12]} was taken over by another worker; result dropped")
+            return
+        print(f"Job {job_id[:12]} {status}" + (f": {error}" if error else ""))
+
+    def shutdown(self, wait=True):
+        self._stopped.set()
+        self.pool.shutdown(wait=wait)
+
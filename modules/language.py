@@ -0,0 +1,54 @@
+import re
+
+# Devanagari digits map one-to-one onto ASCII digits, so normalizing keeps every character offset
+DEVANAGARI_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+
+_DEVANAGARI_RUN = re.compile(r"[ऀ-ॿ]+")
+_LATIN_RUN = re.compile(r"[A-Za-z]+")
+
+
+def normalize_digits(text):
+    """Replace Devanagari numerals (०-९) with ASCII digits; same length as text"""
+    if text.isascii():
+        return text
+    return text.translate(DEVANAGARI_DIGITS)
+
+
+def detect_language(text):
+    """"English", "Hindi" or "Mixed" from the share of Devanagari vs. Latin letters"""
+    if text.isascii():
+        return "English"
+    devanagari = sum(len(run) for run in _DEVANAGARI_RUN.findall(text))
+    latin = sum(len(run) for run in _LATIN_RUN.findall(text))
+    if not devanagari:
+        return "English"
+    share = devanagari / (devanagari + latin)
+    if share >= 0.8:
+        return "Hindi"
+    if share <= 0.2:
+        return "English"
+    return "Mixed"
+
+
+def devanagari_segments(text):
+    """(start, end) spans of consecutive lines that contain Devanagari.
+
+    Hindi-only patterns run on these spans alone, so the English parts of a
+    mixed document (and English documents entirely) never pay for them.
+    """
+    if text.isascii():
+        return []
+    segments = []
+    line_end = -1
+    for match in _DEVANAGARI_RUN.finditer(text):
+        if match.start() < line_end:
+            continue  # Same line as the previous run
+        start = text.rfind("\n", 0, match.start()) + 1
+        line_end = text.find("\n", match.end())
+        if line_end == -1:
+            line_end = len(text)
+        if segments and not text[segments[-1][1]:start].strip():
+            segments[-1] = (segments[-1][0], line_end)
+        else:
+            segments.append((start, line_end))
+    return segments
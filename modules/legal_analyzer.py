@@ -1,18 +1,63 @@
 import os
 import json
+import time
 import openai
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from modules.chunking import split_into_chunks, merge_analyses
+from modules.metrics import metrics
+from modules.model_router import LatencyStats
+from modules.output_schema import AnalysisValidator, is_complete, repair_json, section_request
+from modules.prompt_compactor import PromptCompactor, count_tokens
+from modules.risk_scorer import RuleBasedRiskScorer
+from modules.stream_parser import IncrementalJSONParser
+
+# Bump whenever the prompt or response schema changes so cached analyses are not reused
+PROMPT_VERSION = "2"
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+SYSTEM_PROMPT = "You are an expert Indian Legal Advisor specializing in protecting SME interests in contract negotiations. Provide practical, actionable advice in simple business language."
+
+ANALYSIS_INSTRUCTIONS = """Analyze the contract text in the user message. It may be in English, Hindi or mixed; translate key Hindi terms to English for the analysis. Text marked [...] or listed as omitted was left out to save space: do not report it as missing.
+
+Reply with one JSON object in this structure:
+{"language_detected": "English/Hindi/Mixed",
+"contract_info": {"type": "Employment/Vendor/Service/Lease/Partnership/NDA/Other", "parties": ["Party 1 name", "Party 2 name"], "effective_date": "extracted date or null", "duration": "contract duration or null", "jurisdiction": "city/state", "governing_law": "specific Indian laws mentioned", "key_amounts": ["financial figures mentioned"]},
+"risk_assessment": {"composite_score": 0-100, "risk_level": "Low/Medium/High", "summary": "2-3 sentence overview of main concerns", "key_risks": [{"clause": "clause name/number", "risk_level": "Low/Medium/High", "category": "Indemnity/Termination/Non-compete/IP/Penalty/Jurisdiction/Other", "explanation": "why this is risky for SME", "legal_concern": "specific Indian law concern if any", "suggestion": "specific alternative language or negotiation point", "priority": "Critical/High/Medium/Low"}]},
+"clause_breakdown": [{"clause_number": "1.1", "clause_name": "Payment Terms", "original_text": "brief excerpt", "simplified_explanation": "plain English explanation", "obligations": ["what party must do"], "rights": ["what party can do"], "red_flags": ["concerning aspects"]}],
+"compliance_check": [{"law": "Indian Contract Act 1872 / Shops and Establishments Act / Payment of Wages Act / etc", "section": "specific section if applicable", "status": "Compliant/Warning/Non-Compliant/Unclear", "notes": "specific compliance concern or confirmation", "recommendation": "action needed if non-compliant"}],
+"unfavorable_terms": [{"term": "specific unfavorable term", "impact": "business impact on SME", "negotiation_strategy": "how to negotiate this"}],
+"missing_protections": ["important clauses that should be added"],
+"overall_recommendation": {"verdict": "Sign As-Is/Negotiate/Reject/Seek Legal Counsel", "reasoning": "why this recommendation", "priority_negotiations": ["top 3 items to negotiate"]}}
+
+Focus on: unfair termination clauses, overly broad indemnity, unreasonable non-compete restrictions, one-sided IP transfer, excessive penalties, unfavorable jurisdiction clauses, auto-renewal traps, ambiguous language, missing standard protections, and compliance with Indian labor and contract laws."""
 
 class LegalAnalyzer:
-    def __init__(self, api_key=None, provider="openrouter", model="openai/gpt-4-turbo"):
+    def __init__(self, api_key=None, provider="openrouter", model="openai/gpt-4-turbo", cache=None,
+                 chunked=True, chunk_tokens=1500, max_workers=4, prompt_tokens=2000, router=None,
+                 regenerate_sections=True):
         self.provider = provider
         self.api_key = api_key
         self.model = model
+        self.cache = cache
+        self.chunked = chunked
+        self.chunk_tokens = chunk_tokens
+        self.max_workers = max_workers
+        self.prompt_tokens = prompt_tokens
+        self.scorer = RuleBasedRiskScorer()
+        self.compactor = PromptCompactor(self.scorer)
+        self.validator = AnalysisValidator()
+        self.regenerate_sections = regenerate_sections  # Re-request only the sections a reply lacks
+        self.router = router  # ModelRouter choosing the model per contract; None always uses model
+        self.latency = LatencyStats()
+        # Hedged calls; created here (threads start on first use) as chunks call _call_hedged concurrently
+        self._hedge_pool = ThreadPoolExecutor(max_workers=max_workers * 2)
         
         if self.provider == "openrouter" and self.api_key:
             # OpenRouter uses OpenAI-compatible API
             self.client = openai.OpenAI(
                 api_key=self.api_key,
-                base_url="https://openrouter.ai/api/v1"
+                base_url=OPENROUTER_BASE_URL
             )
         elif self.provider == "openai" and self.api_key:
             self.client = openai.OpenAI(api_key=self.api_key)
@@ -23,120 +68,308 @@ class LegalAnalyzer:
         if not self.client:
             return self._mock_analysis(text, contract_type, nlp_data)
         
-        # Build enhanced context from NLP data
-        context = ""
-        if nlp_data:
-            context = f"""
-            
-            Pre-extracted Information:
-            - Contract Type: {nlp_data.get('contract_type', 'Unknown')}
-            - Parties: {', '.join(nlp_data.get('entities', {}).get('parties', []))}
-            - Detected Risk Indicators: {', '.join(nlp_data.get('risk_indicators', {}).keys())}
-            - Ambiguous Terms Found: {len(nlp_data.get('ambiguities', []))}
-            """
+        model = self._route(text, nlp_data)
+        if self._needs_chunking(text, nlp_data):
+            return self.analyze_contract_chunked(text, contract_type, nlp_data, model)
+        return self._analyze_cached(text, contract_type, nlp_data, self._build_context(nlp_data), model=model)
+
+    def analyze_contract_chunked(self, text, contract_type="General", nlp_data=None, model=None):
+        """Map-reduce analysis for long contracts.
+
+        The text is split on the clause boundaries found by NLPEngine.extract_clauses,
+        packed into chunks of about chunk_tokens, analyzed concurrently (at most
+        max_workers requests in flight) and the per-chunk results merged.
+        """
+        if not self.client:
+            return self._mock_analysis(text, contract_type, nlp_data)
         
-        prompt = f"""
-        You are an expert legal advisor specializing in Indian contract law for Small and Medium Enterprises (SMEs).
+        model = model or self._route(text, nlp_data)
+        clauses = (nlp_data or {}).get('clauses')
+        chunks = split_into_chunks(text, clauses, self.chunk_tokens, count_tokens)
+        if len(chunks) <= 1:
+            return self._analyze_cached(text, contract_type, nlp_data, self._build_context(nlp_data), model=model)
         
-        Analyze the following contract text thoroughly. The text may be in English, Hindi, or mixed.
-        If Hindi text is present, translate key terms to English for analysis.
-        {context}
+        context = self._build_context(nlp_data)
         
-        Contract Text (first 6000 characters):
-        {text[:6000]}
+        def analyze_chunk(indexed_chunk):
+            idx, chunk = indexed_chunk
+            return self._analyze_cached(chunk, contract_type, nlp_data, self._chunk_context(context, idx, len(chunks)),
+                                        model=model, chunk=True)
         
-        Provide a comprehensive legal analysis in JSON format with the following structure:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            chunk_results = list(pool.map(analyze_chunk, enumerate(chunks, 1)))
+        return self._merge_chunks(chunk_results, nlp_data)
+
+    def _merge_chunks(self, chunk_results, nlp_data):
+        """One result from the per-chunk results; failed chunks and defaulted sections stay visible"""
+        merged = merge_analyses(chunk_results)
+        if merged is None:
+            return chunk_results[0]
         
-        {{
-            "language_detected": "English/Hindi/Mixed",
-            "contract_info": {{
-                "type": "Employment/Vendor/Service/Lease/Partnership/NDA/Other",
-                "parties": ["Party 1 name", "Party 2 name"],
-                "effective_date": "extracted date or null",
-                "duration": "contract duration or null",
-                "jurisdiction": "city/state",
-                "governing_law": "specific Indian laws mentioned",
-                "key_amounts": ["financial figures mentioned"]
-            }},
-            "risk_assessment": {{
-                "composite_score": 0-100,
-                "risk_level": "Low/Medium/High",
-                "summary": "2-3 sentence overview of main concerns",
-                "key_risks": [
-                    {{
-                        "clause": "clause name/number",
-                        "risk_level": "Low/Medium/High",
-                        "category": "Indemnity/Termination/Non-compete/IP/Penalty/Jurisdiction/Other",
-                        "explanation": "why this is risky for SME",
-                        "legal_concern": "specific Indian law concern if any",
-                        "suggestion": "specific alternative language or negotiation point",
-                        "priority": "Critical/High/Medium/Low"
-                    }}
-                ]
-            }},
-            "clause_breakdown": [
-                {{
-                    "clause_number": "1.1",
-                    "clause_name": "Payment Terms",
-                    "original_text": "brief excerpt",
-                    "simplified_explanation": "plain English explanation",
-                    "obligations": ["what party must do"],
-                    "rights": ["what party can do"],
-                    "red_flags": ["concerning aspects"]
-                }}
-            ],
-            "compliance_check": [
-                {{
-                    "law": "Indian Contract Act 1872 / Shops and Establishments Act / Payment of Wages Act / etc",
-                    "section": "specific section if applicable",
-                    "status": "Compliant/Warning/Non-Compliant/Unclear",
-                    "notes": "specific compliance concern or confirmation",
-                    "recommendation": "action needed if non-compliant"
-                }}
-            ],
-            "unfavorable_terms": [
-                {{
-                    "term": "specific unfavorable term",
-                    "impact": "business impact on SME",
-                    "negotiation_strategy": "how to negotiate this"
-                }}
-            ],
-            "missing_protections": [
-                "important clauses that should be added"
-            ],
-            "overall_recommendation": {{
-                "verdict": "Sign As-Is/Negotiate/Reject/Seek Legal Counsel",
-                "reasoning": "why this recommendation",
-                "priority_negotiations": ["top 3 items to negotiate"]
-            }}
-        }}
+        failed = [r["error"] for r in chunk_results if "error" in r]
+        merged["chunks_analyzed"] = len(chunk_results) - len(failed)
+        if failed:
+            merged["chunk_errors"] = failed
+        answered = [r for r in chunk_results if "error" not in r]
+        if nlp_data and all("risk_assessment" in r.get("incomplete_sections", []) for r in answered):
+            # No chunk got a score from the model: score the whole contract, not one chunk of it
+            merged["risk_assessment"] = self.scorer.score(nlp_data)
+        return merged
+
+    def analyze_contract_stream(self, text, contract_type="General", nlp_data=None):
+        """Streaming analyze_contract: yields (section, value) pairs as the model writes them.
+
+        Sections such as risk_assessment or overall_recommendation arrive as
+        soon as each one is complete. Cached results, demo mode and long
+        (chunked) contracts yield all sections at once when ready.
+        """
+        if not self.client or self._needs_chunking(text, nlp_data):
+            yield from self.analyze_contract(text, contract_type, nlp_data).items()
+            return
+        
+        model = self._route(text, nlp_data)
+        context = self._build_context(nlp_data)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(text, contract_type, model, PROMPT_VERSION, context)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield from self.validator.validate(cached)[0].items()
+                return
+        
+        parser = IncrementalJSONParser()
+        sent = set()
+        start = time.perf_counter()
+        messages = self._build_messages(self._build_prompt(text, context, nlp_data))
+        try:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                response_format={"type": "json_object"},
+                temperature=0.3,
+                stream=True
+            )
+            for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for section, value in parser.feed(chunk.choices[0].delta.content):
+                    value = self.validator.check_section(section, value)
+                    if value is not None:  # Unusable sections wait for the repair below
+                        sent.add(section)
+                        yield section, value
+            reply = self._parse_reply(parser.text)
+        except Exception as e:
+            self._record_error(model)
+            fallback = {"error": str(e), "mock": True, **self._mock_analysis(text, contract_type, nlp_data)}
+            for section, value in fallback.items():
+                if section not in sent:
+                    yield section, value
+            return
         
-        Focus on:
-        1. Unfair termination clauses
-        2. Overly broad indemnity
-        3. Unreasonable non-compete restrictions
-        4. One-sided IP transfer
-        5. Excessive penalties
-        6. Unfavorable jurisdiction clauses
-        7. Auto-renewal traps
-        8. Ambiguous language
-        9. Missing standard protections
-        10. Compliance with Indian labor and contract laws
+        self._record_call(model, time.perf_counter() - start)
+        result = self._complete_reply(messages, reply, model, nlp_data)
+        # Anything the incremental parser could not emit on its own
+        for section, value in result.items():
+            if section not in sent:
+                yield section, value
+        if cache_key is not None and is_complete(result):
+            self.cache.set(cache_key, result)
+
+    def _needs_chunking(self, text, nlp_data):
+        """True when even the compacted contract is over the single-prompt token budget"""
+        if not self.chunked or count_tokens(text) <= self.prompt_tokens:
+            return False
+        compacted, _ = self.compactor.compact(text, nlp_data)
+        return count_tokens(compacted) > self.prompt_tokens
+
+    def _route(self, text, nlp_data):
+        return self.router.route(text, nlp_data) if self.router is not None else self.model
+
+    def _analyze_cached(self, text, contract_type, nlp_data, context, model=None, chunk=False):
+        model = model or self.model
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(text, contract_type, model, PROMPT_VERSION, context)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return self.validator.validate(cached)[0]
+
+        try:
+            messages = self._build_messages(self._build_prompt(text, context, nlp_data, fit=not chunk))
+            reply, answered_by = self._call_hedged(messages, model)
+        except Exception as e:
+            return {"error": str(e), "mock": True, **self._mock_analysis(text, contract_type, nlp_data)}
+
+        # A chunk's missing score is settled after merging (_merge_chunks), not from the whole contract's NLP data
+        result = self._complete_reply(messages, reply, answered_by, None if chunk else nlp_data)
+        if cache_key is not None and is_complete(result):
+            if answered_by != model:
+                # A hedge answered: file it under that model, not the one this lookup was for
+                cache_key = self.cache.make_key(text, contract_type, answered_by, PROMPT_VERSION, context)
+            self.cache.set(cache_key, result)
+        return result
+
+    def _complete_reply(self, messages, reply, model, nlp_data=None):
+        """Schema-checked result for a model reply.
+
+        Sections the reply lacks are asked for once more as a follow-up turn
+        of the same conversation; any still missing get defaults and are
+        listed in incomplete_sections. AsyncLegalAnalyzer overrides this to
+        await the follow-up call.
         """
+        result, missing = self._validate(reply)
+        if missing and self.regenerate_sections:
+            try:
+                extra = self._call_model(self._section_messages(messages, reply, missing), model)
+                result, missing = self._add_sections(reply, extra, missing)
+            except Exception as e:
+                print(f"⚠️ Could not re-request {', '.join(missing)}: {e}")
+        return self._finish_reply(result, missing, model, nlp_data)
+
+    def _validate(self, reply):
+        """(result coerced to the schema, sections missing from the reply)"""
+        result, missing, fixes = self.validator.validate(reply)
+        if fixes:
+            print(f"🩹 Coerced {len(set(fixes))} malformed fields in the model reply")
+        return result, missing
+
+    def _section_messages(self, messages, reply, missing):
+        """The conversation so far (request and the model's reply) plus a follow-up asking for only the missing sections.
+
+        The request is sent unchanged, so providers with prompt caching serve it from the cached prefix.
+        """
+        print(f"🔁 Re-requesting only {', '.join(missing)} from the model")
+        metrics.count("sections_rerequested", len(missing))
+        return messages + [
+            {"role": "assistant", "content": json.dumps(reply, ensure_ascii=False)},
+            {"role": "user", "content": section_request(missing)}
+        ]
+
+    def _add_sections(self, reply, extra, missing):
+        """(result, sections still missing) once the follow-up reply's sections are added to the first reply"""
+        result, missing, _ = self.validator.validate({**reply, **{s: extra[s] for s in missing if s in extra}})
+        return result, missing
+
+    def _finish_reply(self, result, missing, model, nlp_data=None):
+        if missing:
+            result = self._fill_missing(result, missing, nlp_data)
+        result["model"] = model
+        return result
+
+    def _fill_missing(self, result, missing, nlp_data):
+        """Sections the model never delivered keep their defaults; the risk score comes from the rule-based scorer"""
+        print(f"⚠️ Model reply incomplete, showing defaults for: {', '.join(missing)}")
+        metrics.count("sections_defaulted", len(missing))
+        if "risk_assessment" in missing and nlp_data:
+            result["risk_assessment"] = self.scorer.score(nlp_data)
+        result["incomplete_sections"] = missing
+        return result
+
+    def _chunk_context(self, context, idx, total):
+        return context + (f"This is part {idx} of {total} of a longer contract. Analyze only the clauses in this part; "
+                          "the other parts are analyzed separately and the results merged.\n")
 
+    def _build_context(self, nlp_data):
+        """Build enhanced context from NLP data"""
+        context = ""
+        if nlp_data:
+            context = (
+                "Pre-extracted Information:\n"
+                f"- Contract Type: {nlp_data.get('contract_type', 'Unknown')}\n"
+                f"- Parties: {', '.join(nlp_data.get('entities', {}).get('parties', []))}\n"
+                f"- Detected Risk Indicators: {', '.join(nlp_data.get('risk_indicators', {}).keys())}\n"
+                f"- Ambiguous Terms Found: {len(nlp_data.get('ambiguities', []))}\n"
+            )
+        return context
+
+    def _build_prompt(self, text, context, nlp_data=None, fit=True):
+        """Prompt with the compacted contract text; fit=False (chunks, already sized) never omits clauses"""
+        with metrics.stage("prompt.compaction") as sizes:
+            compacted, stats = self.compactor.compact(text, nlp_data, self.prompt_tokens if fit else None)
+            sizes.update(tokens_before=stats['tokens_before'], tokens_after=stats['tokens_after'])
+        print(f"✂️ Prompt compaction: {stats['tokens_before']} -> {stats['tokens_after']} tokens "
+              f"({len(stats['boilerplate_dropped'])} boilerplate clauses dropped, "
+              f"{len(stats['clauses_omitted'])} omitted for the budget)")
+        return f"{context}\nContract text:\n{compacted}".lstrip()
+
+    def _build_messages(self, prompt):
+        # Instructions and schema stay in the (identical) system message so providers can cache the prefix
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT + "\n\n" + ANALYSIS_INSTRUCTIONS},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _call_hedged(self, messages, model):
+        """(result, model that answered) for one request.
+
+        With hedging on, a call still running after the router's deadline is
+        raced against a backup request; the first answer wins and the slower
+        call is cancelled. A blocking HTTP call that has already started
+        cannot be interrupted, so it finishes in the background (its latency
+        is still recorded).
+        """
+        hedge = self.router.hedge_for(model) if self.router is not None else None
+        if hedge is None:
+            return self._call_model(messages, model), model
+        delay, backup_model = hedge
+        primary = self._hedge_pool.submit(self._call_model, messages, model)
+        calls = {primary: model}
+        done, _ = wait(calls, timeout=delay)
+        if not done:
+            self.router.hedges += 1
+            calls[self._hedge_pool.submit(self._call_model, messages, backup_model)] = backup_model
+        errors = []
+        try:
+            while calls:
+                done, _ = wait(calls, return_when=FIRST_COMPLETED)
+                for call in done:
+                    answered_by = calls.pop(call)
+                    if call.exception() is None:
+                        if call is not primary:
+                            self.router.hedge_wins += 1
+                        return call.result(), answered_by
+                    errors.append(call.exception())
+        finally:
+            for call in calls:
+                call.cancel()  # Stops a backup still queued for a worker
+        raise errors[0]
+
+    def _call_model(self, messages, model=None):
+        model = model or self.model
+        start = time.perf_counter()
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert Indian Legal Advisor specializing in protecting SME interests in contract negotiations. Provide practical, actionable advice in simple business language."},
-                    {"role": "user", "content": prompt}
-                ],
+                model=model,
+                messages=messages,
                 response_format={"type": "json_object"},
                 temperature=0.3  # Lower temperature for more consistent legal analysis
             )
-            return json.loads(response.choices[0].message.content)
-        except Exception as e:
-            return {"error": str(e), "mock": True, **self._mock_analysis(text, contract_type, nlp_data)}
+        except Exception:
+            self._record_error(model)
+            raise
+        self._record_call(model, time.perf_counter() - start, response)
+        return self._parse_reply(response.choices[0].message.content)
+
+    def _record_call(self, model, seconds, response=None):
+        """Latency per model, plus the llm.call stage with the token counts the provider reported"""
+        self.latency.observe(model, seconds)
+        usage = getattr(response, "usage", None)
+        tokens = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens} if usage else {}
+        metrics.observe("llm.call", seconds, **tokens)
+        metrics.count("llm_calls", model=model, status="ok")
+
+    def _record_error(self, model):
+        self.latency.error(model)
+        metrics.count("llm_calls", model=model, status="error")
+
+    def _parse_reply(self, content):
+        try:
+            return json.loads(content or "")
+        except ValueError:
+            reply = repair_json(content or "")
+            print("🩹 Repaired malformed JSON in the model reply")
+            metrics.count("replies_repaired")
+            return reply
 
     def _mock_analysis(self, text, contract_type, nlp_data=None):
         """Enhanced mock analysis with more realistic data"""
@@ -148,7 +381,8 @@ class LegalAnalyzer:
         if not parties:
             parties = ["Party A", "Party B"]
         
-        return {
+        mock = {
+            "mock": True,  # Demo result: not stored or counted as a real analysis
             "language_detected": "English",
             "contract_info": {
                 "type": contract_type,
@@ -267,3 +501,9 @@ class LegalAnalyzer:
                 ]
             }
         }
+        if nlp_data and 'risk_indicators' in nlp_data:
+            # Score this contract instead of showing the same canned numbers for every upload
+            assessment = self.scorer.score(nlp_data, contract_type)
+            assessment["summary"] = "⚠️ DEMO MODE: Rule-based scan only. Please provide an API key for comprehensive legal assessment. " + assessment["summary"]
+            mock["risk_assessment"] = assessment
+        return mock
@@ -0,0 +1,273 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import pyinstrument
+except ImportError:  # Optional: profiles fall back to cProfile
+    pyinstrument = None
+
+# Upper bounds in seconds of the stage histograms; one more bucket counts everything slower
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+METRIC_PREFIX = "contract_bot"
+RECENT_EVENTS = 200
+PROFILE_TOP_FUNCTIONS = 40
+
+
+class LatencyHistogram:
+    """Bucketed durations; buckets add up, so histograms from several runs or processes merge"""
+
+    def __init__(self, buckets, counts=None, total=0.0, errors=0):
+        self.buckets = tuple(buckets)
+        self.counts = list(counts) if counts else [0] * (len(self.buckets) + 1)
+        self.total = total
+        self.errors = errors
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+
+    def quantile(self, q):
+        """Estimated q-quantile (0-1), interpolated inside its bucket as Prometheus does"""
+        n = self.count
+        if not n:
+            return None
+        rank = q * n
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return float(self.buckets[-1])  # Only known to be above the last bound
+                low = self.buckets[i - 1] if i else 0.0
+                return low + (self.buckets[i] - low) * (rank - seen) / count
+            seen += count
+        return float(self.buckets[-1])
+
+    def to_dict(self):
+        return {"buckets": list(self.buckets), "counts": self.counts, "total": self.total, "errors": self.errors}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Metrics:
+    """Stage timers, counters and sizes for the whole process.
+
+    stage() times a block (extraction, each NLP pass, the LLM call, PDF
+    rendering) into a per-stage histogram; numeric fields set on it (bytes,
+    chars, tokens) are summed per stage. count() bumps a labelled counter.
+    Every stage is also kept in a short list of recent events and, with
+    log_path set, appended to a JSON-lines log. to_prometheus() renders it
+    all in the Prometheus text format; export() / merge() carry the numbers
+    over from worker processes.
+    """
+
+    def __init__(self, log_path=None, enabled=True):
+        self.log_path = log_path
+        self.enabled = enabled
+        self.stages = {}  # stage -> LatencyHistogram
+        self.sizes = {}  # (stage, measure) -> total
+        self.counters = {}  # (name, sorted label pairs) -> value
+        self.recent = deque(maxlen=RECENT_EVENTS)
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Time the block as stage name; the yielded dict takes size fields known only at the end"""
+        if not self.enabled:
+            yield fields
+            return
+        start = time.perf_counter()
+        error = None
+        try:
+            yield fields
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, error=error, **fields)
+
+    def call(self, name, fn, *args, **kwargs):
+        """fn(*args, **kwargs), timed as stage name"""
+        with self.stage(name):
+            return fn(*args, **kwargs)
+
+    def observe(self, name, seconds, error=None, **fields):
+        """Record one finished stage that was timed elsewhere"""
+        if not self.enabled:
+            return
+        event = {"ts": round(time.time(), 3), "stage": name, "seconds": round(seconds, 6)}
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = LatencyHistogram(STAGE_BUCKETS)
+            histogram.observe(seconds)
+            if error:
+                histogram.errors += 1
+                event["error"] = error
+            for measure, value in fields.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.sizes[(name, measure)] = self.sizes.get((name, measure), 0) + value
+                    event[measure] = value
+            self.recent.append(event)
+        self._log(event)
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def _log(self, event):
+        if not self.log_path:
+            return
+        try:
+            # One short append per event: lines from several processes do not interleave
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # Instrumentation must never fail a request
+
+    def summary(self):
+        """One row per stage: calls, errors, total, mean, p50 and p95 seconds, and summed sizes"""
+        with self._lock:
+            return [
+                {
+                    "stage": name,
+                    "calls": h.count,
+                    "errors": h.errors,
+                    "total": h.total,
+                    "mean": h.total / h.count if h.count else None,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    **{measure: total for (stage, measure), total in self.sizes.items() if stage == name},
+                }
+                for name, h in sorted(self.stages.items())
+            ]
+
+    def to_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            if self.stages:
+                name = f"{METRIC_PREFIX}_stage_seconds"
+                lines += [f"# HELP {name} Duration of each processing stage.", f"# TYPE {name} histogram"]
+                for stage, h in sorted(self.stages.items()):
+                    cumulative = 0
+                    for bound, count in zip(list(h.buckets) + ["+Inf"], h.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels([('stage', stage), ('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_labels([('stage', stage)])} {h.total}")
+                    lines.append(f"{name}_count{_labels([('stage', stage)])} {h.count}")
+                name = f"{METRIC_PREFIX}_stage_errors_total"
+                lines += [f"# HELP {name} Stages that raised an exception.", f"# TYPE {name} counter"]
+                lines += [f"{name}{_labels([('stage', stage)])} {h.errors}" for stage, h in sorted(self.stages.items())]
+            if self.sizes:
+                name = f"{METRIC_PREFIX}_stage_size_total"
+                lines += [f"# HELP {name} Bytes, characters or tokens handled per stage.", f"# TYPE {name} counter"]
+                lines += [f"{name}{_labels([('stage', stage), ('measure', measure)])} {total}"
+                          for (stage, measure), total in sorted(self.sizes.items())]
+            for counter in sorted({name for name, _ in self.counters}):
+                name = f"{METRIC_PREFIX}_{counter}_total"
+                lines.append(f"# TYPE {name} counter")
+                lines += [f"{name}{_labels(labels)} {value}"
+                          for (key, labels), value in sorted(self.counters.items()) if key == counter]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write to_prometheus() to path atomically (node_exporter textfile collector format)"""
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def export(self, reset=False):
+        """Plain-data copy of the numbers, for merge() in another process"""
+        with self._lock:
+            data = {
+                "stages": {name: h.to_dict() for name, h in self.stages.items()},
+                "sizes": [[stage, measure, total] for (stage, measure), total in self.sizes.items()],
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+            }
+            if reset:
+                self.stages, self.sizes, self.counters = {}, {}, {}
+        return data
+
+    def merge(self, data):
+        with self._lock:
+            for name, stored in data["stages"].items():
+                h = self.stages.get(name)
+                if h is None:
+                    self.stages[name] = LatencyHistogram(stored["buckets"], stored["counts"], stored["total"],
+                                                         stored["errors"])
+                else:
+                    h.counts = [a + b for a, b in zip(h.counts, stored["counts"])]
+                    h.total += stored["total"]
+                    h.errors += stored["errors"]
+            for stage, measure, total in data["sizes"]:
+                self.sizes[(stage, measure)] = self.sizes.get((stage, measure), 0) + total
+            for name, labels, value in data["counters"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self.counters[key] = self.counters.get(key, 0) + value
+
+
+# Process-wide registry used by the instrumented modules
+metrics = Metrics()
+
+
+@contextmanager
+def profiled(mode=None):
+    """Profile the block with "cprofile" or "pyinstrument"; None profiles nothing.
+
+    Yields a dict whose "text" holds the report once the block is done.
+    cProfile only sees the calling thread; pyinstrument falls back to it
+    when not installed.
+    """
+    capture = {"mode": mode, "text": None}
+    if mode == "pyinstrument" and pyinstrument is None:
+        print("⚠️ pyinstrument is not installed; profiling with cProfile")
+        mode = capture["mode"] = "cprofile"
+    if mode == "pyinstrument":
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+        try:
+            yield capture
+        finally:
+            profiler.stop()
+            capture["text"] = profiler.output_text(unicode=True)
+    elif mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:  # Another profile (another session) is running
+            capture["text"] = f"Profiling skipped: {e}"
+            yield capture
+            return
+        try:
+            yield capture
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            capture["text"] = out.getvalue()
+    else:
+        yield capture
@@ -0,0 +1,78 @@
+import re
+import zlib
+
+import numpy as np
+
+SHINGLE_WORDS = 3
+SHINGLE_BATCH = 65536  # Shingles hashed per NumPy call when signing many texts
+
+_WORD = re.compile(r"[\wऀ-ॣ०-ॿ]+")
+_ODD = np.uint64(0x9E3779B97F4A7C15)
+
+
+class MinHasher:
+    """MinHash signatures of word 3-grams, and LSH band keys over them.
+
+    The hash functions are derived from seed, so signatures are comparable
+    across processes and runs as long as num_perm, bands and seed match.
+    """
+
+    def __init__(self, num_perm=64, bands=16, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._mul = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._add = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self._band_mul = rng.integers(1, 2 ** 63, self.rows, dtype=np.uint64) | np.uint64(1)
+        self._word_hashes = {}
+
+    def _shingles(self, text):
+        words = _WORD.findall(text.lower())
+        if not words:
+            return None
+        hashes = self._word_hashes
+        if len(hashes) > 500000:
+            hashes.clear()
+        values = np.empty(len(words), dtype=np.uint64)
+        for i, word in enumerate(words):
+            h = hashes.get(word)
+            if h is None:
+                h = hashes[word] = zlib.crc32(word.encode("utf-8"))
+            values[i] = h
+        if len(values) < SHINGLE_WORDS:
+            return values
+        shingles = values[:1 - SHINGLE_WORDS].copy()
+        for offset in range(1, SHINGLE_WORDS):
+            shingles = shingles * _ODD + values[offset:len(values) - SHINGLE_WORDS + 1 + offset]
+        return shingles
+
+    def signatures(self, texts):
+        """(len(texts), num_perm) uint32 MinHash signatures, plus a flag per text (False: no words)"""
+        shingle_sets = [self._shingles(text) for text in texts]
+        out = np.zeros((len(texts), self.num_perm), dtype=np.uint32)
+        batch, size = [], 0
+        for i, shingles in enumerate(shingle_sets + [None]):
+            if shingles is not None:
+                batch.append(i)
+                size += len(shingles)
+            if batch and (size >= SHINGLE_BATCH or i == len(shingle_sets)):
+                flat = np.concatenate([shingle_sets[j] for j in batch])
+                starts = np.cumsum([0] + [len(shingle_sets[j]) for j in batch[:-1]])
+                # Multiply-shift hashing: one universal hash per permutation
+                hashed = ((self._mul[:, None] * flat[None, :] + self._add[:, None]) >> np.uint64(32)).astype(np.uint32)
+                out[batch] = np.minimum.reduceat(hashed, starts, axis=1).T
+                batch, size = [], 0
+        return out, [s is not None for s in shingle_sets]
+
+    def band_keys(self, signatures):
+        """(n, bands) uint64 keys, one per band of rows signature values"""
+        grouped = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (grouped * self._band_mul).sum(axis=2, dtype=np.uint64)
+
+    @staticmethod
+    def similarity(signature, signatures):
+        """Estimated Jaccard similarity of one signature against each row of signatures"""
+        return (signatures == signature).mean(axis=1)
@@ -0,0 +1,114 @@
+import json
+import os
+import threading
+
+from modules.metrics import LatencyHistogram
+from modules.prompt_compactor import count_tokens
+from modules.risk_scorer import RuleBasedRiskScorer
+
+# Upper bounds in seconds; one more bucket counts everything slower
+LATENCY_BUCKETS = (0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+
+class LatencyStats:
+    """Per-model latency histograms of LLM calls, safe to update from several threads"""
+
+    def __init__(self):
+        self.models = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, model):
+        if model not in self.models:
+            self.models[model] = LatencyHistogram(LATENCY_BUCKETS)
+        return self.models[model]
+
+    def observe(self, model, seconds):
+        with self._lock:
+            self._histogram(model).observe(seconds)
+
+    def error(self, model):
+        with self._lock:
+            self._histogram(model).errors += 1
+
+    def summary(self):
+        """One row per model: calls, errors, mean, p50 and p95 seconds"""
+        with self._lock:
+            return [
+                {
+                    "model": model,
+                    "calls": h.count,
+                    "errors": h.errors,
+                    "mean": h.total / h.count if h.count else None,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                }
+                for model, h in sorted(self.models.items())
+            ]
+
+    def save(self, path):
+        """Add these counts to the histograms stored in path (JSON), so tuning data builds up over runs"""
+        stored = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                stored = {}
+        with self._lock:
+            for model, h in self.models.items():
+                old = stored.get(model)
+                if old and tuple(old["buckets"]) == h.buckets:
+                    merged = LatencyHistogram(h.buckets, [a + b for a, b in zip(old["counts"], h.counts)],
+                                              old["total"] + h.total, old["errors"] + h.errors)
+                    stored[model] = merged.to_dict()
+                else:
+                    stored[model] = h.to_dict()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2)
+        os.replace(tmp, path)
+
+
+class ModelRouter:
+    """Picks the model for each contract from the local NLP signals.
+
+    Contracts up to max_cheap_tokens long whose rule-based risk score is
+    below max_cheap_score, with no risk rated High, go to cheap_model; the
+    rest (and anything without NLP data) to strong_model. With hedge_after
+    set, a call that has not answered after that many seconds is raced
+    against the same request to hedge_model (default: cheap_model) and the
+    first answer wins.
+    """
+
+    def __init__(self, cheap_model, strong_model, max_cheap_tokens=1500, max_cheap_score=50, hedge_after=None,
+                 hedge_model=None, scorer=None):
+        self.cheap_model = cheap_model
+        self.strong_model = strong_model
+        self.max_cheap_tokens = max_cheap_tokens
+        self.max_cheap_score = max_cheap_score
+        self.hedge_after = hedge_after
+        self.hedge_model = hedge_model or cheap_model
+        self.scorer = scorer or RuleBasedRiskScorer()
+        self.routed = {cheap_model: 0, strong_model: 0}
+        self.hedges = 0  # Backup requests fired
+        self.hedge_wins = 0  # Backup requests that answered first
+
+    def route(self, text, nlp_data=None):
+        tokens = count_tokens(text)
+        model = self.strong_model
+        if nlp_data and tokens <= self.max_cheap_tokens:
+            assessment = self.scorer.score(nlp_data)
+            if (assessment["composite_score"] < self.max_cheap_score
+                    and not any(r["risk_level"] == "High" for r in assessment["key_risks"])):
+                model = self.cheap_model
+        self.routed[model] = self.routed.get(model, 0) + 1
+        return model
+
+    def hedge_for(self, model):
+        """(delay seconds, backup model) for a call to model, or None when hedging is off or model is the backup"""
+        if not self.hedge_after or model == self.hedge_model:
+            return None
+        return self.hedge_after, self.hedge_model
@@ -0,0 +1,227 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from modules.analysis_cache import _ClosingConnection
+from modules.minhash import MinHasher
+from modules.revisions import diff_clauses, fingerprint_clauses
+
+# Entity kinds that change between copies of one template; masked before fingerprinting
+MASKED_ENTITIES = ("parties", "persons", "organizations", "dates", "amounts", "durations", "cin", "gst")
+# Swapped into a reused result position by position, when both contracts list the same number
+SWAPPED_ENTITIES = ("parties", "dates", "amounts")
+
+_DIGITS = re.compile(r"\d")
+_SPACE = re.compile(r"\s+")
+# Runs of two or more capitalized words: party names the entity patterns miss ("Zeta Infotech")
+_PROPER_NAMES = re.compile(r"\b[A-Z][\w&.'-]*(?:[ \t]+[A-Z][\w&.'-]*)+")
+_COMPANY_SUFFIX = re.compile(r"\s+(?:Pvt\.?|Private|Ltd\.?|Limited|LLP|Inc\.?|Co\.?)(?:\s+(?:Ltd\.?|Limited))?\.?$",
+                             re.IGNORECASE)
+
+
+def _short_name(name):
+    """"Alpha Retail Pvt Ltd" -> "Alpha Retail", as the name is usually repeated in clauses"""
+    return _COMPANY_SUFFIX.sub("", str(name)).strip()
+
+
+def entity_mask(entities):
+    """Compiled pattern matching every extracted entity value, longest first (None if there are none)"""
+    values = {str(v) for kind in MASKED_ENTITIES for v in (entities or {}).get(kind, []) if v and str(v).strip()}
+    values |= {_short_name(v) for v in values if len(_short_name(v)) > 3}
+    if not values:
+        return None
+    return re.compile("|".join(re.escape(v) for v in sorted(values, key=len, reverse=True)), re.IGNORECASE)
+
+
+def normalize_text(text, mask=None):
+    """Lowercased text with entities and proper names masked, digits zeroed and whitespace collapsed"""
+    if mask is not None:
+        text = mask.sub(" @ ", text)
+    text = _PROPER_NAMES.sub(" @ ", text)
+    return _SPACE.sub(" ", _DIGITS.sub("0", text)).strip().lower()
+
+
+def masked_clauses(clauses, mask=None):
+    """Clauses with normalized text, so fingerprints ignore names, dates and amounts"""
+    return [
+        {**clause, "full_text": normalize_text(clause.get("full_text", clause.get("text", "")), mask)}
+        for clause in clauses
+    ]
+
+
+def _swap_pairs(old_entities, new_entities):
+    """{old value: new value} for the swapped entity kinds listed in the same number by both contracts"""
+    pairs = {}
+    for kind in SWAPPED_ENTITIES:
+        old = (old_entities or {}).get(kind) or []
+        new = (new_entities or {}).get(kind) or []
+        if len(old) != len(new):
+            continue  # No reliable pairing
+        kind_pairs = {str(o): str(n) for o, n in zip(old, new) if o and n and str(o) != str(n)}
+        if kind == "parties":
+            # Only multi-word short names: a lone word ("India" of "India Pvt Ltd") is ordinary text elsewhere
+            kind_pairs.update({_short_name(o): _short_name(n) for o, n in kind_pairs.items()
+                               if _short_name(o) != o and len(_short_name(o).split()) > 1})
+        pairs.update(kind_pairs)
+    return pairs
+
+
+def swap_entities(result, old_entities, new_entities):
+    """Copy of result with the base contract's parties, dates and amounts replaced by the new ones.
+
+    Values are replaced as whole words inside the result's strings, in a
+    single pass so that swapping A->B and B->A does not collide.
+    """
+    pairs = _swap_pairs(old_entities, new_entities)
+    if not pairs:
+        return json.loads(json.dumps(result))
+    pattern = re.compile(r"(?<!\w)(?:" + "|".join(re.escape(o) for o in sorted(pairs, key=len, reverse=True)) + r")(?!\w)")
+
+    def swap(value):
+        if isinstance(value, str):
+            return pattern.sub(lambda m: pairs[m.group(0)], value)
+        if isinstance(value, dict):
+            return {key: swap(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [swap(item) for item in value]
+        return value
+
+    return swap(result)
+
+
+class ContractIndex:
+    """Analyzed contracts fingerprinted for near-duplicate lookup.
+
+    The normalized text (entities masked, digits zeroed) of each analyzed
+    contract is reduced to a MinHash signature; its analysis result, NLP
+    entities and normalized clause fingerprints are stored alongside in
+    SQLite. find() returns the closest stored contract analyzed by the same
+    model, so a copy of a known template only needs its differing clauses
+    re-analyzed (IncrementalAnalyzer.merge_partial).
+
+    Signatures and band keys are held in memory as NumPy arrays and catch
+    up with rows written by other processes on each lookup.
+    """
+
+    def __init__(self, path, min_similarity=0.8, num_perm=64, bands=16, seed=7):
+        self.path = path
+        self.min_similarity = min_similarity
+        self.hasher = MinHasher(num_perm, bands, seed)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS contracts (
+                    id INTEGER PRIMARY KEY,
+                    content_hash TEXT NOT NULL UNIQUE,
+                    ts REAL NOT NULL,
+                    file_name TEXT,
+                    contract_type TEXT,
+                    model TEXT,
+                    signature BLOB NOT NULL,
+                    entities TEXT NOT NULL,
+                    clauses TEXT NOT NULL,
+                    result TEXT NOT NULL
+                )
+            """)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._models = []
+        self._sigs = np.zeros((0, num_perm), dtype=np.uint32)
+        self._keys = np.zeros((0, bands), dtype=np.uint64)
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return _ClosingConnection(conn)
+
+    def fingerprint(self, text, nlp_data):
+        """(MinHash signature, clauses with normalized text) of one contract"""
+        mask = entity_mask((nlp_data or {}).get('entities'))
+        signatures, _ = self.hasher.signatures([normalize_text(text, mask)])
+        return signatures[0], masked_clauses((nlp_data or {}).get('clauses') or [], mask)
+
+    def _sync(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, model, signature FROM contracts WHERE id > ? ORDER BY id",
+                                (self._last_id,)).fetchall()
+        if not rows:
+            return
+        with self._lock:
+            rows = [row for row in rows if row[0] > self._last_id]
+            if not rows:
+                return
+            sigs = np.frombuffer(b"".join(row[2] for row in rows), dtype=np.uint32).reshape(len(rows), -1)
+            self._ids = np.concatenate([self._ids, [row[0] for row in rows]])
+            self._models.extend(row[1] for row in rows)
+            self._sigs = np.concatenate([self._sigs, sigs])
+            self._keys = np.concatenate([self._keys, self.hasher.band_keys(sigs)])
+            self._last_id = rows[-1][0]
+
+    def add(self, content_hash, text, nlp_data, result, model, file_name=None, fingerprint=None):
+        """Store an analyzed contract; a content hash seen before replaces the earlier entry"""
+        signature, clauses = fingerprint or self.fingerprint(text, nlp_data)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM contracts WHERE content_hash = ?", (content_hash,))
+                conn.execute(
+                    "INSERT INTO contracts (content_hash, ts, file_name, contract_type, model, signature, entities, "
+                    "clauses, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (content_hash, time.time(), file_name, (nlp_data or {}).get('contract_type'), model,
+                     signature.tobytes(), json.dumps((nlp_data or {}).get('entities') or {}, ensure_ascii=False),
+                     json.dumps(fingerprint_clauses(clauses)), json.dumps(result, ensure_ascii=False))
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def find(self, text, nlp_data, model, exclude_hash=None, fingerprint=None):
+        """Closest stored contract at or above min_similarity, or None.
+
+        Returns a dict with content_hash, file_name, similarity, result,
+        entities, the stored clause fingerprints ("base_clauses") and the
+        clause diff against this contract. fingerprint is this contract's
+        fingerprint() output, if already computed.
+        """
+        self._sync()
+        signature, clauses = fingerprint or self.fingerprint(text, nlp_data)
+        keys = self.hasher.band_keys(signature[None, :])[0]
+        candidates = np.flatnonzero((self._keys == keys).any(axis=1))
+        candidates = [i for i in candidates if self._models[i] == model]
+        if not candidates:
+            return None
+        similarity = self.hasher.similarity(signature, self._sigs[candidates])
+        for best in np.argsort(-similarity, kind="stable"):
+            if similarity[best] < self.min_similarity:
+                return None
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT content_hash, file_name, entities, clauses, result FROM contracts WHERE id = ?",
+                    (int(self._ids[candidates[best]]),)).fetchone()
+            if row is None or row[0] == exclude_hash:
+                continue  # Replaced since the last sync, or the contract itself
+            base_clauses = json.loads(row[3])
+            return {
+                "content_hash": row[0],
+                "file_name": row[1],
+                "similarity": round(float(similarity[best]), 3),
+                "entities": json.loads(row[2]),
+                "base_clauses": base_clauses,
+                "result": json.loads(row[4]),
+                "diff": diff_clauses(base_clauses, clauses),
+            }
+        return None
+
+    def __len__(self):
+        self._sync()
+        return len(self._ids)
@@ -2,7 +2,49 @@ import PyPDF2
 from docx import Document
 import os
 import re
+import tempfile
+from bisect import bisect_right
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from modules.clause_segmenter import ClauseSegmenter
+from modules.language import detect_language, devanagari_segments, normalize_digits
+from modules.metrics import metrics
+from modules.patterns import HINDI_ENTITY_PATTERNS, HINDI_GUARD, PatternRegistry
+from modules.scanner import KeywordScanner
+
+# Standard clauses that rarely change the risk picture; LegalAnalyzer leaves them out of the prompt
+BOILERPLATE_HEADINGS = [
+    "entire agreement", "whole agreement", "general provisions", "miscellaneous", "severability", "counterparts",
+    "headings", "notices", "waiver", "further assurances", "relationship of the parties", "signatures", "witnesses",
+    "सामान्य प्रावधान", "विविध", "संपूर्ण समझौता", "पूर्ण समझौता", "पृथक्करणीयता", "सूचनाएं",
+]
+BOILERPLATE_PHRASES = [
+    "entire agreement", "whole agreement", "supersedes all prior", "in counterparts", "in witness whereof",
+    "headings are for convenience", "remaining provisions shall continue", "remaining provisions shall remain",
+    "संपूर्ण समझौता", "पूर्ण समझौता",
+]
+_BOILERPLATE_HEADING = re.compile(r"^(?:" + "|".join(map(re.escape, BOILERPLATE_HEADINGS)) + r")(?![\w\u0900-\u097f])")
+_BOILERPLATE_PHRASE = re.compile("|".join(map(re.escape, BOILERPLATE_PHRASES)))
+
+
+def is_boilerplate(text, heading=None):
+    """True for a clause whose heading or wording marks it as standard boilerplate.
+
+    Without a heading, a short first line that is not a sentence is taken as the heading.
+    """
+    if heading is None:
+        first = text.strip().split("\n", 1)[0].strip()
+        heading = first if len(first) <= 60 and not first.endswith((".", "।")) else ""
+    return bool(_BOILERPLATE_HEADING.match(heading.lower()) or _BOILERPLATE_PHRASE.search(text.lower()))
+
+
+def _extract_pdf_page_range(file_path, start, stop):
+    """Extract pages [start, stop) of a PDF (module level so process pools can pickle it)"""
+    with open(file_path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
 
 class NLPEngine:
     def __init__(self):
@@ -32,13 +74,97 @@ class NLPEngine:
             "ip_transfer": ["intellectual property", "ip rights", "copyright", "patent", "trademark"],
         }
 
-    def extract_text_from_pdf(self, file_path):
-        text = ""
+        # Ambiguous language
+        self.ambiguous_phrases = [
+            "reasonable", "best efforts", "as soon as possible", "promptly",
+            "appropriate", "sufficient", "adequate", "material", "substantial"
+        ]
+
+        # Locations (Indian cities and states)
+        self.location_keywords = ['Mumbai', 'Delhi', 'Bangalore', 'Bengaluru', 'Chennai', 'Kolkata', 'Hyderabad',
+                                  'Pune', 'Ahmedabad', 'Jaipur', 'Maharashtra', 'Karnataka', 'Tamil Nadu', 'Gujarat']
+
+        # Hindi (Devanagari) keywords, merged into the same categories
+        hindi_contract_keywords = {
+            "Employment": ["रोजगार", "रोज़गार", "कर्मचारी", "नियोक्ता", "वेतन", "परिवीक्षा", "त्यागपत्र"],
+            "Vendor": ["विक्रेता", "आपूर्तिकर्ता", "आपूर्ति", "खरीद आदेश"],
+            "Service": ["सेवा अनुबंध", "सेवाएँ", "सेवाएं", "सेवा प्रदाता"],
+            "Lease": ["पट्टा", "किराया", "किरायेदार", "मकान मालिक", "परिसर"],
+            "Partnership": ["साझेदारी", "भागीदार", "लाभ साझाकरण", "पूंजी योगदान"],
+            "NDA": ["गैर-प्रकटीकरण", "गोपनीय जानकारी", "गोपनीयता"],
+        }
+        hindi_risk_keywords = {
+            "indemnity": ["क्षतिपूर्ति"],
+            "termination": ["समाप्ति", "समाप्त", "रद्द"],
+            "penalty": ["जुर्माना", "दंड", "जब्त"],
+            "non_compete": ["प्रतिस्पर्धा"],
+            "auto_renewal": ["स्वतः नवीनीकरण", "स्वचालित नवीनीकरण"],
+            "jurisdiction": ["अधिकार क्षेत्र", "मध्यस्थता", "विवाद समाधान", "शासित"],
+            "ip_transfer": ["बौद्धिक संपदा", "कॉपीराइट", "पेटेंट", "ट्रेडमार्क"],
+        }
+        for contract_type, keywords in hindi_contract_keywords.items():
+            self.contract_keywords[contract_type].extend(keywords)
+        for risk_type, keywords in hindi_risk_keywords.items():
+            self.risk_keywords[risk_type].extend(keywords)
+        self.ambiguous_phrases.extend(["उचित", "यथाशीघ्र", "सर्वोत्तम प्रयास", "पर्याप्त", "विवेक पर"])
+        # Hindi place names, reported under their English names
+        self.hindi_locations = {
+            "मुंबई": "Mumbai", "दिल्ली": "Delhi", "बैंगलोर": "Bangalore", "बेंगलुरु": "Bengaluru",
+            "चेन्नई": "Chennai", "कोलकाता": "Kolkata", "हैदराबाद": "Hyderabad", "पुणे": "Pune",
+            "अहमदाबाद": "Ahmedabad", "जयपुर": "Jaipur", "महाराष्ट्र": "Maharashtra", "कर्नाटक": "Karnataka",
+            "तमिलनाडु": "Tamil Nadu", "गुजरात": "Gujarat",
+        }
+
+        # One scanner for every keyword list above, built once
+        all_keywords = list(self.ambiguous_phrases) + [loc.lower() for loc in self.location_keywords]
+        all_keywords.extend(self.hindi_locations)
+        for keywords in list(self.contract_keywords.values()) + list(self.risk_keywords.values()):
+            all_keywords.extend(keywords)
+        # Devanagari keywords get their own scanner, run only on Devanagari lines:
+        # non-ASCII branches in the shared pattern would slow down every English scan
+        self.scanner = KeywordScanner([kw for kw in all_keywords if kw.isascii()])
+        self.hindi_scanner = KeywordScanner([kw for kw in all_keywords if not kw.isascii()])
+        self._last_scan = None
+        
+        # Entity regexes, compiled and fused once; the Hindi set only runs on Devanagari segments
+        self.patterns = PatternRegistry()
+        self.hindi_patterns = PatternRegistry(HINDI_ENTITY_PATTERNS, guard=HINDI_GUARD)
+        self.segmenter = ClauseSegmenter()
+
+    def iter_pdf_pages(self, file_path, workers=None):
+        """Stream a PDF page by page.
+
+        Yields (page_number, offset, page_text) where offset is the position
+        of the page in the joined document text. With workers > 1 the page
+        range is split across a process pool; pages are still yielded in order,
+        as soon as each range is decoded.
+        """
+        offset = 0
+        if workers and workers > 1:
+            with open(file_path, "rb") as file:
+                page_count = len(PyPDF2.PdfReader(file).pages)
+            # Several small ranges per worker so the first pages arrive early
+            step = max(1, -(-page_count // (workers * 4)))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_extract_pdf_page_range, file_path, start, min(start + step, page_count))
+                           for start in range(0, page_count, step)]
+                page_number = 1
+                for future in futures:
+                    for page_text in future.result():
+                        yield page_number, offset, page_text
+                        offset += len(page_text)
+                        page_number += 1
+            return
+        
         with open(file_path, "rb") as file:
             reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text()
-        return text
+            for page_number, page in enumerate(reader.pages, 1):
+                page_text = page.extract_text() or ""
+                yield page_number, offset, page_text
+                offset += len(page_text)
+
+    def extract_text_from_pdf(self, file_path, workers=None):
+        return "".join(page_text for _, _, page_text in self.iter_pdf_pages(file_path, workers))
 
     def extract_text_from_docx(self, file_path):
         doc = Document(file_path)
@@ -49,10 +175,10 @@ class NLPEngine:
         with open(file_path, "r", encoding="utf-8") as file:
             return file.read()
 
-    def process_file(self, file_path):
+    def process_file(self, file_path, workers=None):
         ext = os.path.splitext(file_path)[1].lower()
         if ext == ".pdf":
-            return self.extract_text_from_pdf(file_path)
+            return self.extract_text_from_pdf(file_path, workers)
         elif ext == ".docx":
             return self.extract_text_from_docx(file_path)
         elif ext == ".txt":
@@ -60,13 +186,78 @@ class NLPEngine:
         else:
             raise ValueError(f"Unsupported file format: {ext}")
 
+    def iter_pages(self, file_path, workers=None):
+        """Stream any supported file as (page_number, offset, page_text).
+
+        DOCX and TXT files have no page structure and come back as one page.
+        """
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == ".pdf":
+            yield from self.iter_pdf_pages(file_path, workers)
+        else:
+            yield 1, 0, self.process_file(file_path)
+
+    def process_file_pages(self, file_path, workers=None):
+        """Extract text plus page offsets: returns (text, page_offsets)"""
+        page_texts = []
+        page_offsets = []
+        ext = os.path.splitext(file_path)[1].lower() or ".txt"
+        with metrics.stage("extract" + ext, bytes=os.path.getsize(file_path)) as sizes:
+            for _, offset, page_text in self.iter_pages(file_path, workers):
+                page_offsets.append(offset)
+                page_texts.append(page_text)
+            text = "".join(page_texts)
+            sizes.update(chars=len(text), pages=len(page_offsets))
+        return text, page_offsets
+
+    def process_bytes(self, data, file_name, workers=None):
+        """Extract text plus page offsets from uploaded file content.
+
+        The bytes go to a private temporary file (removed afterwards), so
+        uploads never land in the data/ folder.
+        """
+        ext = os.path.splitext(file_name)[1].lower()
+        fd, tmp_path = tempfile.mkstemp(suffix=ext)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            return self.process_file_pages(tmp_path, workers)
+        finally:
+            os.remove(tmp_path)
+
+    @staticmethod
+    def page_at(page_offsets, offset):
+        """1-based page number containing a character offset"""
+        if not page_offsets:
+            return 1
+        return max(1, bisect_right(page_offsets, offset))
+
+    def scan_keywords(self, text):
+        """Scan text once for every known keyword.
+
+        Returns (text_lower, hits) where hits maps keyword -> offsets in
+        text_lower. The last result is kept so that the classification,
+        risk, ambiguity and location passes share a single scan.
+        """
+        last = self._last_scan
+        if last is not None and last[0] == text:
+            return last[1], last[2]
+        
+        text_lower = text.lower()
+        hits = self.scanner.scan(text_lower)
+        for start, end in devanagari_segments(text_lower):
+            for keyword, offsets in self.hindi_scanner.scan(text_lower, start, end).items():
+                hits.setdefault(keyword, []).extend(offsets)
+        self._last_scan = (text, text_lower, hits)
+        return text_lower, hits
+
     def classify_contract_type(self, text):
         """Classify contract type based on keyword matching"""
-        text_lower = text.lower()
+        _, hits = self.scan_keywords(text)
         scores = {}
         
         for contract_type, keywords in self.contract_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
+            score = sum(1 for keyword in keywords if keyword in hits)
             scores[contract_type] = score
         
         # Return type with highest score
@@ -74,37 +265,33 @@ class NLPEngine:
             return max(scores, key=scores.get)
         return "General"
 
-    def extract_clauses(self, text):
+    def extract_clause_tree(self, text, page_offsets=None):
+        """Hierarchical clauses (1 -> 1.1 -> 1.1.a) with character offsets and page numbers"""
+        return self.segmenter.segment(text, page_offsets)
+
+    def extract_clauses(self, text, page_offsets=None):
         """Extract numbered clauses and sub-clauses from contract"""
         clauses = []
         
-        # Pattern for numbered clauses: 1., 1.1, etc.
-        clause_pattern = r'(\d+\.(?:\d+\.?)*)\s+([A-Z][^\n]+(?:\n(?!\d+\.)[^\n]+)*)'
-        matches = re.finditer(clause_pattern, text)
-        
-        for match in matches:
-            clause_num = match.group(1)
-            clause_text = match.group(2).strip()
-            clauses.append({
-                "number": clause_num,
-                "text": clause_text[:500],  # Limit length
-                "full_text": clause_text
-            })
-        
-        # If no numbered clauses found, try section headers
-        if not clauses:
-            section_pattern = r'([A-Z][A-Z\s]+):\s*([^\n]+(?:\n(?![A-Z][A-Z\s]+:)[^\n]+)*)'
-            matches = re.finditer(section_pattern, text)
-            
-            for idx, match in enumerate(matches, 1):
-                section_name = match.group(1).strip()
-                section_text = match.group(2).strip()
-                clauses.append({
-                    "number": str(idx),
-                    "name": section_name,
-                    "text": section_text[:500],
-                    "full_text": section_text
-                })
+        # Numbered clauses (1., 1.1, ...) or, failing that, "HEADER:" sections.
+        # Lettered sub-items stay inside their clause's text here; see extract_clause_tree.
+        for node in self.segmenter.walk(self.extract_clause_tree(text, page_offsets)):
+            if node["number"].rsplit(".", 1)[-1].isalpha():
+                continue
+            clause = {
+                "number": node["number"],
+                "text": node["text"][:500],  # Limit length
+                "full_text": node["text"],
+                "start": node["start"],
+                "end": node["end"],
+                "page": node["page"],
+                "level": node["level"],
+            }
+            if "name" in node:
+                clause["name"] = node["name"]
+            if is_boilerplate(node["text"], node.get("name")):
+                clause["boilerplate"] = True
+            clauses.append(clause)
         
         return clauses
 
@@ -120,46 +307,26 @@ class NLPEngine:
             "durations": [],
         }
         
-        # Regex patterns for entity extraction
-        # Dates
-        date_patterns = [
-            r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',  # DD/MM/YYYY or DD-MM-YYYY
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',  # Month DD, YYYY
-            r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}\b'  # DD Month YYYY
-        ]
-        for pattern in date_patterns:
-            entities["dates"].extend(re.findall(pattern, text, re.IGNORECASE))
-        
-        # Money amounts
-        money_patterns = [
-            r'(?:INR|Rs\.?|₹)\s*[\d,]+(?:\.\d{2})?',  # INR/Rs/₹ 1,000.00
-            r'\$\s*[\d,]+(?:\.\d{2})?',  # $1,000.00
-            r'\b\d+\s*(?:lakhs?|crores?|thousands?|millions?)\b'  # 5 lakhs, 2 crores
-        ]
-        for pattern in money_patterns:
-            entities["amounts"].extend(re.findall(pattern, text, re.IGNORECASE))
-        
-        # Organizations (common patterns)
-        org_patterns = [
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:Pvt\.?\s+)?Ltd\.?\b',  # Company Ltd
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+Inc\.?\b',  # Company Inc
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+Corp\.?\b',  # Company Corp
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+LLC\b'  # Company LLC
-        ]
-        for pattern in org_patterns:
-            entities["organizations"].extend(re.findall(pattern, text))
+        # Dates, amounts, organizations, CIN and GST in one regex pass
+        identifiers = {"cin": [], "gst": []}
+        for kind, value, _, _ in self.iter_entities(text):
+            if kind in identifiers:
+                identifiers[kind].append(value)
+            else:
+                entities[kind].append(value)
         
         # Locations (Indian cities and states)
-        location_keywords = ['Mumbai', 'Delhi', 'Bangalore', 'Bengaluru', 'Chennai', 'Kolkata', 'Hyderabad', 
-                            'Pune', 'Ahmedabad', 'Jaipur', 'Maharashtra', 'Karnataka', 'Tamil Nadu', 'Gujarat']
-        for location in location_keywords:
-            if location.lower() in text.lower():
+        _, hits = self.scan_keywords(text)
+        for location in self.location_keywords:
+            if location.lower() in hits:
+                entities["locations"].append(location)
+        for hindi_name, location in self.hindi_locations.items():
+            if hindi_name in hits:
                 entities["locations"].append(location)
         
         # Extract parties (look for "between" clauses)
-        party_pattern = r'between\s+([A-Z][a-zA-Z\s&.]+?)(?:\s+and\s+|\s*,)'
-        parties_found = re.findall(party_pattern, text, re.IGNORECASE)
-        entities["parties"] = [p.strip() for p in parties_found[:2]]
+        parties_found = islice(self.patterns.party_pattern.finditer(text), 2)
+        entities["parties"] = [m.group(1).strip() for m in parties_found]
         
         # If no parties found, use first 2 organizations
         if not entities["parties"] and entities["organizations"]:
@@ -169,22 +336,48 @@ class NLPEngine:
         for key in entities:
             entities[key] = list(dict.fromkeys(entities[key]))[:10]  # Keep first 10 unique
         
-        # Extract CIN, GST numbers (works without spaCy)
-        entities["cin"] = re.findall(r'CIN:\s*([A-Z0-9]{21})', text)
-        entities["gst"] = re.findall(r'GST:\s*(\d{2}[A-Z]{5}\d{4}[A-Z]{1}\d{1}[A-Z]{1}\d{1})', text)
+        # CIN, GST numbers (works without spaCy)
+        entities["cin"] = identifiers["cin"]
+        entities["gst"] = identifiers["gst"]
         
         return entities
 
+    def iter_entities(self, text):
+        """(kind, value, start, end) for every entity, in document order.
+
+        The English patterns (which also catch "INR 5,00,000" or "01/02/2024"
+        inside Hindi sentences) run over the whole text; the Hindi patterns
+        only over the lines that contain Devanagari.
+        """
+        segments = devanagari_segments(text)
+        if not segments:
+            return self.patterns.finditer(text)
+        matches = list(self.patterns.finditer(text))
+        for start, end in segments:
+            matches.extend(self.hindi_patterns.finditer(text, start, end))
+        matches.sort(key=lambda match: match[2])
+        return iter(matches)
+
+    def extract_entity_spans(self, text):
+        """Typed entities with character spans: [{"type", "value", "start", "end"}]"""
+        return [
+            {"type": kind, "value": value, "start": start, "end": end}
+            for kind, value, start, end in self.iter_entities(normalize_digits(text))
+        ]
+
     def identify_obligations_rights(self, text):
         """Identify obligations, rights, and prohibitions in contract"""
         obligations = []
         rights = []
         prohibitions = []
         
-        # Keywords for classification
-        obligation_verbs = ["shall", "must", "will", "agrees to", "undertakes to", "required to"]
-        right_verbs = ["may", "entitled to", "has the right", "can", "permitted to"]
-        prohibition_verbs = ["shall not", "must not", "prohibited", "forbidden", "may not"]
+        # Keywords for classification (English, then Hindi)
+        obligation_verbs = ["shall", "must", "will", "agrees to", "undertakes to", "required to",
+                            "करेगा", "करेगी", "होगा", "होगी", "बाध्य"]
+        right_verbs = ["may", "entitled to", "has the right", "can", "permitted to",
+                       "सकता", "सकती", "हकदार", "अधिकार होगा"]
+        prohibition_verbs = ["shall not", "must not", "prohibited", "forbidden", "may not",
+                             "नहीं कर सकता", "नहीं कर सकती", "नहीं करेगा", "नहीं करेगी", "निषिद्ध", "वर्जित"]
         
         if self.nlp is not None:
             try:
@@ -206,7 +399,7 @@ class NLPEngine:
                 print(f"Error in obligations/rights detection: {e}")
         else:
             # Fallback: simple sentence splitting
-            sentences = re.split(r'[.!?]+', text[:50000])
+            sentences = re.split(r'[.!?।]+', text[:50000])
             for sent in sentences:
                 sent_text = sent.lower()
                 if any(verb in sent_text for verb in prohibition_verbs):
@@ -224,11 +417,11 @@ class NLPEngine:
 
     def detect_risk_indicators(self, text):
         """Detect presence of high-risk clause types"""
-        text_lower = text.lower()
+        _, hits = self.scan_keywords(text)
         detected_risks = {}
         
         for risk_type, keywords in self.risk_keywords.items():
-            matches = [kw for kw in keywords if kw in text_lower]
+            matches = [kw for kw in keywords if kw in hits]
             if matches:
                 detected_risks[risk_type] = {
                     "present": True,
@@ -239,27 +432,41 @@ class NLPEngine:
 
     def detect_ambiguities(self, text):
         """Detect potentially ambiguous language"""
-        ambiguous_phrases = [
-            "reasonable", "best efforts", "as soon as possible", "promptly",
-            "appropriate", "sufficient", "adequate", "material", "substantial"
-        ]
-        
-        text_lower = text.lower()
+        text_lower, hits = self.scan_keywords(text)
         found_ambiguities = []
         
-        for phrase in ambiguous_phrases:
-            if phrase in text_lower:
-                # Find context around the phrase
-                pattern = r'.{0,50}' + re.escape(phrase) + r'.{0,50}'
-                matches = re.findall(pattern, text_lower, re.IGNORECASE)
-                if matches:
-                    found_ambiguities.append({
-                        "phrase": phrase,
-                        "context": matches[0]
-                    })
+        for phrase in self.ambiguous_phrases:
+            if phrase in hits:
+                # Context: up to 50 characters either side, within the same line
+                offset = hits[phrase][0]
+                line_start = text_lower.rfind("\n", 0, offset) + 1
+                line_end = text_lower.find("\n", offset)
+                if line_end == -1:
+                    line_end = len(text_lower)
+                found_ambiguities.append({
+                    "phrase": phrase,
+                    "context": text_lower[max(line_start, offset - 50):min(line_end, offset + len(phrase) + 50)]
+                })
         
         return found_ambiguities[:5]  # Limit to 5
 
+    def run_pipeline(self, text, page_offsets=None):
+        """Run every NLP pass and return the nlp_data dict used by LegalAnalyzer"""
+        # Devanagari numerals become ASCII digits (offsets are unchanged) so that
+        # clause numbers, dates and amounts match the same patterns
+        text = normalize_digits(text)
+        timed = metrics.call
+        with metrics.stage("nlp.pipeline", chars=len(text)):
+            return {
+                'language': timed("nlp.language", detect_language, text),
+                'contract_type': timed("nlp.contract_type", self.classify_contract_type, text),
+                'entities': timed("nlp.entities", self.get_enhanced_entities, text),
+                'clauses': timed("nlp.clauses", self.extract_clauses, text, page_offsets),
+                'obligations_rights': timed("nlp.obligations_rights", self.identify_obligations_rights, text),
+                'risk_indicators': timed("nlp.risk_indicators", self.detect_risk_indicators, text),
+                'ambiguities': timed("nlp.ambiguities", self.detect_ambiguities, text)
+            }
+
     def get_basic_entities(self, text):
         """Legacy method for backward compatibility"""
         return self.get_enhanced_entities(text)
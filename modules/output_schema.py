@@ -0,0 +1,280 @@
+import json
+import re
+
+# Field kinds; objects are dicts of fields and lists are one-element lists of the item kind
+TEXT = "text"
+OPTIONAL_TEXT = "optional_text"  # null allowed
+SCORE = "score"  # 0-100
+
+ANALYSIS_SCHEMA = {
+    "language_detected": TEXT,
+    "contract_info": {
+        "type": TEXT, "parties": [TEXT], "effective_date": OPTIONAL_TEXT, "duration": OPTIONAL_TEXT,
+        "jurisdiction": TEXT, "governing_law": TEXT, "key_amounts": [TEXT],
+    },
+    "risk_assessment": {
+        "composite_score": SCORE, "risk_level": TEXT, "summary": TEXT,
+        "key_risks": [{
+            "clause": TEXT, "risk_level": TEXT, "category": TEXT, "explanation": TEXT, "legal_concern": TEXT,
+            "suggestion": TEXT, "priority": TEXT,
+        }],
+    },
+    "clause_breakdown": [{
+        "clause_number": TEXT, "clause_name": TEXT, "original_text": TEXT, "simplified_explanation": TEXT,
+        "obligations": [TEXT], "rights": [TEXT], "red_flags": [TEXT],
+    }],
+    "compliance_check": [{"law": TEXT, "section": TEXT, "status": TEXT, "notes": TEXT, "recommendation": TEXT}],
+    "unfavorable_terms": [{"term": TEXT, "impact": TEXT, "negotiation_strategy": TEXT}],
+    "missing_protections": [TEXT],
+    "overall_recommendation": {"verdict": TEXT, "reasoning": TEXT, "priority_negotiations": [TEXT]},
+}
+
+# A section lacking one of these fields is re-requested; other fields are filled with defaults
+REQUIRED_FIELDS = {
+    "risk_assessment": ("composite_score", "risk_level", "summary"),
+    "overall_recommendation": ("verdict",),
+}
+OPTIONAL_SECTIONS = ("language_detected",)
+
+# Shown when a section could not be obtained from the model
+SECTION_DEFAULTS = {
+    "language_detected": "English",
+    "risk_assessment": {"composite_score": 50, "risk_level": "Medium",
+                        "summary": "The model did not return a risk assessment; review the contract manually."},
+    "overall_recommendation": {"verdict": "Seek Legal Counsel",
+                               "reasoning": "The model did not return a recommendation."},
+}
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_CODE_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class InvalidValue(ValueError):
+    """A value that cannot be coerced to its schema kind"""
+
+
+def _text(value, path, fixes, optional=False):
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return None if optional else ""
+    fixes.append(path)
+    if isinstance(value, list):
+        return ", ".join(str(v) for v in value if not isinstance(v, (dict, list)))
+    if isinstance(value, dict):
+        raise InvalidValue(path)
+    return str(value)
+
+
+def _score(value, path, fixes):
+    if isinstance(value, bool) or value is None:
+        raise InvalidValue(path)
+    if not isinstance(value, (int, float)):
+        match = _NUMBER.search(str(value))  # "72", "72/100", "Score: 72"
+        if not match:
+            raise InvalidValue(path)
+        value = float(match.group())
+        fixes.append(path)
+    score = int(round(min(100, max(0, value))))
+    if score != value:
+        fixes.append(path)
+    return score
+
+
+def _empty(spec):
+    if isinstance(spec, list):
+        return []
+    if isinstance(spec, dict):
+        return {name: _empty(field) for name, field in spec.items()}
+    return {OPTIONAL_TEXT: None, SCORE: 0}.get(spec, "")
+
+
+def _compile(spec, path):
+    """Checker function for one schema node: (value, fixes) -> coerced value, or InvalidValue"""
+    if spec == TEXT:
+        return lambda value, fixes: _text(value, path, fixes)
+    if spec == OPTIONAL_TEXT:
+        return lambda value, fixes: _text(value, path, fixes, optional=True)
+    if spec == SCORE:
+        return lambda value, fixes: _score(value, path, fixes)
+
+    if isinstance(spec, list):
+        check_item = _compile(spec[0], path + "[]")
+
+        def check_list(value, fixes):
+            if value is None:
+                fixes.append(path)
+                return []
+            if isinstance(value, (str, dict)):
+                fixes.append(path)
+                value = [value]  # One item where a list was expected
+            elif not isinstance(value, list):
+                raise InvalidValue(path)
+            items = []
+            for item in value:
+                try:
+                    items.append(check_item(item, fixes))
+                except InvalidValue:
+                    fixes.append(path + "[]")  # Unusable item is dropped
+            return items
+        return check_list
+
+    fields = {name: _compile(field, f"{path}.{name}") for name, field in spec.items()}
+    required = REQUIRED_FIELDS.get(path, ())
+    fill_missing = "[]" not in path  # Section fields are read directly; list items are read with .get()
+
+    def check_object(value, fixes):
+        if not isinstance(value, dict):
+            raise InvalidValue(path)
+        checked = dict(value)  # Extra fields are kept
+        for name, check in fields.items():
+            if value.get(name) is None and name in required:
+                raise InvalidValue(f"{path}.{name}")
+            if name not in value:
+                if fill_missing:
+                    checked[name] = _empty(spec[name])
+                continue
+            try:
+                checked[name] = check(value[name], fixes)
+            except InvalidValue:
+                if name in required:
+                    raise
+                fixes.append(f"{path}.{name}")
+                checked[name] = _empty(spec[name])
+        return checked
+    return check_object
+
+
+class AnalysisValidator:
+    """Checks a model reply against ANALYSIS_SCHEMA and coerces what it can.
+
+    Numbers written as text become numbers, a single item where a list was
+    expected becomes a one-item list, unusable list items are dropped and
+    absent section fields get empty values. A section that is absent or
+    cannot be coerced (or lacks a REQUIRED_FIELDS entry) is reported
+    missing, so only that section has to be asked for again; it is filled
+    from SECTION_DEFAULTS in the meantime, so the result is always safe to
+    render.
+    """
+
+    def __init__(self, schema=ANALYSIS_SCHEMA):
+        self.schema = schema
+        self.checks = {name: _compile(spec, name) for name, spec in schema.items()}
+
+    def check_section(self, name, value):
+        """The coerced value of one section, or None when it is not usable"""
+        check = self.checks.get(name)
+        if check is None:
+            return value
+        try:
+            return check(value, [])
+        except InvalidValue:
+            return None
+
+    def validate(self, result):
+        """(coerced result, missing sections, coerced field paths)"""
+        if not isinstance(result, dict):
+            result = {}
+        checked = dict(result)  # Metadata such as model, source or error is kept
+        missing = []
+        fixes = []
+        for name, check in self.checks.items():
+            try:
+                if name not in result:
+                    raise InvalidValue(name)
+                checked[name] = check(result[name], fixes)
+            except InvalidValue:
+                if name not in OPTIONAL_SECTIONS:
+                    missing.append(name)
+                checked[name] = self.default(name)
+        return checked, missing, fixes
+
+    def default(self, name):
+        """UI-safe stand-in for a section the model did not deliver"""
+        value = _empty(self.schema[name])
+        default = json.loads(json.dumps(SECTION_DEFAULTS.get(name)))
+        if isinstance(value, dict) and default:
+            value.update(default)
+        elif default is not None:
+            value = default
+        return value
+
+
+def is_complete(result):
+    """False for a result with defaulted sections or failed chunks: shown, but retried rather than stored"""
+    return not (result.get("incomplete_sections") or result.get("chunk_errors"))
+
+
+def section_request(missing):
+    """Follow-up message asking the model for only the listed sections"""
+    return ("Your reply was cut off or had invalid values in these sections: " + ", ".join(missing)
+            + ". Reply with one JSON object containing only these keys, in the structure given above.")
+
+
+def repair_json(text):
+    """The JSON object in a malformed model reply.
+
+    Handles code fences and text around the object, trailing commas, raw
+    newlines inside strings and output cut off mid-way: the unfinished last
+    member is dropped and open arrays and objects are closed. Raises
+    ValueError when no object can be recovered.
+    """
+    text = _CODE_FENCE.sub("", text.strip())
+    try:
+        value = json.loads(text, strict=False)
+        if isinstance(value, dict):
+            return value
+    except ValueError:
+        pass
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("No JSON object in the model reply")
+
+    out = []
+    stack = []
+    in_string = escape = False
+    cut = None  # (length of out, open brackets) at the last point where the JSON so far is complete
+    for char in text[start:]:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+            out.append(char)
+            cut = (len(out), list(stack))
+            continue
+        elif char in "}]":
+            while out and out[-1] in " \t\r\n,":
+                out.pop()  # Trailing comma
+            if not stack:
+                break
+            out.append(_CLOSERS[stack.pop()])
+            if not stack:
+                break  # Ignore anything after the object
+            cut = (len(out), list(stack))
+            continue
+        elif char == ",":
+            cut = (len(out), list(stack))
+        out.append(char)
+
+    if stack:
+        if cut is None:
+            raise ValueError("No JSON object in the model reply")
+        length, open_brackets = cut
+        repaired = "".join(out[:length]).rstrip(" \t\r\n,:")
+        repaired += "".join(_CLOSERS[b] for b in reversed(open_brackets))
+    else:
+        repaired = "".join(out)
+    value = json.loads(repaired, strict=False)
+    if not isinstance(value, dict):
+        raise ValueError("The model reply is not a JSON object")
+    return value
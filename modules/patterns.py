@@ -0,0 +1,111 @@
+import re
+
+# Entity patterns, grouped by entity type. Each entry is (pattern, case_insensitive).
+# Patterns may define a named group "value" when only part of the match is the entity.
+ENTITY_PATTERNS = {
+    "dates": [
+        (r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b', True),  # DD/MM/YYYY or DD-MM-YYYY
+        (r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b', True),  # Month DD, YYYY
+        (r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}\b', True),  # DD Month YYYY
+    ],
+    "amounts": [
+        (r'(?:INR|Rs\.?|₹)\s*[\d,]+(?:\.\d{2})?', True),  # INR/Rs/₹ 1,000.00
+        (r'\$\s*[\d,]+(?:\.\d{2})?', True),  # $1,000.00
+        (r'\b\d+\s*(?:lakhs?|crores?|thousands?|millions?)\b', True),  # 5 lakhs, 2 crores
+    ],
+    "organizations": [
+        # Company Ltd / Pvt Ltd / Inc / Corp / LLC, one shared name prefix
+        (r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:(?:Pvt\.?\s+)?Ltd\.?\b|Inc\.?\b|Corp\.?\b|LLC\b)', False),
+    ],
+    "cin": [
+        (r'CIN:\s*(?P<value>[A-Z0-9]{21})', False),
+    ],
+    "gst": [
+        (r'GST:\s*(?P<value>\d{2}[A-Z]{5}\d{4}[A-Z]{1}\d{1}[A-Z]{1}\d{1})', False),
+    ],
+}
+
+# Devanagari vowel signs are not \w to the re module, so these patterns use
+# explicit Devanagari lookarounds instead of \b
+_HI_WORD = r'(?!(?:को|के|की|का|और|या|से|में|पर|द्वारा|तथा|एवं)\s)[\u0900-\u097F]+'
+_HI_MONTHS = r'(?:जनवरी|फरवरी|फ़रवरी|मार्च|अप्रैल|मई|जून|जुलाई|अगस्त|सितंबर|सितम्बर|अक्टूबर|अक्तूबर|नवंबर|नवम्बर|दिसंबर|दिसम्बर)'
+
+HINDI_ENTITY_PATTERNS = {
+    "dates": [
+        (r'\d{1,2}\s+' + _HI_MONTHS + r',?\s+\d{4}', False),  # 1 फरवरी 2024
+        (_HI_MONTHS + r'\s+\d{1,2},?\s+\d{4}', False),  # फरवरी 1, 2024
+    ],
+    "amounts": [
+        (r'(?:रु\.?|रुपये|रुपए)\s*[\d,]+(?:\.\d{2})?', False),  # रु. 45,000
+        (r'[\d,]+(?:\.\d{2})?\s*(?:रुपये|रुपए)', False),  # 45,000 रुपये
+        (r'\d+(?:\.\d+)?\s*(?:लाख|करो\u095c|करो\u0921\u093c|करोड|हज़ार|हजार)', False),  # 5 लाख, 2 करोड़
+    ],
+    "organizations": [
+        (_HI_WORD + r'(?:\s+' + _HI_WORD + r'){0,3}\s+(?:प्राइवेट\s+लिमिटेड|प्रा\.?\s*लि\.?|लिमिटेड|इंक)(?![\u0900-\u097F])', False),
+    ],
+}
+
+# Devanagari entities start after a non-letter (there is no \b inside Devanagari words)
+HINDI_GUARD = r"(?<![\u0900-\u097F\w])"
+
+PARTY_PATTERN = r'between\s+([A-Z][a-zA-Z\s&.]+?)(?:\s+and\s+|\s*,)'
+
+
+class PatternRegistry:
+    """Entity regexes compiled once and fused into a single alternation.
+
+    Every pattern becomes a named group (e.g. "dates_1"), so one finditer
+    pass over the document yields typed entities with their spans instead of
+    one re.findall pass per pattern. A single pass cannot return overlapping
+    matches, so the other patterns of the same entity type are also tried at
+    each position inside a match: "Rs. 5 lakhs" still yields both "Rs. 5" and
+    "5 lakhs", as separate per-pattern passes did.
+    """
+
+    def __init__(self, patterns=None, guard=r"(?:\b|(?=[$₹]))"):
+        self.patterns = patterns or ENTITY_PATTERNS
+        self._group_kind = {}
+        self._value_group = {}
+        branches = []
+        for kind, entries in self.patterns.items():
+            for idx, (pattern, ignore_case) in enumerate(entries):
+                group = f"{kind}_{idx}"
+                if "(?P<value>" in pattern:
+                    value_group = f"{group}_value"
+                    pattern = pattern.replace("(?P<value>", f"(?P<{value_group}>")
+                    self._value_group[group] = value_group
+                if ignore_case:
+                    pattern = f"(?i:{pattern})"
+                branches.append(f"(?P<{group}>{pattern})")
+                self._group_kind[group] = kind
+        # Every entity starts at a word boundary (or a currency sign), so the
+        # guard rejects mid-word positions once instead of once per branch
+        self.entity_pattern = re.compile(guard + "(?:" + "|".join(branches) + ")")
+        self.compiled = {
+            kind: [re.compile(pattern, re.IGNORECASE if ignore_case else 0) for pattern, ignore_case in entries]
+            for kind, entries in self.patterns.items()
+        }
+        # group -> the other compiled patterns of its entity type, for overlapping matches
+        self._overlapping = {
+            f"{kind}_{idx}": [other for other_idx, other in enumerate(compiled) if other_idx != idx]
+            for kind, compiled in self.compiled.items() for idx in range(len(compiled))
+        }
+        self.party_pattern = re.compile(PARTY_PATTERN, re.IGNORECASE)
+
+    def finditer(self, text, pos=0, endpos=None):
+        """Yield (kind, value, start, end) for every entity in text[pos:endpos], in document order"""
+        for match in self.entity_pattern.finditer(text, pos, len(text) if endpos is None else endpos):
+            group = match.lastgroup
+            kind = self._group_kind[group]
+            value_group = self._value_group.get(group)
+            if value_group:
+                yield kind, match.group(value_group), match.start(value_group), match.end(value_group)
+            else:
+                yield kind, match.group(), match.start(), match.end()
+            for other in self._overlapping[group]:
+                for position in range(match.start() + 1, match.end()):
+                    inner = other.match(text, position)
+                    if inner:
+                        value = "value" if "value" in other.groupindex else 0
+                        yield kind, inner.group(value), inner.start(value), inner.end(value)
+                        break
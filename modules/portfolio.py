@@ -0,0 +1,246 @@
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.analysis_cache import _ClosingConnection
+
+COMPLIANCE_FAILURES = ("Non-Compliant", "Warning")
+SCORE_BINS = np.arange(0, 110, 10)
+
+
+def _score(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def flatten_analysis(result):
+    """Split one analysis result into (contract, risks, compliance) rows.
+
+    The counterparty is the first listed party, which is usually the party
+    that drafted the contract.
+    """
+    info = result.get('contract_info', {}) or {}
+    risk = result.get('risk_assessment', {}) or {}
+    parties = [p for p in info.get('parties') or [] if p]
+    contract = {
+        "contract_type": info.get('type') or "Unknown",
+        "counterparty": str(parties[0]).strip() if parties else "Unknown",
+        "risk_score": _score(risk.get('composite_score')),
+        "risk_level": risk.get('risk_level') or "Unknown",
+        "verdict": (result.get('overall_recommendation', {}) or {}).get('verdict') or "Unknown",
+    }
+    risks = [
+        (r.get('category') or "Other", r.get('risk_level') or "Unknown")
+        for r in risk.get('key_risks', []) or [] if isinstance(r, dict)
+    ]
+    compliance = [
+        (c.get('law') or "Unknown", c.get('status') or "Unknown")
+        for c in result.get('compliance_check', []) or [] if isinstance(c, dict)
+    ]
+    return contract, risks, compliance
+
+
+class PortfolioStore:
+    """Analyzed contracts stored as flat fact tables for portfolio analytics.
+
+    Each result is exploded on write into one contracts row plus one row per
+    key risk and per compliance check, so the dashboard reads plain columns
+    instead of parsing JSON. A contract is identified by its content hash and
+    re-analysis replaces the earlier row.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS contracts (
+                    id INTEGER PRIMARY KEY,
+                    content_hash TEXT NOT NULL UNIQUE,
+                    ts REAL NOT NULL,
+                    file_name TEXT,
+                    contract_type TEXT,
+                    counterparty TEXT,
+                    risk_score REAL,
+                    risk_level TEXT,
+                    verdict TEXT
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS risks (contract_id INTEGER NOT NULL, category TEXT, risk_level TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS compliance (contract_id INTEGER NOT NULL, law TEXT, status TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_risks_contract ON risks(contract_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_compliance_contract ON compliance(contract_id)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return _ClosingConnection(conn)
+
+    def add(self, result, content_hash, file_name=None, timestamp=None):
+        self.add_many([(result, content_hash, file_name, timestamp)])
+
+    def add_many(self, items):
+        """Store (result, content_hash, file_name, timestamp) tuples in one transaction"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for result, content_hash, file_name, timestamp in items:
+                    if result.get("mock"):
+                        continue  # Demo results say nothing about real exposure
+                    contract, risks, compliance = flatten_analysis(result)
+                    old = conn.execute("SELECT id FROM contracts WHERE content_hash = ?", (content_hash,)).fetchone()
+                    if old is not None:
+                        conn.execute("DELETE FROM risks WHERE contract_id = ?", old)
+                        conn.execute("DELETE FROM compliance WHERE contract_id = ?", old)
+                        conn.execute("DELETE FROM contracts WHERE id = ?", old)
+                    cursor = conn.execute(
+                        "INSERT INTO contracts (content_hash, ts, file_name, contract_type, counterparty, risk_score, "
+                        "risk_level, verdict) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (content_hash, timestamp or time.time(), file_name, contract["contract_type"],
+                         contract["counterparty"], contract["risk_score"], contract["risk_level"], contract["verdict"])
+                    )
+                    contract_id = cursor.lastrowid
+                    conn.executemany("INSERT INTO risks VALUES (?, ?, ?)", [(contract_id, c, l) for c, l in risks])
+                    conn.executemany("INSERT INTO compliance VALUES (?, ?, ?)",
+                                     [(contract_id, law, status) for law, status in compliance])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def load_since(self, last_id=0):
+        """Contracts with id > last_id and their risk / compliance rows, as DataFrames"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            contracts = pd.read_sql_query(
+                "SELECT id, content_hash, ts, file_name, contract_type, counterparty, risk_score, risk_level, verdict "
+                "FROM contracts WHERE id > ? ORDER BY id", conn, params=(last_id,))
+            risks = pd.read_sql_query(
+                "SELECT contract_id, category, risk_level FROM risks WHERE contract_id > ?", conn, params=(last_id,))
+            compliance = pd.read_sql_query(
+                "SELECT contract_id, law, status FROM compliance WHERE contract_id > ?", conn, params=(last_id,))
+        finally:
+            conn.close()
+        return contracts, risks, compliance
+
+
+class PortfolioAnalytics:
+    """Portfolio-wide aggregates over a PortfolioStore.
+
+    The fact tables are held in memory as DataFrames. Every view is built
+    from additive partial aggregates (counts, sums, maxima), so refresh()
+    only aggregates the contracts stored since the last refresh and adds
+    them in; a full recompute is needed only when a re-analysis replaces
+    a contract already loaded.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.last_id = 0
+        self.contracts = pd.DataFrame(columns=["id", "content_hash", "ts", "file_name", "contract_type",
+                                               "counterparty", "risk_score", "risk_level", "verdict"])
+        self.risks = pd.DataFrame(columns=["contract_id", "category", "risk_level"])
+        self.compliance = pd.DataFrame(columns=["contract_id", "law", "status"])
+        self._parts = self._aggregate(self.contracts, self.risks, self.compliance)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _aggregate(contracts, risks, compliance):
+        """Additive partial aggregates of a slice of the portfolio"""
+        scores = contracts["risk_score"].astype(float)
+        valid = scores.to_numpy()[~np.isnan(scores.to_numpy())]
+        by_party = contracts.assign(risk_score=scores).groupby("counterparty")["risk_score"].agg(["count", "sum", "max"])
+        failures = compliance.loc[compliance["status"].isin(COMPLIANCE_FAILURES)]
+        return {
+            "contracts": len(contracts),
+            "scored": len(valid),
+            "score_sum": float(valid.sum()),
+            "high_risk": int(np.count_nonzero(valid >= 70)),
+            "reject": int((contracts["verdict"] == "Reject").sum()),
+            "histogram": np.histogram(valid, bins=SCORE_BINS)[0],
+            "by_party": by_party,
+            "heatmap": pd.crosstab(risks["category"], risks["risk_level"]) if len(risks) else pd.DataFrame(),
+            "failures": pd.crosstab(failures["law"], failures["status"]) if len(failures) else pd.DataFrame(),
+        }
+
+    @staticmethod
+    def _combine(a, b):
+        by_party = a["by_party"].reindex(a["by_party"].index.union(b["by_party"].index))
+        other = b["by_party"].reindex(by_party.index)
+        return {
+            "contracts": a["contracts"] + b["contracts"],
+            "scored": a["scored"] + b["scored"],
+            "score_sum": a["score_sum"] + b["score_sum"],
+            "high_risk": a["high_risk"] + b["high_risk"],
+            "reject": a["reject"] + b["reject"],
+            "histogram": a["histogram"] + b["histogram"],
+            "by_party": pd.DataFrame({
+                "count": by_party["count"].fillna(0) + other["count"].fillna(0),
+                "sum": by_party["sum"].fillna(0) + other["sum"].fillna(0),
+                "max": np.fmax(by_party["max"], other["max"]),
+            }),
+            "heatmap": a["heatmap"].add(b["heatmap"], fill_value=0),
+            "failures": a["failures"].add(b["failures"], fill_value=0),
+        }
+
+    def refresh(self):
+        """Pull newly stored analyses; returns how many arrived"""
+        with self._lock:
+            contracts, risks, compliance = self.store.load_since(self.last_id)
+            if contracts.empty:
+                return 0
+            replaced = self.contracts["content_hash"].isin(contracts["content_hash"]).to_numpy()
+            if replaced.any():
+                stale_ids = self.contracts.loc[replaced, "id"]
+                self.contracts = self.contracts.loc[~replaced]
+                self.risks = self.risks.loc[~self.risks["contract_id"].isin(stale_ids)]
+                self.compliance = self.compliance.loc[~self.compliance["contract_id"].isin(stale_ids)]
+            self.contracts = contracts if self.contracts.empty else pd.concat([self.contracts, contracts], ignore_index=True)
+            self.risks = risks if self.risks.empty else pd.concat([self.risks, risks], ignore_index=True)
+            self.compliance = compliance if self.compliance.empty else pd.concat([self.compliance, compliance],
+                                                                                  ignore_index=True)
+            self.last_id = int(contracts["id"].max())
+            if replaced.any():
+                self._parts = self._aggregate(self.contracts, self.risks, self.compliance)
+            else:
+                self._parts = self._combine(self._parts, self._aggregate(contracts, risks, compliance))
+            return len(contracts)
+
+    def summary(self):
+        parts = self._parts
+        return {
+            "contracts": parts["contracts"],
+            "mean_score": parts["score_sum"] / parts["scored"] if parts["scored"] else 0.0,
+            "high_risk": parts["high_risk"],
+            "reject": parts["reject"],
+        }
+
+    def score_distribution(self):
+        """Contract counts per 10-point risk-score bucket"""
+        labels = [f"{int(lo)}-{int(hi)}" for lo, hi in zip(SCORE_BINS[:-1], SCORE_BINS[1:])]
+        return pd.DataFrame({"score_range": labels, "contracts": self._parts["histogram"]})
+
+    def score_by_counterparty(self, top=20):
+        """Risk-score statistics per counterparty, most exposed (by total score) first"""
+        stats = self._parts["by_party"]
+        stats = stats.assign(mean=stats["sum"] / stats["count"].replace(0, np.nan))
+        stats = stats.nlargest(top, "sum").rename(columns={"sum": "total_score"})
+        return stats[["count", "mean", "max", "total_score"]].astype({"count": int})
+
+    def risk_heatmap(self):
+        """Key-risk counts: category x risk level"""
+        return self._parts["heatmap"].fillna(0).astype(int)
+
+    def compliance_failures(self):
+        """Non-compliant / warning counts per law, most failures first"""
+        table = self._parts["failures"].reindex(columns=list(COMPLIANCE_FAILURES), fill_value=0).fillna(0).astype(int)
+        return table.sort_values(list(COMPLIANCE_FAILURES), ascending=False)
@@ -0,0 +1,212 @@
+import re
+from functools import lru_cache
+
+from modules.chunking import estimate_tokens
+from modules.clause_segmenter import ClauseSegmenter
+from modules.language import normalize_digits
+from modules.nlp_engine import is_boilerplate
+from modules.risk_scorer import RuleBasedRiskScorer
+
+try:
+    import tiktoken
+except ImportError:  # Optional: token counts fall back to the character estimate
+    tiktoken = None
+
+TOKENIZER_ENCODING = "o200k_base"
+
+# Short lines seen this often (digits ignored) are running headers / footers
+REPEATED_LINE_MIN_COUNT = 3
+REPEATED_LINE_MAX_CHARS = 80
+PREAMBLE_POINTS = 1  # Parties and recitals outrank clauses without risk signals
+OMITTED_MARKER = "[...]"
+
+_INLINE_SPACE = re.compile(r"[ \t\u00a0\u200b\f\v]+")
+_DIGITS = re.compile(r"\d+")
+_PAGE_NUMBER = re.compile(r"^(?:page\s*)?#(?:\s*(?:of|/)\s*#)?$|^-\s*#\s*-$")
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception:
+        return None  # BPE file not available offline
+
+
+def count_tokens(text):
+    """Token count from tiktoken when installed, else the chunking estimate"""
+    encoding = _encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _line_key(line):
+    return _DIGITS.sub("#", _INLINE_SPACE.sub(" ", line).strip().lower())
+
+
+def repeated_lines(text):
+    """Keys of short lines that recur across the document (running headers and footers)"""
+    counts = {}
+    for line in text.splitlines():
+        key = _line_key(line)
+        if key and len(key) <= REPEATED_LINE_MAX_CHARS:
+            counts[key] = counts.get(key, 0) + 1
+    return {key for key, count in counts.items() if count >= REPEATED_LINE_MIN_COUNT}
+
+
+def clean_text(text, repeated=frozenset()):
+    """Collapse whitespace, drop page numbers and repeated lines; returns (text, lines removed)"""
+    lines = []
+    removed = 0
+    for line in text.splitlines():
+        line = _INLINE_SPACE.sub(" ", line).strip()
+        if line:
+            key = _line_key(line)
+            if key in repeated or _PAGE_NUMBER.match(key):
+                removed += 1
+                continue
+        elif not lines or not lines[-1]:
+            continue  # One blank line between paragraphs is enough
+        lines.append(line)
+    return "\n".join(lines).strip(), removed
+
+
+def _numbers(pieces):
+    return list(dict.fromkeys(p["number"] for p in pieces if p["number"]))
+
+
+class PromptCompactor:
+    """Shrinks contract text before it is sent to the model.
+
+    Whitespace is collapsed and running headers, footers and page numbers
+    removed. The text is cut into clause pieces (ClauseSegmenter, so a chunk
+    of a contract works as well as the whole document); clauses NLPEngine
+    flagged as boilerplate are dropped unless they carry risk signals. If
+    the rest is still over the token budget, the pieces with the most
+    rule-based risk points are kept, in document order, and the omitted
+    clause numbers are listed so the model does not report them missing.
+    """
+
+    def __init__(self, scorer=None, segmenter=None):
+        self.scorer = scorer or RuleBasedRiskScorer()
+        self.segmenter = segmenter or ClauseSegmenter()
+
+    def _spans(self, text):
+        """(clause number or None, start, end) spans in document order.
+
+        Text outside the numbered clauses (preamble, paragraphs after a
+        blank line, signature block) is split into paragraphs.
+        """
+        nodes = sorted((node for node in self.segmenter.walk(self.segmenter.segment(text))
+                        if not node["number"].rsplit(".", 1)[-1].isalpha()), key=lambda n: n["start"])
+        spans = []
+        position = 0
+        for node in nodes + [None]:
+            start = node["start"] if node else len(text)
+            if start > position:
+                for match in _PARAGRAPH_BREAK.finditer(text, position, start):
+                    spans.append((None, position, match.start()))
+                    position = match.end()
+                spans.append((None, position, start))
+            if node:
+                spans.append((node["number"].rstrip("."), node["start"], node["end"]))
+                position = max(position, node["end"])
+        return spans
+
+    def pieces(self, text, nlp_data=None):
+        """(pieces, lines removed): cleaned text pieces with number, tokens, points and boilerplate"""
+        nlp_data = nlp_data or {}
+        boilerplate = {c["number"].rstrip(".") for c in nlp_data.get('clauses') or [] if c.get("boilerplate")}
+        repeated = repeated_lines(text)
+        pieces = []
+        removed = 0
+        owner = None  # Numbered clause that unnumbered text belongs to
+        for number, start, end in self._spans(text):
+            body, dropped = clean_text(text[start:end], repeated)
+            removed += dropped
+            if not body:
+                continue
+            points = self.scorer.clause_points(body, nlp_data)
+            if number is not None:
+                owner = {"number": number, "points": points, "boilerplate": number in boilerplate}
+                piece = dict(owner)
+            elif owner is None:
+                piece = {"number": None, "points": max(points, PREAMBLE_POINTS), "boilerplate": False}
+            elif is_boilerplate(body, heading=""):
+                # Signature block after the last clause: it and what follows are not clause text
+                owner = {"number": None, "points": 0, "boilerplate": True}
+                piece = {"number": None, "points": points, "boilerplate": True}
+            else:
+                # Further paragraph of a clause
+                piece = {"number": owner["number"], "points": max(points, owner["points"]),
+                         "boilerplate": owner["boilerplate"]}
+            piece["text"] = body
+            piece["tokens"] = count_tokens(body)
+            pieces.append(piece)
+        return pieces, removed
+
+    def compact(self, text, nlp_data=None, token_budget=None):
+        """(compacted text, stats); stats has the token counts before and after"""
+        text = normalize_digits(text)
+        pieces, removed = self.pieces(text, nlp_data)
+        dropped = [i for i, p in enumerate(pieces) if p["boilerplate"] and p["points"] <= 0]
+        candidates = [i for i, p in enumerate(pieces) if not (p["boilerplate"] and p["points"] <= 0)]
+
+        selected = set(candidates)
+        texts = {}
+        if token_budget and sum(pieces[i]["tokens"] for i in candidates) > token_budget:
+            ranked = sorted(candidates, key=lambda i: (-pieces[i]["points"], i))
+            selected = set()
+            used = 0
+            for i in ranked:
+                if used + pieces[i]["tokens"] <= token_budget:
+                    selected.add(i)
+                    used += pieces[i]["tokens"]
+                elif not selected:
+                    # The top-ranked piece alone is over budget: keep its beginning
+                    body = pieces[i]["text"]
+                    texts[i] = body[:len(body) * token_budget // pieces[i]["tokens"]]
+                    selected.add(i)
+                    used = token_budget
+            compacted = self._assemble(pieces, selected, texts, dropped, candidates)
+            # Markers and the omitted-clause note cost tokens too: give up the lowest-ranked pieces
+            while count_tokens(compacted) > token_budget and len(selected) > 1:
+                selected.discard(next(i for i in reversed(ranked) if i in selected))
+                compacted = self._assemble(pieces, selected, texts, dropped, candidates)
+        else:
+            compacted = self._assemble(pieces, selected, texts, dropped, candidates)
+
+        omitted = [pieces[i] for i in candidates if i not in selected]
+        stats = {
+            "tokens_before": count_tokens(text),
+            "tokens_after": count_tokens(compacted),
+            "repeated_lines_removed": removed,
+            "boilerplate_dropped": _numbers([pieces[i] for i in dropped]),
+            "clauses_omitted": _numbers(omitted),
+        }
+        return compacted, stats
+
+    @staticmethod
+    def _assemble(pieces, selected, texts, dropped, candidates):
+        parts = []
+        for i, piece in enumerate(pieces):
+            if i in selected:
+                parts.append(texts.get(i, piece["text"]))
+            elif parts[-1:] != [OMITTED_MARKER] and not (piece["boilerplate"] and piece["points"] <= 0):
+                parts.append(OMITTED_MARKER)
+        notes = []
+        numbers = _numbers([pieces[i] for i in dropped])
+        if dropped:
+            notes.append("Standard boilerplate omitted" + (": clauses " + ", ".join(numbers) if numbers else ""))
+        if len(selected) < len(candidates):
+            numbers = _numbers([pieces[i] for i in candidates if i not in selected])
+            notes.append(f"{OMITTED_MARKER} marks lower-risk text omitted for length"
+                         + (": clauses " + ", ".join(numbers) if numbers else ""))
+        compacted = "\n".join(parts)
+        if notes:
+            compacted += "\n(" + "; ".join(notes) + ".)"
+        return compacted
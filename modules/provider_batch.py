@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+
+from modules.async_analyzer import AsyncLegalAnalyzer, _is_retryable, _retry_after_seconds
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchRequestError(Exception):
+    """A request inside a provider batch job failed or got no result"""
+
+
+class ProviderBatchAnalyzer(AsyncLegalAnalyzer):
+    """AsyncLegalAnalyzer that sends its model calls through the provider's Batch API.
+
+    Every _call_model() adds one line to a pending batch file (OpenAI Batch
+    JSONL: custom_id, method, url, body) and waits for that line's result.
+    The file is uploaded and a batch job created once it holds max_requests
+    lines or no request has arrived for collect_seconds; the job is polled
+    every poll_seconds and its output lines are matched back to the waiting
+    calls by custom_id. Cache lookups, chunking, triage and dedup sit above
+    _call_model and work unchanged.
+
+    custom_id is a hash of the request body, and submitted jobs are recorded
+    in state_path: a re-run after an interruption waits for the jobs still
+    running at the provider instead of submitting the same requests again.
+    base_url can point at a local fake of the Files and Batches endpoints
+    (benchmarks/bench_provider_batch.py). A section re-request is a call
+    like any other, so it waits for a further batch job.
+    """
+
+    def __init__(self, *args, state_path=None, max_requests=5000, collect_seconds=10, poll_seconds=60,
+                 completion_window="24h", **kwargs):
+        super().__init__(*args, **kwargs)
+        # BatchRunner keeps about this many contracts in flight, so a full batch can build up
+        self.max_concurrency = max_requests
+        self.state_path = state_path
+        self.max_requests = max_requests
+        self.collect_seconds = collect_seconds
+        self.poll_seconds = poll_seconds
+        self.completion_window = completion_window
+        self.jobs_submitted = 0
+        self.pending = {}  # custom_id -> request body, not uploaded yet
+        self.waiters = {}  # custom_id -> futures of the calls waiting for it
+        self.jobs = self._load_state()  # batch id -> custom_ids, this run's and earlier runs' unfinished jobs
+        self.submitted = {cid: batch_id for batch_id, cids in self.jobs.items() for cid in cids}
+        self.polls = {}  # batch id -> polling task
+        self._collector = None
+        self._last_added = 0.0
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.jobs, f)
+        os.replace(tmp, self.state_path)
+
+    async def _call_model(self, messages, model=None):
+        body = {"model": model or self.model, "messages": messages, "response_format": {"type": "json_object"},
+                "temperature": 0.3}
+        custom_id = hashlib.sha256(json.dumps(body, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(custom_id, []).append(future)
+
+        batch_id = self.submitted.get(custom_id)
+        if batch_id is not None:
+            if batch_id not in self.polls:
+                print(f"📦 Resuming provider batch {batch_id}")
+                self.polls[batch_id] = asyncio.create_task(self._poll(batch_id))
+        elif custom_id not in self.pending:
+            self.pending[custom_id] = body
+            self._last_added = time.monotonic()
+            if self._collector is None:
+                self._collector = asyncio.create_task(self._collect())
+        return self._parse_reply(await future)
+
+    async def _collect(self):
+        """Submit the pending requests once the batch is full or no request has come in for a while"""
+        try:
+            while self.pending:
+                idle = time.monotonic() - self._last_added
+                if len(self.pending) < self.max_requests and idle < self.collect_seconds:
+                    await asyncio.sleep(min(1.0, self.collect_seconds - idle))
+                    continue
+                await self._submit(dict(list(self.pending.items())[:self.max_requests]))
+        finally:
+            self._collector = None
+
+    async def _submit(self, requests):
+        for custom_id in requests:
+            del self.pending[custom_id]
+        lines = "\n".join(
+            json.dumps({"custom_id": cid, "method": "POST", "url": BATCH_ENDPOINT, "body": body}, ensure_ascii=False)
+            for cid, body in requests.items()
+        )
+        try:
+            upload = await self._request(self.client.files.create,
+                                         file=("contracts.jsonl", lines.encode("utf-8"), "application/jsonl"),
+                                         purpose="batch")
+            job = await self._request(self.client.batches.create, input_file_id=upload.id, endpoint=BATCH_ENDPOINT,
+                                      completion_window=self.completion_window)
+        except Exception as e:
+            self._resolve(requests, {}, f"Batch submission failed: {e}")
+            return
+        self.calls += len(requests)
+        self.jobs_submitted += 1
+        self.jobs[job.id] = list(requests)
+        self.submitted.update((cid, job.id) for cid in requests)
+        self._save_state()
+        print(f"📦 Submitted provider batch {job.id} ({len(requests)} requests)")
+        self.polls[job.id] = asyncio.create_task(self._poll(job.id))
+
+    async def _poll(self, batch_id):
+        custom_ids = self.jobs.get(batch_id, [])
+        try:
+            while True:
+                job = await self._request(self.client.batches.retrieve, batch_id)
+                if job.status in FINAL_STATUSES:
+                    break
+                await asyncio.sleep(self.poll_seconds)
+            outcomes = {}
+            for file_id in (job.output_file_id, job.error_file_id):
+                if file_id:
+                    content = await self._request(self.client.files.content, file_id)
+                    outcomes.update(parse_output(content.text))
+        except Exception as e:
+            self._resolve(custom_ids, {}, f"Polling batch {batch_id} failed: {e}")
+            return
+        counts = job.request_counts
+        print(f"📦 Provider batch {batch_id} {job.status}"
+              + (f": {counts.completed} completed, {counts.failed} failed" if counts else ""))
+        self._resolve(custom_ids, outcomes, f"Batch {batch_id} {job.status} without a result for this request")
+        self.jobs.pop(batch_id, None)
+        for cid in custom_ids:
+            self.submitted.pop(cid, None)
+        self._save_state()
+
+    def _resolve(self, custom_ids, outcomes, missing):
+        """Complete the calls waiting for custom_ids with their content or an error"""
+        for cid in custom_ids:
+            content, error = outcomes.get(cid, (None, missing))
+            for future in self.waiters.pop(cid, []):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(content)
+                else:
+                    future.set_exception(BatchRequestError(error))
+
+    async def _request(self, method, *args, **kwargs):
+        """Files / Batches API call, retried like chat calls on rate limits and server errors"""
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(method(*args, **kwargs), timeout=self.timeout)
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                retry_after = _retry_after_seconds(e)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.backoff_max))
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        for task in self.polls.values():
+            task.cancel()
+        await super().aclose()
+
+
+def parse_output(text):
+    """custom_id -> (message content, error) from a batch output or error file"""
+    outcomes = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        error = record.get("error") or body.get("error")
+        if error or response.get("status_code") != 200:
+            message = error.get("message") if isinstance(error, dict) else error
+            outcomes[record["custom_id"]] = (None, message or f"HTTP {response.get('status_code')}")
+            continue
+        try:
+            outcomes[record["custom_id"]] = (body["choices"][0]["message"]["content"], None)
+        except (KeyError, IndexError, TypeError):
+            outcomes[record["custom_id"]] = (None, "Malformed batch result")
+    return outcomes
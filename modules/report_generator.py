@@ -5,68 +5,74 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+import io
 import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from modules.metrics import metrics
+
+_worker_generator = None
+
+
+def _init_report_worker(output_dir, prefix):
+    global _worker_generator
+    _worker_generator = ReportGenerator(output_dir=output_dir, prefix=prefix)
+
+
+def _render_report(job):
+    """Process-pool worker for ReportGenerator.generate_bulk"""
+    analysis_data, filename = job
+    return _worker_generator.generate_pdf(analysis_data, filename)
+
 
 class ReportGenerator:
-    def __init__(self, output_dir="logs"):
+    """PDF risk reports.
+
+    Paragraph and table styles are built once per generator and shared by
+    every report. Reports are rendered to bytes in memory (render_pdf_bytes)
+    or to a unique file per call (generate_pdf), so concurrent sessions never
+    overwrite each other; generate_bulk spreads many reports over a process pool.
+    """
+
+    def __init__(self, output_dir="logs", prefix="contract_report"):
         self.output_dir = output_dir
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        self.prefix = prefix
+        self.styles = self._build_styles()
+        self.table_styles = self._build_table_styles()
 
-    def generate_pdf(self, analysis_data, filename="contract_report.pdf"):
-        """Generate comprehensive PDF report from analysis data"""
-        path = os.path.join(self.output_dir, filename)
-        
-        try:
-            doc = SimpleDocTemplate(path, pagesize=letter,
-                                  topMargin=0.5*inch, bottomMargin=0.5*inch)
-            styles = getSampleStyleSheet()
-            elements = []
-            
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Title'],
-                fontSize=24,
-                textColor=colors.HexColor('#1a237e'),
-                spaceAfter=30,
-                alignment=TA_CENTER
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                textColor=colors.HexColor('#283593'),
-                spaceAfter=12,
-                spaceBefore=12
-            )
-            
-            # Title
-            elements.append(Paragraph("⚖️ Contract Risk Assessment Report", title_style))
-            elements.append(Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", 
-                                    styles['Normal']))
-            elements.append(Spacer(1, 20))
-            
-            # Contract Information
-            elements.append(Paragraph("📋 Contract Information", heading_style))
-            contract_info = analysis_data.get('contract_info', {})
-            
-            info_data = [
-                ["Contract Type:", contract_info.get('type', 'N/A')],
-                ["Parties:", ', '.join(contract_info.get('parties', ['N/A']))],
-                ["Jurisdiction:", contract_info.get('jurisdiction', 'N/A')],
-                ["Governing Law:", contract_info.get('governing_law', 'N/A')],
-            ]
-            
-            if contract_info.get('effective_date'):
-                info_data.append(["Effective Date:", contract_info['effective_date']])
-            if contract_info.get('duration'):
-                info_data.append(["Duration:", contract_info['duration']])
-            
-            info_table = Table(info_data, colWidths=[150, 350])
-            info_table.setStyle(TableStyle([
+    @staticmethod
+    def _build_styles():
+        styles = getSampleStyleSheet()
+        styles.add(ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Title'],
+            fontSize=24,
+            textColor=colors.HexColor('#1a237e'),
+            spaceAfter=30,
+            alignment=TA_CENTER
+        ))
+        styles.add(ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            textColor=colors.HexColor('#283593'),
+            spaceAfter=12,
+            spaceBefore=12
+        ))
+        styles.add(ParagraphStyle(
+            'Disclaimer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        ))
+        return styles
+
+    @staticmethod
+    def _build_table_styles():
+        return {
+            "info": TableStyle([
                 ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e8eaf6')),
                 ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#1a237e')),
                 ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
@@ -75,191 +81,256 @@ class ReportGenerator:
                 ('VALIGN', (0, 0), (-1, -1), 'TOP'),
                 ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
                 ('PADDING', (0, 0), (-1, -1), 8),
-            ]))
-            elements.append(info_table)
-            elements.append(Spacer(1, 20))
-            
-            # Risk Assessment
-            elements.append(Paragraph("⚠️ Risk Assessment", heading_style))
-            risk_assessment = analysis_data.get('risk_assessment', {})
-            score = risk_assessment.get('composite_score', 0)
-            risk_level = risk_assessment.get('risk_level', 'Unknown')
+            ]),
+            "risk": TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#d32f2f')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('FONTSIZE', (0, 1), (-1, -1), 9),
+                ('PADDING', (0, 0), (-1, -1), 6),
+            ]),
+            "compliance": TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976d2')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('PADDING', (0, 0), (-1, -1), 6),
+            ]),
+        }
+
+    def unique_filename(self):
+        return f"{self.prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.pdf"
+
+    def generate_pdf(self, analysis_data, filename=None):
+        """Write the report to output_dir and return its path (a unique file name unless one is given)"""
+        # Created on first write only: in-memory rendering works on a read-only filesystem
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, filename or self.unique_filename())
+        data = self.render_pdf_bytes(analysis_data)
+        # Write next to the target and rename, so readers never see a half-written report
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+
+    def render_pdf_bytes(self, analysis_data):
+        """Generate comprehensive PDF report from analysis data, returned as bytes"""
+        with metrics.stage("report.pdf") as sizes:
+            buffer = io.BytesIO()
+            try:
+                doc = SimpleDocTemplate(buffer, pagesize=letter,
+                                      topMargin=0.5*inch, bottomMargin=0.5*inch)
+                doc.build(self._build_elements(analysis_data))
+            except Exception as e:
+                # If PDF generation fails, create a simple text-based PDF
+                print(f"Error generating detailed PDF: {str(e)}")
+                metrics.count("report_fallbacks")
+                buffer = io.BytesIO()
+                self._generate_simple_pdf(analysis_data, buffer)
+            sizes["bytes"] = buffer.getbuffer().nbytes
+        return buffer.getvalue()
+
+    def generate_bulk(self, analyses, filenames=None, workers=None):
+        """Render many reports across a process pool; returns their paths in input order"""
+        analyses = list(analyses)
+        filenames = list(filenames) if filenames is not None else [self.unique_filename() for _ in analyses]
+        jobs = list(zip(analyses, filenames))
+        if not jobs:
+            return []
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        if workers <= 1:
+            return [self.generate_pdf(data, name) for data, name in jobs]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_report_worker,
+                                 initargs=(self.output_dir, self.prefix)) as pool:
+            return list(pool.map(_render_report, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    def _build_elements(self, analysis_data):
+        styles = self.styles
+        elements = []
+        
+        # Title
+        elements.append(Paragraph("⚖️ Contract Risk Assessment Report", styles['CustomTitle']))
+        elements.append(Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", 
+                                styles['Normal']))
+        elements.append(Spacer(1, 20))
+        
+        # Contract Information
+        elements.append(Paragraph("📋 Contract Information", styles['CustomHeading']))
+        contract_info = analysis_data.get('contract_info', {})
+        
+        info_data = [
+            ["Contract Type:", contract_info.get('type', 'N/A')],
+            ["Parties:", ', '.join(contract_info.get('parties', ['N/A']))],
+            ["Jurisdiction:", contract_info.get('jurisdiction', 'N/A')],
+            ["Governing Law:", contract_info.get('governing_law', 'N/A')],
+        ]
+        
+        if contract_info.get('effective_date'):
+            info_data.append(["Effective Date:", contract_info['effective_date']])
+        if contract_info.get('duration'):
+            info_data.append(["Duration:", contract_info['duration']])
+        
+        info_table = Table(info_data, colWidths=[150, 350])
+        info_table.setStyle(self.table_styles['info'])
+        elements.append(info_table)
+        elements.append(Spacer(1, 20))
+        
+        # Risk Assessment
+        elements.append(Paragraph("⚠️ Risk Assessment", styles['CustomHeading']))
+        risk_assessment = analysis_data.get('risk_assessment', {})
+        score = risk_assessment.get('composite_score', 0)
+        risk_level = risk_assessment.get('risk_level', 'Unknown')
+        
+        # Risk score with color
+        score_color = colors.green if score < 30 else (colors.orange if score < 70 else colors.red)
+        elements.append(Paragraph(f"<b>Composite Risk Score:</b> <font color='{score_color.hexval()}'>{score}/100</font> ({risk_level})", 
+                                styles['Normal']))
+        elements.append(Spacer(1, 6))
+        elements.append(Paragraph(f"<b>Summary:</b> {risk_assessment.get('summary', 'N/A')}", 
+                                styles['Normal']))
+        elements.append(Spacer(1, 12))
+        
+        # Overall Recommendation
+        if 'overall_recommendation' in analysis_data:
+            rec = analysis_data['overall_recommendation']
+            verdict = rec.get('verdict', 'Unknown')
+            verdict_color = colors.green if 'Sign' in verdict else (colors.red if 'Reject' in verdict else colors.orange)
             
-            # Risk score with color
-            score_color = colors.green if score < 30 else (colors.orange if score < 70 else colors.red)
-            elements.append(Paragraph(f"<b>Composite Risk Score:</b> <font color='{score_color.hexval()}'>{score}/100</font> ({risk_level})", 
-                                    styles['Normal']))
-            elements.append(Spacer(1, 6))
-            elements.append(Paragraph(f"<b>Summary:</b> {risk_assessment.get('summary', 'N/A')}", 
+            elements.append(Paragraph(f"<b>Recommendation:</b> <font color='{verdict_color.hexval()}'>{verdict}</font>", 
                                     styles['Normal']))
+            elements.append(Paragraph(f"{rec.get('reasoning', '')}", styles['Normal']))
             elements.append(Spacer(1, 12))
+        
+        # Key Risks Table
+        elements.append(Paragraph("🚨 Key Risks & Recommendations", styles['CustomHeading']))
+        
+        key_risks = risk_assessment.get('key_risks', [])
+        if key_risks:
+            risk_data = [["Clause", "Risk Level", "Category", "Recommendation"]]
             
-            # Overall Recommendation
-            if 'overall_recommendation' in analysis_data:
-                rec = analysis_data['overall_recommendation']
-                verdict = rec.get('verdict', 'Unknown')
-                verdict_color = colors.green if 'Sign' in verdict else (colors.red if 'Reject' in verdict else colors.orange)
-                
-                elements.append(Paragraph(f"<b>Recommendation:</b> <font color='{verdict_color.hexval()}'>{verdict}</font>", 
-                                        styles['Normal']))
-                elements.append(Paragraph(f"{rec.get('reasoning', '')}", styles['Normal']))
-                elements.append(Spacer(1, 12))
-            
-            # Key Risks Table
-            elements.append(Paragraph("🚨 Key Risks & Recommendations", heading_style))
-            
-            key_risks = risk_assessment.get('key_risks', [])
-            if key_risks:
-                risk_data = [["Clause", "Risk Level", "Category", "Recommendation"]]
+            for risk in key_risks[:10]:  # Limit to top 10 for PDF
+                clause = risk.get('clause', 'N/A')
+                level = risk.get('risk_level', 'Unknown')
+                category = risk.get('category', 'Other')
+                suggestion = risk.get('suggestion', 'Consult legal advisor')
                 
-                for risk in key_risks[:10]:  # Limit to top 10 for PDF
-                    clause = risk.get('clause', 'N/A')
-                    level = risk.get('risk_level', 'Unknown')
-                    category = risk.get('category', 'Other')
-                    suggestion = risk.get('suggestion', 'Consult legal advisor')
-                    
-                    # Truncate long text
-                    if len(suggestion) > 100:
-                        suggestion = suggestion[:97] + "..."
-                    
-                    risk_data.append([clause, level, category, suggestion])
+                # Truncate long text
+                if len(suggestion) > 100:
+                    suggestion = suggestion[:97] + "..."
                 
-                risk_table = Table(risk_data, colWidths=[100, 70, 80, 250])
-                risk_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#d32f2f')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 9),
-                    ('PADDING', (0, 0), (-1, -1), 6),
-                ]))
-                elements.append(risk_table)
-            else:
-                elements.append(Paragraph("No specific risks identified.", styles['Normal']))
-            
-            elements.append(Spacer(1, 20))
-            
-            # Clause Breakdown
-            elements.append(Paragraph("📑 Clause Analysis", heading_style))
+                risk_data.append([clause, level, category, suggestion])
             
-            # Handle both old and new formats
-            clauses = analysis_data.get('clause_breakdown', analysis_data.get('clause_explanation', []))
-            
-            if clauses:
-                for idx, clause in enumerate(clauses[:8], 1):  # Limit to 8 clauses
-                    # Handle new format (clause_breakdown)
-                    if 'clause_number' in clause:
-                        clause_title = f"{clause.get('clause_number', idx)}. {clause.get('clause_name', 'Unnamed Clause')}"
-                        explanation = clause.get('simplified_explanation', 'N/A')
-                    # Handle old format (clause_explanation)
-                    else:
-                        clause_title = clause.get('clause_name', f'Clause {idx}')
-                        explanation = clause.get('simplified_text', 'N/A')
-                    
-                    elements.append(Paragraph(f"<b>{clause_title}</b>", styles['Heading3']))
-                    elements.append(Paragraph(explanation, styles['Normal']))
-                    
-                    # Add obligations and rights if available (new format)
-                    if 'obligations' in clause and clause['obligations']:
-                        elements.append(Paragraph("<b>Your Obligations:</b>", styles['Normal']))
-                        for ob in clause['obligations'][:3]:
-                            elements.append(Paragraph(f"• {ob}", styles['Normal']))
-                    
-                    if 'red_flags' in clause and clause['red_flags']:
-                        elements.append(Paragraph(f"<font color='red'><b>⚠️ Red Flags:</b> {', '.join(clause['red_flags'])}</font>", 
-                                                styles['Normal']))
-                    
-                    elements.append(Spacer(1, 10))
-            else:
-                elements.append(Paragraph("No clause breakdown available.", styles['Normal']))
-            
-            elements.append(PageBreak())
-            
-            # Compliance Check
-            elements.append(Paragraph("🇮🇳 Indian Law Compliance", heading_style))
-            
-            compliance = analysis_data.get('compliance_check', [])
-            if compliance:
-                comp_data = [["Law/Act", "Status", "Notes"]]
+            risk_table = Table(risk_data, colWidths=[100, 70, 80, 250])
+            risk_table.setStyle(self.table_styles['risk'])
+            elements.append(risk_table)
+        else:
+            elements.append(Paragraph("No specific risks identified.", styles['Normal']))
+        
+        elements.append(Spacer(1, 20))
+        
+        # Clause Breakdown
+        elements.append(Paragraph("📑 Clause Analysis", styles['CustomHeading']))
+        
+        # Handle both old and new formats
+        clauses = analysis_data.get('clause_breakdown', analysis_data.get('clause_explanation', []))
+        
+        if clauses:
+            for idx, clause in enumerate(clauses[:8], 1):  # Limit to 8 clauses
+                # Handle new format (clause_breakdown)
+                if 'clause_number' in clause:
+                    clause_title = f"{clause.get('clause_number', idx)}. {clause.get('clause_name', 'Unnamed Clause')}"
+                    explanation = clause.get('simplified_explanation', 'N/A')
+                # Handle old format (clause_explanation)
+                else:
+                    clause_title = clause.get('clause_name', f'Clause {idx}')
+                    explanation = clause.get('simplified_text', 'N/A')
                 
-                for comp in compliance:
-                    law = comp.get('law', 'N/A')
-                    status = comp.get('status', 'Unknown')
-                    notes = comp.get('notes', 'N/A')
-                    
-                    if len(notes) > 150:
-                        notes = notes[:147] + "..."
-                    
-                    comp_data.append([law, status, notes])
+                elements.append(Paragraph(f"<b>{clause_title}</b>", styles['Heading3']))
+                elements.append(Paragraph(explanation, styles['Normal']))
                 
-                comp_table = Table(comp_data, colWidths=[150, 80, 270])
-                comp_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976d2')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                    ('PADDING', (0, 0), (-1, -1), 6),
-                ]))
-                elements.append(comp_table)
-            else:
-                elements.append(Paragraph("No specific compliance issues identified.", styles['Normal']))
-            
-            elements.append(Spacer(1, 20))
-            
-            # Unfavorable Terms
-            if 'unfavorable_terms' in analysis_data and analysis_data['unfavorable_terms']:
-                elements.append(Paragraph("❌ Unfavorable Terms to Negotiate", heading_style))
+                # Add obligations and rights if available (new format)
+                if 'obligations' in clause and clause['obligations']:
+                    elements.append(Paragraph("<b>Your Obligations:</b>", styles['Normal']))
+                    for ob in clause['obligations'][:3]:
+                        elements.append(Paragraph(f"• {ob}", styles['Normal']))
                 
-                for term in analysis_data['unfavorable_terms'][:5]:
-                    elements.append(Paragraph(f"<b>{term.get('term', 'N/A')}</b>", styles['Heading4']))
-                    elements.append(Paragraph(f"<b>Impact:</b> {term.get('impact', 'N/A')}", styles['Normal']))
-                    elements.append(Paragraph(f"<b>Strategy:</b> {term.get('negotiation_strategy', 'N/A')}", 
+                if 'red_flags' in clause and clause['red_flags']:
+                    elements.append(Paragraph(f"<font color='red'><b>⚠️ Red Flags:</b> {', '.join(clause['red_flags'])}</font>", 
                                             styles['Normal']))
-                    elements.append(Spacer(1, 8))
-            
-            # Priority Negotiations
-            if 'overall_recommendation' in analysis_data and 'priority_negotiations' in analysis_data['overall_recommendation']:
-                elements.append(Paragraph("🎯 Top Priority Negotiations", heading_style))
-                for idx, item in enumerate(analysis_data['overall_recommendation']['priority_negotiations'], 1):
-                    elements.append(Paragraph(f"{idx}. {item}", styles['Normal']))
-                elements.append(Spacer(1, 12))
+                
+                elements.append(Spacer(1, 10))
+        else:
+            elements.append(Paragraph("No clause breakdown available.", styles['Normal']))
+        
+        elements.append(PageBreak())
+        
+        # Compliance Check
+        elements.append(Paragraph("🇮🇳 Indian Law Compliance", styles['CustomHeading']))
+        
+        compliance = analysis_data.get('compliance_check', [])
+        if compliance:
+            comp_data = [["Law/Act", "Status", "Notes"]]
             
-            # Footer/Disclaimer
-            elements.append(Spacer(1, 20))
-            disclaimer_style = ParagraphStyle(
-                'Disclaimer',
-                parent=styles['Normal'],
-                fontSize=8,
-                textColor=colors.grey,
-                alignment=TA_CENTER
-            )
-            elements.append(Paragraph(
-                "⚠️ <b>LEGAL DISCLAIMER:</b> This report provides preliminary analysis only and is NOT legal advice. "
-                "Always consult a qualified legal professional before making decisions based on this analysis.",
-                disclaimer_style
-            ))
+            for comp in compliance:
+                law = comp.get('law', 'N/A')
+                status = comp.get('status', 'Unknown')
+                notes = comp.get('notes', 'N/A')
+                
+                if len(notes) > 150:
+                    notes = notes[:147] + "..."
+                
+                comp_data.append([law, status, notes])
             
-            # Build PDF
-            doc.build(elements)
-            return path
+            comp_table = Table(comp_data, colWidths=[150, 80, 270])
+            comp_table.setStyle(self.table_styles['compliance'])
+            elements.append(comp_table)
+        else:
+            elements.append(Paragraph("No specific compliance issues identified.", styles['Normal']))
+        
+        elements.append(Spacer(1, 20))
+        
+        # Unfavorable Terms
+        if 'unfavorable_terms' in analysis_data and analysis_data['unfavorable_terms']:
+            elements.append(Paragraph("❌ Unfavorable Terms to Negotiate", styles['CustomHeading']))
             
-        except Exception as e:
-            # If PDF generation fails, create a simple text-based PDF
-            print(f"Error generating detailed PDF: {str(e)}")
-            return self._generate_simple_pdf(analysis_data, path)
+            for term in analysis_data['unfavorable_terms'][:5]:
+                elements.append(Paragraph(f"<b>{term.get('term', 'N/A')}</b>", styles['Heading4']))
+                elements.append(Paragraph(f"<b>Impact:</b> {term.get('impact', 'N/A')}", styles['Normal']))
+                elements.append(Paragraph(f"<b>Strategy:</b> {term.get('negotiation_strategy', 'N/A')}", 
+                                        styles['Normal']))
+                elements.append(Spacer(1, 8))
+        
+        # Priority Negotiations
+        if 'overall_recommendation' in analysis_data and 'priority_negotiations' in analysis_data['overall_recommendation']:
+            elements.append(Paragraph("🎯 Top Priority Negotiations", styles['CustomHeading']))
+            for idx, item in enumerate(analysis_data['overall_recommendation']['priority_negotiations'], 1):
+                elements.append(Paragraph(f"{idx}. {item}", styles['Normal']))
+            elements.append(Spacer(1, 12))
+        
+        # Footer/Disclaimer
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph(
+            "⚠️ <b>LEGAL DISCLAIMER:</b> This report provides preliminary analysis only and is NOT legal advice. "
+            "Always consult a qualified legal professional before making decisions based on this analysis.",
+            styles['Disclaimer']
+        ))
+        
+        return elements
     
     def _generate_simple_pdf(self, analysis_data, path):
-        """Fallback simple PDF generation"""
+        """Fallback simple PDF generation (path may also be a file-like object)"""
         try:
             c = canvas.Canvas(path, pagesize=letter)
             width, height = letter
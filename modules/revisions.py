@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+from modules.chunking import merge_analyses
+from modules.output_schema import is_complete
+from modules.risk_scorer import risk_level_for
+
+
+def clause_hash(clause):
+    """Hash of a clause's wording, ignoring whitespace and case"""
+    normalized = re.sub(r"\s+", " ", clause.get("full_text", clause.get("text", ""))).strip().lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def clause_keys(clauses):
+    """Stable keys per clause: the clause number, suffixed when a number repeats"""
+    seen = {}
+    keys = []
+    for clause in clauses:
+        number = str(clause.get("number", ""))
+        seen[number] = seen.get(number, 0) + 1
+        keys.append(number if seen[number] == 1 else f"{number}#{seen[number]}")
+    return keys
+
+
+def fingerprint_clauses(clauses):
+    """Compact form of extract_clauses output that is stored with each revision"""
+    return [
+        {"key": key, "number": clause.get("number"), "title": _clause_title(clause), "hash": clause_hash(clause)}
+        for key, clause in zip(clause_keys(clauses), clauses)
+    ]
+
+
+def diff_clauses(old_fingerprints, new_clauses):
+    """Clause-level diff: returns dict of added / removed / changed / unchanged clause keys"""
+    old = {fp["key"]: fp["hash"] for fp in old_fingerprints}
+    new = {fp["key"]: fp["hash"] for fp in fingerprint_clauses(new_clauses)}
+    return {
+        "added": [k for k in new if k not in old],
+        "removed": [k for k in old if k not in new],
+        "changed": [k for k in new if k in old and old[k] != new[k]],
+        "unchanged": [k for k in new if k in old and old[k] == new[k]],
+    }
+
+
+def _clause_title(clause):
+    if clause.get("name"):
+        return clause["name"]
+    first_line = clause.get("full_text", clause.get("text", "")).split("\n", 1)[0]
+    return first_line[:80].strip()
+
+
+def _refers_to(label, fingerprints):
+    """Does a finding's free-text clause label point at one of these clauses?"""
+    label = str(label or "").lower()
+    if not label:
+        return False
+    numbers = set(re.findall(r"\d+(?:\.\d+)*", label))
+    for fp in fingerprints:
+        number = str(fp.get("number") or "").rstrip(".")
+        if number and number in numbers:
+            return True
+        title = (fp.get("title") or "").lower()
+        if title and (title in label or label in title):
+            return True
+    return False
+
+
+class RevisionStore:
+    """SQLite store of analyzed contract revisions, keyed by a document id"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS revisions (
+                    document_id TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    clauses TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    PRIMARY KEY (document_id, version)
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def latest(self, document_id):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT version, clauses, result FROM revisions WHERE document_id = ? ORDER BY version DESC LIMIT 1",
+                (document_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {"version": row[0], "clauses": json.loads(row[1]), "result": json.loads(row[2])}
+
+    def save(self, document_id, clauses, result):
+        conn = self._connect()
+        try:
+            with conn:
+                current = conn.execute("SELECT COALESCE(MAX(version), 0) FROM revisions WHERE document_id = ?",
+                                       (document_id,)).fetchone()[0]
+                conn.execute(
+                    "INSERT INTO revisions (document_id, version, created_at, clauses, result) VALUES (?, ?, ?, ?, ?)",
+                    (document_id, current + 1, time.time(), json.dumps(fingerprint_clauses(clauses)),
+                     json.dumps(result, ensure_ascii=False))
+                )
+        finally:
+            conn.close()
+        return current + 1
+
+
+class IncrementalAnalyzer:
+    """Re-analyze only the clauses that changed since the last stored revision.
+
+    Findings attributed to unchanged clauses are carried over from the stored
+    result; new and changed clauses are sent to the LLM and their findings
+    merged in. The result carries a "revision" block describing what changed
+    in risk.
+    """
+
+    def __init__(self, analyzer, store):
+        self.analyzer = analyzer
+        self.store = store
+
+    def analyze_revision(self, document_id, text, contract_type="General", nlp_data=None):
+        nlp_data = nlp_data or {}
+        clauses = nlp_data.get("clauses") or []
+        previous = self.store.latest(document_id)
+
+        if previous is None or not clauses or not previous["clauses"]:
+            result = self.analyzer.analyze_contract(text, contract_type, nlp_data)
+            if "error" in result or result.get("mock") or not is_complete(result):
+                return result  # Demo and partial results are never stored as a baseline
+            version = self.store.save(document_id, clauses, result)
+            result["revision"] = {"document_id": document_id, "version": version, "delta": None}
+            return result
+
+        diff = diff_clauses(previous["clauses"], clauses)
+        reanalyze = set(diff["added"]) | set(diff["changed"])
+        result, delta = self.merge_partial(previous["result"], previous["clauses"], clauses, diff,
+                                           text, contract_type, nlp_data)
+        if "error" in result or result.get("mock") or not is_complete(result):
+            return result
+
+        version = self.store.save(document_id, clauses, result) if reanalyze or diff["removed"] else previous["version"]
+        result["revision"] = {"document_id": document_id, "version": version,
+                              "previous_version": previous["version"], "delta": delta}
+        return result
+
+    def merge_partial(self, base_result, base_fingerprints, clauses, diff, text, contract_type, nlp_data):
+        """Re-analyze new/changed clauses and merge them into base_result.
+
+        Returns (result, delta). Also used for near-duplicate contracts, where
+        base_result belongs to a different but closely matching contract.
+        """
+        kept, changed_text, changed_nlp = self._split(base_result, base_fingerprints, clauses, diff, nlp_data)
+        partial = None
+        if changed_text.strip():
+            partial = self.analyzer.analyze_contract(changed_text, contract_type, changed_nlp)
+        return self._merge(base_result, kept, partial, diff, text, changed_text)
+
+    async def amerge_partial(self, base_result, base_fingerprints, clauses, diff, text, contract_type, nlp_data):
+        """merge_partial for an AsyncLegalAnalyzer"""
+        kept, changed_text, changed_nlp = self._split(base_result, base_fingerprints, clauses, diff, nlp_data)
+        partial = None
+        if changed_text.strip():
+            partial = await self.analyzer.analyze_contract(changed_text, contract_type, changed_nlp)
+        return self._merge(base_result, kept, partial, diff, text, changed_text)
+
+    def _split(self, base_result, base_fingerprints, clauses, diff, nlp_data=None):
+        """(findings kept from base_result, text of the clauses to re-analyze, nlp_data for that text)
+
+        The clauses in the returned nlp_data have their start/end offsets
+        rebased onto the re-analyzed text, so chunking splits it correctly.
+        """
+        keys = clause_keys(clauses)
+        reanalyze = set(diff["added"]) | set(diff["changed"])
+        stale = [fp for fp in base_fingerprints if fp["key"] in set(diff["changed"]) | set(diff["removed"])]
+        if not reanalyze and not stale:
+            return json.loads(json.dumps(base_result)), "", nlp_data
+        parts = []
+        changed_clauses = []
+        position = 0
+        for key, clause in zip(keys, clauses):
+            if key not in reanalyze:
+                continue
+            part = f"{clause.get('number', '')} {clause.get('full_text', clause.get('text', ''))}"
+            if parts:
+                position += 2  # Blank line between clauses
+            changed_clauses.append({**clause, "start": position, "end": position + len(part)})
+            parts.append(part)
+            position += len(part)
+        changed_nlp = {**(nlp_data or {}), "clauses": changed_clauses}
+        return self._drop_findings(base_result, stale), "\n\n".join(parts), changed_nlp
+
+    def _merge(self, base_result, kept, partial, diff, text, changed_text):
+        if partial is None:
+            return kept, self._delta(base_result, kept, diff, len(changed_text))
+        if "error" in partial or partial.get("mock"):
+            return partial, None  # Demo findings are not merged into a real analysis
+        merged = merge_analyses([kept, partial])
+        # Score: previous score for the unchanged text, new score for the re-analyzed part
+        unchanged_chars = max(0, len(text) - len(changed_text))
+        base_score = _score(base_result)
+        partial_score = _score(partial)
+        score = round((base_score * unchanged_chars + partial_score * len(changed_text)) /
+                      max(1, unchanged_chars + len(changed_text)))
+        merged["risk_assessment"]["composite_score"] = score
+        merged["risk_assessment"]["risk_level"] = risk_level_for(score)
+        return merged, self._delta(base_result, merged, diff, len(changed_text))
+
+    @staticmethod
+    def _drop_findings(result, stale):
+        """Copy of result without findings that belong to stale clauses"""
+        kept = json.loads(json.dumps(result))
+        risk = kept.setdefault("risk_assessment", {})
+        risk["key_risks"] = [r for r in risk.get("key_risks", []) if not _refers_to(r.get("clause"), stale)]
+        kept["clause_breakdown"] = [
+            c for c in kept.get("clause_breakdown", [])
+            if not _refers_to(f"{c.get('clause_number', '')} {c.get('clause_name', '')}", stale)
+        ]
+        return kept
+
+    @staticmethod
+    def _delta(before, after, diff, chars_sent):
+        def risk_ids(result):
+            return {
+                (str(r.get("clause", "")), str(r.get("category", "")))
+                for r in result.get("risk_assessment", {}).get("key_risks", [])
+            }
+
+        before_risks, after_risks = risk_ids(before), risk_ids(after)
+        return {
+            "score_before": _score(before),
+            "score_after": _score(after),
+            "score_change": _score(after) - _score(before),
+            "risks_added": [{"clause": c, "category": cat} for c, cat in sorted(after_risks - before_risks)],
+            "risks_removed": [{"clause": c, "category": cat} for c, cat in sorted(before_risks - after_risks)],
+            "clauses_added": diff["added"],
+            "clauses_removed": diff["removed"],
+            "clauses_changed": diff["changed"],
+            "clauses_unchanged": len(diff["unchanged"]),
+            "chars_reanalyzed": chars_sent,
+        }
+
+
+def _score(result):
+    try:
+        return int(float(result.get("risk_assessment", {}).get("composite_score", 0)))
+    except (TypeError, ValueError):
+        return 0
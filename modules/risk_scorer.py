@@ -0,0 +1,257 @@
+import re
+
+# Base weight and report wording per risk indicator (NLPEngine.risk_keywords categories)
+RISK_RULES = {
+    "indemnity": {
+        "weight": 12,
+        "category": "Indemnity",
+        "label": "Indemnity Clause",
+        "explanation": "You may have to compensate the other party for losses, possibly including ones you did not cause.",
+        "legal_concern": "Broad indemnities can be one-sided under Sections 124-125 of the Indian Contract Act",
+        "suggestion": "Limit indemnity to direct losses caused by your negligence or misconduct and add a liability cap.",
+    },
+    "termination": {
+        "weight": 10,
+        "category": "Termination",
+        "label": "Termination Terms",
+        "explanation": "Termination rights may let the other party exit on short or no notice.",
+        "legal_concern": "One-sided termination may be challenged as unconscionable under Section 23 of the Indian Contract Act",
+        "suggestion": "Ask for equal notice periods for both parties (30-60 days) and compensation on early exit.",
+    },
+    "penalty": {
+        "weight": 10,
+        "category": "Payment",
+        "label": "Penalty / Liquidated Damages",
+        "explanation": "The contract imposes penalties, fines or forfeiture on you.",
+        "legal_concern": "Only reasonable compensation is recoverable under Section 74 of the Indian Contract Act",
+        "suggestion": "Cap penalties at a genuine pre-estimate of loss and make them mutual.",
+    },
+    "non_compete": {
+        "weight": 12,
+        "category": "Non-compete",
+        "label": "Non-Compete Restriction",
+        "explanation": "A non-compete restricts where and with whom you can work or do business.",
+        "legal_concern": "Restraints of trade are void under Section 27 of the Indian Contract Act, except on sale of goodwill",
+        "suggestion": "Limit to the contract term or a short period, a narrow scope, or replace with non-solicitation.",
+    },
+    "auto_renewal": {
+        "weight": 8,
+        "category": "Term",
+        "label": "Automatic Renewal",
+        "explanation": "The contract renews automatically unless notice is given in time.",
+        "legal_concern": "None specific",
+        "suggestion": "Change to opt-in renewal or reduce the notice window to 30-60 days.",
+    },
+    "jurisdiction": {
+        "weight": 4,
+        "category": "Dispute Resolution",
+        "label": "Jurisdiction / Dispute Resolution",
+        "explanation": "Disputes are tied to a particular forum or procedure, which may be costly for you.",
+        "legal_concern": "Check the seat and rules under the Arbitration and Conciliation Act, 1996",
+        "suggestion": "Prefer arbitration or courts in your own city, with shared costs.",
+    },
+    "ip_transfer": {
+        "weight": 9,
+        "category": "IP",
+        "label": "Intellectual Property",
+        "explanation": "Intellectual property created or used under the contract may pass to the other party.",
+        "legal_concern": "Copyright assignments must be in writing and specify scope under Section 19 of the Copyright Act, 1957",
+        "suggestion": "Keep ownership of pre-existing IP and limit assignment to paid-for deliverables.",
+    },
+}
+
+# Multipliers for risks that matter more in a given contract type
+CONTRACT_TYPE_WEIGHTS = {
+    "Employment": {"non_compete": 1.5, "termination": 1.3, "ip_transfer": 1.2},
+    "Vendor": {"indemnity": 1.3, "penalty": 1.3, "auto_renewal": 1.2},
+    "Service": {"indemnity": 1.2, "penalty": 1.2, "ip_transfer": 1.2},
+    "Lease": {"auto_renewal": 1.4, "penalty": 1.3, "termination": 1.2},
+    "Partnership": {"non_compete": 1.2, "ip_transfer": 1.2, "termination": 1.2},
+    "NDA": {"ip_transfer": 1.4, "non_compete": 1.3, "penalty": 1.2},
+}
+
+# One-sided wording that makes a risky clause worse: (pattern, points, description)
+AGGRAVATORS = [
+    (r"without (?:any )?(?:prior )?(?:notice|cause)|बिना (?:किसी )?(?:सूचना|नोटिस)", 8, "exit without notice or cause"),
+    (r"without (?:any )?(?:notice or )?compensation|बिना (?:किसी )?मुआवज़?े", 8, "no compensation"),
+    (r"unlimited|without (?:any )?limit|असीमित", 10, "unlimited liability"),
+    (r"sole (?:and absolute )?discretion|पूर्ण विवेक", 6, "sole discretion of one party"),
+    (r"irrevocabl|perpetu|in perpetuity|स्थायी रूप से", 5, "irrevocable or perpetual terms"),
+    (r"exclusively to|all (?:rights|intellectual property)|सभी अधिकार", 6, "exclusive transfer of rights"),
+    (r"waive[sd]?\b|परित्याग", 4, "waiver of rights"),
+]
+
+BASE_SCORE = 10
+AMBIGUITY_POINTS = 2
+PROHIBITION_POINTS = 2
+PROHIBITION_CAP = 10
+IMBALANCE_POINTS = 5  # Obligations outnumber rights more than 2:1
+
+
+# Protections whose absence is reported when no clause covers them: (risk type, description)
+EXPECTED_PROTECTIONS = [
+    ("jurisdiction", "Clear dispute resolution mechanism (arbitration preferred over litigation)"),
+    ("termination", "Termination rights and notice periods for both parties"),
+]
+
+
+def risk_level_for(score):
+    if score >= 70:
+        return "High"
+    if score >= 50:
+        return "Medium-High"
+    if score >= 30:
+        return "Medium"
+    return "Low"
+
+
+def _clause_label(clause):
+    title = clause.get("name") or clause.get("text", "").strip().split("\n", 1)[0]
+    return f"Clause {clause['number'].rstrip('.')} ({title[:60]})" if title else f"Clause {clause['number'].rstrip('.')}"
+
+
+class RuleBasedRiskScorer:
+    """Deterministic risk score from the NLP pipeline output, no LLM call.
+
+    Each risk indicator found by NLPEngine adds its weight from RISK_RULES,
+    scaled by the contract type and by how many clauses mention it. One-sided
+    wording (AGGRAVATORS) inside those clauses, ambiguous phrases,
+    prohibitions and an obligation/right imbalance add further points.
+    The result follows the risk_assessment schema of LegalAnalyzer.
+    """
+
+    def __init__(self, rules=None, type_weights=None, low_threshold=35, high_threshold=70):
+        self.rules = rules or RISK_RULES
+        self.type_weights = type_weights or CONTRACT_TYPE_WEIGHTS
+        self.low_threshold = low_threshold
+        self.high_threshold = high_threshold
+        self.aggravators = [(re.compile(pattern, re.IGNORECASE), points, label) for pattern, points, label in AGGRAVATORS]
+
+    def score(self, nlp_data, contract_type=None):
+        """risk_assessment dict: composite_score, risk_level, summary, key_risks"""
+        contract_type = contract_type or nlp_data.get('contract_type', "General")
+        multipliers = self.type_weights.get(contract_type, {})
+        clauses = [(c, c.get("full_text", c.get("text", "")).lower()) for c in nlp_data.get('clauses', [])]
+
+        score = BASE_SCORE
+        key_risks = []
+        for risk_type, indicator in (nlp_data.get('risk_indicators') or {}).items():
+            rule = self.rules.get(risk_type)
+            if rule is None or not indicator.get("present"):
+                continue
+            keywords = indicator.get("keywords_found", [])
+            matching = [(c, body) for c, body in clauses if any(kw in body for kw in keywords)]
+            # A parent clause's text includes its sub-clauses, so count top-level clauses only
+            sections = {c["number"].split(".", 1)[0] for c, _ in matching}
+            spread = 1 + 0.25 * (min(len(sections), 4) - 1) if sections else 1
+            points = rule["weight"] * multipliers.get(risk_type, 1.0) * spread
+
+            found = []
+            for pattern, extra, label in self.aggravators:
+                if any(pattern.search(body) for _, body in matching):
+                    points += extra
+                    found.append(label)
+
+            score += points
+            level = "High" if points >= 15 else ("Medium" if points >= 8 else "Low")
+            explanation = rule["explanation"]
+            if found:
+                explanation += " Flagged wording: " + ", ".join(found) + "."
+            key_risks.append({
+                "clause": _clause_label(matching[0][0]) if matching else rule["label"],
+                "risk_level": level,
+                "category": rule["category"],
+                "explanation": explanation,
+                "legal_concern": rule["legal_concern"],
+                "suggestion": rule["suggestion"],
+                "priority": "Critical" if points >= 20 else level,
+                "points": round(points, 1),
+            })
+
+        ambiguities = nlp_data.get('ambiguities') or []
+        score += AMBIGUITY_POINTS * len(ambiguities)
+        duties = nlp_data.get('obligations_rights') or {}
+        score += min(PROHIBITION_CAP, PROHIBITION_POINTS * len(duties.get("prohibitions", [])))
+        if len(duties.get("obligations", [])) > 2 * max(1, len(duties.get("rights", []))):
+            score += IMBALANCE_POINTS
+
+        score = int(round(min(100, score)))
+        key_risks.sort(key=lambda r: -r["points"])
+        level = risk_level_for(score)
+        summary = (f"Rule-based pre-screen: {len(key_risks)} risk areas detected"
+                   f"{', ' + str(len(ambiguities)) + ' ambiguous phrases' if ambiguities else ''}.")
+        return {"composite_score": score, "risk_level": level, "summary": summary, "key_risks": key_risks}
+
+    def clause_points(self, text, nlp_data, contract_type=None):
+        """Risk points of one passage: weights of the indicators it mentions plus flagged wording"""
+        body = text.lower()
+        multipliers = self.type_weights.get(contract_type or nlp_data.get('contract_type', "General"), {})
+        points = 0
+        for risk_type, indicator in (nlp_data.get('risk_indicators') or {}).items():
+            rule = self.rules.get(risk_type)
+            if rule is None or not indicator.get("present"):
+                continue
+            if any(kw in body for kw in indicator.get("keywords_found", [])):
+                points += rule["weight"] * multipliers.get(risk_type, 1.0)
+        points += sum(extra for pattern, extra, _ in self.aggravators if pattern.search(body))
+        return points
+
+    def triage(self, assessment):
+        """"low", "ambiguous" or "high": only "low" contracts can skip the LLM"""
+        score = assessment["composite_score"]
+        if score >= self.high_threshold:
+            return "high"
+        if score < self.low_threshold and not any(r["risk_level"] == "High" for r in assessment["key_risks"]):
+            return "low"
+        return "ambiguous"
+
+    def analysis(self, nlp_data, contract_type=None, assessment=None):
+        """A complete analysis result built from the rule-based score alone.
+
+        Used for contracts the batch triage keeps away from the LLM; it fills
+        the same sections as LegalAnalyzer so reports, the audit trail and the
+        portfolio treat it like any other result.
+        """
+        contract_type = contract_type or nlp_data.get('contract_type', "General")
+        assessment = assessment or self.score(nlp_data, contract_type)
+        entities = nlp_data.get('entities') or {}
+        found = nlp_data.get('risk_indicators') or {}
+        level = assessment["risk_level"]
+        verdict = {"Low": "Sign as-is", "Medium": "Negotiate"}.get(level, "Seek Legal Counsel")
+        return {
+            "language_detected": nlp_data.get('language', "English"),
+            "contract_info": {
+                "type": contract_type,
+                "parties": (entities.get('parties') or [])[:2],
+                "effective_date": (entities.get('dates') or [None])[0],
+                "duration": (entities.get('durations') or ["Not specified"])[0],
+                "jurisdiction": ", ".join(entities.get('locations', [])[:2]) or "India",
+                "governing_law": "Indian Contract Act, 1872",
+                "key_amounts": (entities.get('amounts') or [])[:5],
+            },
+            "risk_assessment": assessment,
+            "clause_breakdown": [
+                {
+                    "clause_number": clause["number"].rstrip("."),
+                    "clause_name": clause.get("name") or clause.get("text", "").strip().split("\n", 1)[0][:60],
+                    "original_text": clause.get("text", ""),
+                    "simplified_explanation": "",
+                    "obligations": [],
+                    "rights": [],
+                    "red_flags": [],
+                }
+                for clause in nlp_data.get('clauses', []) if clause.get("level", 1) == 1
+            ],
+            "compliance_check": [],
+            "unfavorable_terms": [
+                {"term": r["clause"], "impact": r["explanation"], "negotiation_strategy": r["suggestion"]}
+                for r in assessment["key_risks"] if r["risk_level"] == "High"
+            ],
+            "missing_protections": [text for risk_type, text in EXPECTED_PROTECTIONS if risk_type not in found],
+            "overall_recommendation": {
+                "verdict": verdict,
+                "reasoning": assessment["summary"] + " Scored locally without an LLM review.",
+                "priority_negotiations": [r["suggestion"] for r in assessment["key_risks"][:3]],
+            },
+            "source": "rule_based",
+        }
@@ -0,0 +1,67 @@
+import re
+from collections import defaultdict
+
+
+class KeywordScanner:
+    """Single-pass multi-keyword matcher.
+
+    All keywords are folded into a trie once, and the trie is emitted as a
+    single regular expression. Scanning a document is then one pass of the
+    C regex engine instead of one substring search per keyword. Hits are
+    reported with their character offsets, including overlapping hits
+    (e.g. "partner" inside "partnership").
+    """
+
+    def __init__(self, keywords):
+        self.keywords = sorted({kw.lower() for kw in keywords if kw})
+        self._pattern = re.compile(self._trie_regex(self.keywords))
+        keyword_set = set(self.keywords)
+        # Shorter keywords that are prefixes of a longer one start at the same offset
+        self._prefixes = {
+            kw: [kw[:i] for i in range(1, len(kw) + 1) if kw[:i] in keyword_set]
+            for kw in self.keywords
+        }
+
+    @staticmethod
+    def _trie_regex(keywords):
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def build(node):
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = "(?:" + "|".join(branches) + ")"
+            # Optional continuation keeps the match greedy (longest keyword wins)
+            return body + "?" if "" in node else body
+
+        return build(trie) or "(?!)"
+
+    def scan(self, text, pos=0, endpos=None):
+        """Return {keyword: [offsets]} for every keyword occurrence in text[pos:endpos].
+
+        Matching is case-sensitive; callers pass lowercased text. Offsets are
+        positions in the whole text.
+        """
+        hits = defaultdict(list)
+        match_at = self._pattern.match
+        endpos = len(text) if endpos is None else endpos
+
+        for match in self._pattern.finditer(text, pos, endpos):
+            start, end = match.span()
+            for keyword in self._prefixes[match.group()]:
+                hits[keyword].append(start)
+            # Keywords starting inside this match are skipped by finditer
+            for inner_pos in range(start + 1, end):
+                inner = match_at(text, inner_pos, endpos)
+                if inner:
+                    for keyword in self._prefixes[inner.group()]:
+                        hits[keyword].append(inner_pos)
+
+        for offsets in hits.values():
+            offsets.sort()
+        return dict(hits)
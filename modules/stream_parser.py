@@ -0,0 +1,90 @@
+import json
+
+
+class IncrementalJSONParser:
+    """Parse a streamed JSON object one top-level member at a time.
+
+    feed() takes the next piece of text and returns the (key, value) pairs
+    of the top-level object that became complete with it, so each section
+    can be shown as soon as the model finishes writing it. Every character
+    is examined once, however the text is split, and only the text of the
+    member being written is held for slicing: the pieces are joined once
+    when it completes, so parsing stays linear in the reply length.
+    """
+
+    def __init__(self):
+        self.parts = []  # Every piece fed, joined only when text is read
+        self.pending = []  # Pieces from offset `base` onwards: the member being written
+        self.base = 0
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+        self.done = False
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def feed(self, chunk):
+        completed = []
+        self.parts.append(chunk)
+        self.pending.append(chunk)
+
+        for pos, char in enumerate(chunk, self.pos):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.value_start is None and self.key_start is not None:
+                        self.key = json.loads(self._slice(self.key_start, pos + 1))
+                        self.key_start = None
+                continue
+
+            if char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.value_start is None:
+                    self.key_start = pos
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self._complete(pos, completed)
+                    self.done = True
+            elif char == ":" and self.depth == 1 and self.value_start is None:
+                self.value_start = pos + 1
+            elif char == "," and self.depth == 1:
+                self._complete(pos, completed)
+
+        self.pos += len(chunk)
+        if self.key_start is None and self.value_start is None:
+            # Between members: nothing fed so far is needed again
+            self.pending = []
+            self.base = self.pos
+        return completed
+
+    def _slice(self, start, end=None):
+        """text[start:end] for offsets inside the pending member (end=None: all text fed so far)"""
+        if len(self.pending) > 1:
+            self.pending = ["".join(self.pending)]
+        return self.pending[0][start - self.base:None if end is None else end - self.base]
+
+    def _complete(self, end, completed):
+        if self.key is not None and self.value_start is not None:
+            raw = self._slice(self.value_start, end).strip()
+            try:
+                completed.append((self.key, json.loads(raw)))
+            except ValueError:
+                pass  # Malformed member: leave it to the final full parse
+        # Everything up to the separator is consumed
+        self.pending = [self._slice(end + 1)]
+        self.base = end + 1
+        self.key = None
+        self.value_start = None